@@ -0,0 +1,300 @@
+"""
+本地列式 K 线缓存
+目录结构: <root>/<SYMBOL>/<timeframe>/{timestamp,open,high,low,close,volume}.npy
+timestamp 为 int64 纳秒时间戳, OHLC 为 float64, volume 为 int64。
+读取使用内存映射 (mmap), 按日期区间切片不复制数据。
+
+用法:
+    python scripts/bar_store.py ingest bars.csv --symbol AAPL --timeframe 15Min
+    python scripts/bar_store.py ingest alpaca_dump.json --timeframe 15Min
+    python scripts/bar_store.py info
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / "data" / "bars"
+COLUMNS = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.int64,
+}
+# Alpaca v2 bars 缩写字段
+FIELD_ALIASES = {
+    "t": "timestamp", "time": "timestamp", "date": "timestamp", "datetime": "timestamp",
+    "o": "open", "h": "high", "l": "low", "c": "close", "v": "volume",
+}
+NS_PER_DAY = 86400 * 10**9
+
+
+def parse_timestamp(value) -> int:
+    """ISO 字符串 / 秒 / 毫秒 / 纳秒 → int64 纳秒 (UTC)"""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.lstrip("-").isdigit()):
+        v = int(float(value))
+        if abs(v) < 10**11:
+            return v * 10**9
+        if abs(v) < 10**14:
+            return v * 10**6
+        return v
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) * 10**9 + dt.microsecond * 1000
+
+
+def format_timestamp(ns: int) -> str:
+    """int64 纳秒 → ISO 字符串 (与 simulate_bars 格式一致)"""
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def records_to_columns(records):
+    """bar 字典列表 (完整或 Alpaca 缩写字段) → 列式数组"""
+    rows = [{FIELD_ALIASES.get(k.lower(), k.lower()): v for k, v in r.items()} for r in records]
+    columns = {
+        "timestamp": np.fromiter((parse_timestamp(r["timestamp"]) for r in rows),
+                                 dtype=np.int64, count=len(rows)),
+    }
+    for name in ("open", "high", "low", "close"):
+        columns[name] = np.fromiter((float(r[name]) for r in rows), dtype=np.float64, count=len(rows))
+    columns["volume"] = np.fromiter((int(float(r.get("volume", 0))) for r in rows),
+                                    dtype=np.int64, count=len(rows))
+    return columns
+
+
+def read_csv(path):
+    """读取 CSV (表头需包含 timestamp/open/high/low/close/volume 或缩写)"""
+    with open(path, newline="") as f:
+        return records_to_columns(list(csv.DictReader(f)))
+
+
+def read_json(path):
+    """
+    读取 JSON / JSONL bar 数据, 返回 {symbol 或 None: columns}
+    支持: bar 列表 / {"bars": [...]} / Alpaca 多标的 {"bars": {"AAPL": [...]}}
+    """
+    text = Path(path).read_text()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if isinstance(data, dict):
+        symbol = data.get("symbol")
+        data = data.get("bars", data)
+        if isinstance(data, dict):
+            return {sym: records_to_columns(rows) for sym, rows in data.items()}
+        return {symbol: records_to_columns(data)}
+    return {None: records_to_columns(data)}
+
+
+def columns_to_bars(columns):
+    """列式数组 → bar 字典列表"""
+    cols = {name: columns[name].tolist() for name in COLUMNS}
+    return [
+        {
+            "timestamp": format_timestamp(cols["timestamp"][i]),
+            "open": cols["open"][i],
+            "high": cols["high"][i],
+            "low": cols["low"][i],
+            "close": cols["close"][i],
+            "volume": cols["volume"][i],
+        }
+        for i in range(len(cols["timestamp"]))
+    ]
+
+
+class BarSeries:
+    """单个标的/周期的列式视图 (各列为 mmap 数组或其切片)"""
+
+    def __init__(self, symbol, timeframe, columns):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def slice(self, start=None, end=None):
+        """按时间切片 [start, end), 参数为 ISO 字符串或纳秒; 返回零拷贝视图"""
+        ts = self.columns["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(ts, parse_timestamp(start), side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, parse_timestamp(end), side="left"))
+        return BarSeries(self.symbol, self.timeframe,
+                         {name: col[lo:hi] for name, col in self.columns.items()})
+
+    def last_days(self, days):
+        """最后 days 天的数据"""
+        ts = self.columns["timestamp"]
+        if len(ts) == 0:
+            return self
+        return self.slice(int(ts[-1]) - days * NS_PER_DAY + 1)
+
+    def to_bars(self):
+        """转换为 generate_signal 使用的 bar 字典列表"""
+        return columns_to_bars(self.columns)
+
+
+class BarStore:
+    """本地列式 K 线缓存"""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def _dir(self, symbol, timeframe):
+        return self.root / symbol.upper() / timeframe
+
+    def has(self, symbol, timeframe):
+        return (self._dir(symbol, timeframe) / "timestamp.npy").exists()
+
+    def symbols(self):
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def timeframes(self, symbol):
+        path = self.root / symbol.upper()
+        return sorted(p.name for p in path.iterdir() if p.is_dir()) if path.exists() else []
+
+    def open(self, symbol, timeframe):
+        """以内存映射方式打开, 不读入内存"""
+        path = self._dir(symbol, timeframe)
+        columns = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COLUMNS}
+        return BarSeries(symbol.upper(), timeframe, columns)
+
+    def write(self, symbol, timeframe, columns, append=True):
+        """
+        写入 (默认与已有数据合并), 按时间排序并去重 (新数据覆盖同一时间戳)
+        各列先写临时文件再 os.replace, 保证读者看到完整文件。
+        """
+        columns = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+        if append and self.has(symbol, timeframe):
+            existing = self.open(symbol, timeframe)
+            columns = {name: np.concatenate([existing[name], columns[name]]) for name in COLUMNS}
+
+        # 反转后 unique 取首次出现 = 保留最后写入的记录
+        ts = columns["timestamp"][::-1]
+        _, first = np.unique(ts, return_index=True)
+        order = len(ts) - 1 - first
+        columns = {name: np.ascontiguousarray(col[order]) for name, col in columns.items()}
+
+        path = self._dir(symbol, timeframe)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, col in columns.items():
+            tmp = path / f".{name}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, col)
+            os.replace(tmp, path / f"{name}.npy")
+        return self._write_meta(symbol, timeframe, columns["timestamp"])
+
+    def _write_meta(self, symbol, timeframe, timestamps):
+        meta = {
+            "symbol": symbol.upper(),
+            "timeframe": timeframe,
+            "count": int(len(timestamps)),
+            "first": format_timestamp(int(timestamps[0])) if len(timestamps) else None,
+            "last": format_timestamp(int(timestamps[-1])) if len(timestamps) else None,
+        }
+        with open(self._dir(symbol, timeframe) / "meta.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+    def writer(self, symbol, timeframe, count):
+        """预分配 count 根 bar 的流式写入器 (覆盖已有数据), 见 BarWriter"""
+        return BarWriter(self, symbol, timeframe, count)
+
+    def ingest(self, path, timeframe, symbol=None):
+        """导入 CSV / JSON / JSONL 文件, 返回每个标的的 meta"""
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            datasets = {symbol: read_csv(path)}
+        else:
+            datasets = read_json(path)
+        results = []
+        for sym, columns in datasets.items():
+            sym = symbol or sym
+            if not sym:
+                raise ValueError(f"{path}: 未指定标的, 请使用 --symbol")
+            results.append(self.write(sym, timeframe, columns))
+        return results
+
+
+class BarWriter:
+    """
+    按块顺序写入已排序、无重复的 bar (如合成行情): 各列预分配为临时 .npy 内存映射,
+    close() 时原子替换正式文件并写 meta.json。内存占用只与块大小有关。
+    """
+
+    def __init__(self, store, symbol, timeframe, count):
+        self.store = store
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.count = count
+        self.offset = 0
+        self.path = store._dir(symbol, timeframe)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._columns = {
+            name: np.lib.format.open_memmap(self.path / f".{name}.npy.tmp", mode="w+",
+                                            dtype=dtype, shape=(count,))
+            for name, dtype in COLUMNS.items()
+        }
+
+    def append(self, columns):
+        n = len(columns["timestamp"])
+        if self.offset + n > self.count:
+            raise ValueError(f"超出预分配长度 {self.count}")
+        for name, col in self._columns.items():
+            col[self.offset:self.offset + n] = columns[name]
+        self.offset += n
+
+    def close(self):
+        if self.offset != self.count:
+            raise ValueError(f"写入 {self.offset} 根 bar, 预分配 {self.count} 根")
+        for name, col in self._columns.items():
+            col.flush()
+            os.replace(self.path / f".{name}.npy.tmp", self.path / f"{name}.npy")
+        timestamps = np.load(self.path / "timestamp.npy", mmap_mode="r")
+        self._columns = {}
+        return self.store._write_meta(self.symbol, self.timeframe, timestamps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar Bar Store")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="Bar store root directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Ingest CSV/JSON/JSONL bar dumps")
+    p_ingest.add_argument("files", nargs="+")
+    p_ingest.add_argument("--symbol", default=None, help="Symbol (required unless dump is keyed by symbol)")
+    p_ingest.add_argument("--timeframe", default="15Min")
+
+    sub.add_parser("info", help="List stored symbols and timeframes")
+    args = parser.parse_args()
+
+    store = BarStore(args.root)
+    if args.command == "ingest":
+        results = []
+        for path in args.files:
+            results.extend(store.ingest(path, args.timeframe, args.symbol))
+    else:
+        results = [
+            json.loads((store.root / sym / tf / "meta.json").read_text())
+            for sym in store.symbols() for tf in store.timeframes(sym)
+        ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
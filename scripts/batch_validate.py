@@ -0,0 +1,217 @@
+"""
+策略目录批量验证 (CI: candidates → staging)
+发现目录中的全部策略模块, 先用 ast 检查 STRATEGY_META 结构 (不执行代码),
+再以有界并发在独立子进程中回测; 每个策略有独立超时, 超时即终止该进程,
+不阻塞其他策略。结果对照 config/risk-params.json 的 promotion 阈值判定通过与否;
+给出 --max-bar-latency-us 时同时剖析信号延迟 (profiler.py), 超出预算即不通过。
+缺少回测输入的策略 (另类数据策略未给 --alt-data-dir, symbols="dynamic" 未给标的) 记为
+skipped: 不回测、不晋级, 也不计入 failed。
+
+用法:
+    python scripts/run_backtest.py --strategy-dir strategies/candidates/ --months 6 \\
+        --output validation-report.json
+"""
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from datetime import datetime
+from multiprocessing.connection import wait
+from pathlib import Path
+
+from event_engine import ALT_SOURCES
+from map_elites import DEFAULT_HEADER
+from portfolio_backtest import load_risk_params
+from profiler import Profiler
+from result_cache import read_strategy_meta
+from run_backtest import EXECUTION_PARAMS, run_cached
+from strategy_registry import discover as discover_strategies, validate_meta
+
+
+def check_meta(path, feature_dims=None):
+    """
+    检查 STRATEGY_META 结构, 返回 (meta, errors, warnings)
+    feature_dims 为特征图维度定义, 用于校验 archetype / asset_class 取值
+    """
+    errors, warnings = [], []
+    try:
+        meta = read_strategy_meta(Path(path).read_text())
+    except (SyntaxError, ValueError) as e:
+        return None, [f"STRATEGY_META 无法解析: {e}"], warnings
+    if not isinstance(meta, dict):
+        return None, ["STRATEGY_META 不是字典"], warnings
+
+    errors += validate_meta(meta)
+    if errors:
+        return meta, errors, warnings
+
+    for key in EXECUTION_PARAMS:
+        if not isinstance(meta["params"].get(key), (int, float)):
+            errors.append(f"params 缺少数值参数 {key}")
+    hp = meta["holding_period_minutes"]
+    if len(hp) != 2 or not all(isinstance(v, (int, float)) for v in hp) or hp[0] > hp[1]:
+        errors.append("holding_period_minutes 应为 [min, max]")
+    if isinstance(meta["symbols"], str) and meta["symbols"] != "dynamic":
+        errors.append("symbols 应为列表或 \"dynamic\"")
+    if feature_dims:
+        if meta["archetype"] not in feature_dims["archetype"]["values"]:
+            errors.append(f"archetype 不在特征图维度中: {meta['archetype']}")
+        if meta["asset_class"] not in feature_dims["asset_class"]["values"]:
+            errors.append(f"asset_class 不在特征图维度中: {meta['asset_class']}")
+    if meta["id"] != Path(path).stem:
+        warnings.append(f"id {meta['id']} 与文件名 {Path(path).stem} 不一致")
+    return meta, errors, warnings
+
+
+def missing_inputs(meta, data_dir=None, alt_data_dir=None, symbols=None):
+    """回测该策略缺少的输入 (无法验证的原因列表), 为空表示可以回测"""
+    reasons = []
+    alt = any(source in ALT_SOURCES for source in meta["signal_sources"])
+    if alt and alt_data_dir is None:
+        reasons.append("另类数据策略需要 --alt-data-dir")
+    if meta["symbols"] == "dynamic" and not symbols and (not alt or data_dir is None):
+        reasons.append("symbols=\"dynamic\" 需要 --symbols" + (" 或 --data-dir" if alt else ""))
+    return reasons
+
+
+def judge(result, promotion):
+    """对照 promotion 阈值 (及单 bar 延迟预算) 判定, 返回 (passed, reasons)"""
+    if result.get("status") != "success":
+        return False, [f"status={result.get('status')}: {result.get('message', '')}".rstrip(": ")]
+    reasons = []
+    if result["sharpe_ratio"] < promotion["staging_min_sharpe"]:
+        reasons.append(f"sharpe_ratio {result['sharpe_ratio']} < {promotion['staging_min_sharpe']}")
+    if result["max_drawdown"] > promotion["staging_max_drawdown"]:
+        reasons.append(f"max_drawdown {result['max_drawdown']} > {promotion['staging_max_drawdown']}")
+    budget = result.get("profile", {}).get("budget")
+    if budget and budget["exceeded"]:
+        reasons.append(f"bar latency {budget['observed_us']}us > {budget['max_bar_latency_us']}us")
+    return not reasons, reasons
+
+
+def _run_one(conn, path, days, capital, data_dir, timeframe, cache, max_bar_latency_us=None,
+             alt_data_dir=None, symbols=None):
+    """子进程: 回测单个策略并通过管道返回结果"""
+    try:
+        if max_bar_latency_us is None:
+            result = run_cached(str(path), days, capital, data_dir, timeframe, cache=cache,
+                                alt_data_dir=alt_data_dir, symbols=symbols)
+        else:
+            profiler = Profiler()
+            result = run_cached(str(path), days, capital, data_dir, timeframe, alt_data_dir=alt_data_dir,
+                                symbols=symbols, profiler=profiler)
+            result["profile"] = profiler.report(max_bar_latency_us)
+    except Exception as e:  # 策略代码异常不应影响批量验证
+        result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+    conn.send(result)
+    conn.close()
+
+
+def run_bounded(tasks, workers, timeout):
+    """
+    有界并发执行 {path: args}; 超时的进程被终止
+    返回 {path: (result, duration_s)}
+    """
+    ctx = multiprocessing.get_context()
+    pending = deque(tasks.items())
+    running = {}  # conn → (path, process, start)
+    results = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            path, args = pending.popleft()
+            recv, send = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_run_one, args=(send, path, *args), daemon=True)
+            proc.start()
+            send.close()
+            running[recv] = (path, proc, time.monotonic())
+
+        for conn in wait(list(running), timeout=0.2):
+            path, proc, start = running.pop(conn)
+            try:
+                result = conn.recv()
+            except EOFError:
+                proc.join()
+                result = {"status": "error", "message": f"进程异常退出 (exitcode={proc.exitcode})"}
+            proc.join()
+            conn.close()
+            results[path] = (result, time.monotonic() - start)
+
+        now = time.monotonic()
+        for conn, (path, proc, start) in list(running.items()):
+            if now - start > timeout:
+                proc.kill()
+                proc.join()
+                conn.close()
+                del running[conn]
+                results[path] = ({"status": "timeout", "message": f"超过 {timeout:.0f}s"}, now - start)
+    return results
+
+
+def validate_directory(strategy_dir, days=180, initial_capital=100000.0, data_dir=None,
+                       timeframe="15Min", workers=None, timeout=600.0, cache=None,
+                       max_bar_latency_us=None, alt_data_dir=None, symbols=None, files=None):
+    """
+    批量验证目录中的策略, 返回汇总报告 (alt_data_dir / symbols 供事件驱动策略使用)
+    给出 files 时只验证其中列出的策略文件 (如 PR 中新增或修改的候选)
+    """
+    promotion = load_risk_params()["promotion"]
+    with open(DEFAULT_HEADER) as f:
+        feature_dims = json.load(f)["dimensions"]
+
+    entries, tasks = {}, {}
+    only = {Path(f).resolve() for f in files} if files is not None else None
+    for path in discover_strategies(strategy_dir):
+        if only is not None and Path(path).resolve() not in only:
+            continue
+        meta, errors, warnings = check_meta(path, feature_dims)
+        entries[path] = {
+            "file": str(path),
+            "strategy_id": meta.get("id") if isinstance(meta, dict) else None,
+            "meta_errors": errors,
+            "warnings": warnings,
+        }
+        skipped = [] if errors else missing_inputs(meta, data_dir, alt_data_dir, symbols)
+        if skipped:
+            entries[path].update(status="skipped", passed=False, reasons=skipped)
+        elif not errors:
+            tasks[path] = (days, initial_capital, data_dir, timeframe, cache, max_bar_latency_us,
+                           alt_data_dir, symbols)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    outcomes = run_bounded(tasks, workers, timeout)
+
+    for path, entry in entries.items():
+        if entry["meta_errors"]:
+            entry.update(status="invalid_meta", passed=False, reasons=entry["meta_errors"])
+            continue
+        if entry.get("status") == "skipped":
+            continue
+        result, duration = outcomes[path]
+        passed, reasons = judge(result, promotion)
+        entry.update(status=result.get("status"), passed=passed, reasons=reasons,
+                     duration_s=round(duration, 3), result=result)
+
+    results = list(entries.values())
+    passed = sum(1 for e in results if e["passed"])
+    skipped = sum(1 for e in results if e["status"] == "skipped")
+    return {
+        "type": "VALIDATION_REPORT",
+        "strategy_dir": str(strategy_dir),
+        "backtest_days": days,
+        "thresholds": {**{k: promotion[k] for k in ("staging_min_sharpe", "staging_max_drawdown")},
+                       "max_bar_latency_us": max_bar_latency_us},
+        "total": len(results),
+        "passed": passed,
+        "skipped": skipped,
+        "failed": len(results) - passed - skipped,
+        "results": results,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def format_report(report, output_path=None):
+    """输出路径以 .jsonl 结尾时每个策略一行, 否则为单个 JSON"""
+    if output_path and str(output_path).endswith(".jsonl"):
+        return "\n".join(json.dumps(e, ensure_ascii=False) for e in report["results"])
+    return json.dumps(report, indent=2, ensure_ascii=False)
@@ -0,0 +1,469 @@
+"""
+性能基准: 种子策略热点函数 + 端到端回测
+输入规模 1k / 100k / 10M (bar 数或记录数), 数据由固定种子本地生成 (synthetic_market.py
+的 1 分钟 K 线, NumPy 生成的期权成交与 Form 4 申报), 不依赖网络与当前日期。
+
+每个用例报告每次操作的耗时 (us_per_op 取最快样本, 另有中位数; 操作 = 一根 bar / 一条记录 /
+一次调用);
+结果与 config/benchmark-baselines.json 中本机标签 (系统-架构-CPU-核数-Python 版本) 的
+基线比较: 中位数与最快样本都慢于基线超过阈值才视为回归 (退出码 1), 单个受调度干扰的
+样本不会触发; 共享或单核机器上的噪声可达数十个百分点, 阈值默认 50%。
+--update 写入/覆盖本机基线。
+
+逐 bar 调用 (generate_signal / SignalState.update) 的耗时只取决于 LOOKBACK 窗口而与序列
+长度无关, 且 10M 根 bar 字典超出常规内存, 因此这些用例最多到 100k; 10M 规模由
+向量化路径 (generate_signals_batch / OptionsFlowStore / InsiderClusterDetector) 与
+端到端回测覆盖。
+
+用法:
+    python scripts/benchmark.py                          # 1k,100k, 对照本机基线
+    python scripts/benchmark.py --sizes 1k,100k,10M --update
+    python scripts/benchmark.py --filter generate_signal --threshold 1.0 --output bench.json
+    python scripts/benchmark.py --list
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bar_store import NS_PER_DAY, BarStore, columns_to_bars, parse_timestamp
+from event_engine import ALT_SOURCES
+from insider_clusters import InsiderClusterDetector
+from options_flow_store import OptionsFlowStore
+from run_backtest import LOOKBACK, load_strategy, primary_symbol, run_backtest
+from synthetic_market import SESSION_MINUTES, SyntheticMarket, universe_symbols
+
+ROOT = Path(__file__).resolve().parent.parent
+STRATEGY_DIR = ROOT / "strategies" / "candidates"
+BASELINES_PATH = ROOT / "config" / "benchmark-baselines.json"
+SIZES = {"1k": 1_000, "100k": 100_000, "10M": 10_000_000}
+DEFAULT_SIZES = "1k,100k"
+DEFAULT_THRESHOLD = 0.5   # 中位数与最快样本都比基线慢 50% 以上视为回归
+PER_CALL_MAX = 100_000    # 逐 bar 调用用例的最大规模
+SEED = 20260101
+END = "2026-01-02"        # 合成数据的截止日期 (固定, 与运行日期无关)
+FLOW_SYMBOLS = 500
+INSIDER_SYMBOLS = 200
+FILINGS_PER_DAY = 1000
+
+# 逐 bar 基准中喂给 generate_signal 的另类数据 (按策略声明的第一个另类数据源), 取能走完整决策路径的值
+ALT_PAYLOADS = {
+    "options_flow": {"signal": "bullish", "strength": 0.8, "num_trades": 5,
+                     "total_premium": 2_500_000.0, "details": []},
+    "corporate_insider": {"signal": True, "insider_count": 4, "details": []},
+    "politician_trading": {"signal": True, "insider_count": 4, "details": []},
+    "event": {"signal": "BUY", "confidence": 0.7, "reason": "benchmark"},
+}
+
+CASES = {}
+
+
+def case(name, max_size=None):
+    """注册基准用例; setup(size) 返回 (待计时函数, 操作数)"""
+    def register(setup):
+        CASES[name] = (setup, max_size)
+        return setup
+    return register
+
+
+def machine_tag():
+    """基线的机器标签"""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1] for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    cpu = re.sub(r"[^A-Za-z0-9]+", "-", cpu).strip("-").lower()
+    return (f"{platform.system().lower()}-{platform.machine()}-{cpu}-{os.cpu_count()}cpu-"
+            f"py{sys.version_info.major}.{sys.version_info.minor}")
+
+
+def seed_strategies():
+    return {path.stem: path for path in sorted(STRATEGY_DIR.glob("seed_*.py"))}
+
+
+# ── 确定性数据 ──
+
+def make_bars(n, symbol="AAPL"):
+    """最近 n 根 1 分钟合成 K 线 (列式)"""
+    days = -(-n // SESSION_MINUTES)
+    columns = SyntheticMarket([symbol], 1, SEED, END).generate(days)[symbol]
+    return {name: col[-n:] for name, col in columns.items()}
+
+
+def make_flow_columns(n):
+    """n 条期权成交 (OptionsFlowStore 列格式), 标的为 universe_symbols(FLOW_SYMBOLS)"""
+    rng = np.random.default_rng([SEED, 1])
+    as_of = parse_timestamp(END)
+    return {
+        "symbol": rng.integers(0, FLOW_SYMBOLS, n, dtype=np.int32),
+        "option_type": rng.choice(np.array([1, -1], dtype=np.int8), n, p=[0.6, 0.4]),
+        "strike": np.round(rng.uniform(20.0, 500.0, n), 1),
+        "expiry": (as_of // NS_PER_DAY + rng.integers(0, 60, n)).astype(np.int32),
+        "premium": np.round(rng.lognormal(12.5, 1.5, n), 2),
+        "volume": rng.integers(1, 20_000, n),
+        "open_interest": rng.integers(0, 5_000, n),
+        "trade_type": rng.choice(np.array([0, 1, 2], dtype=np.int8), n, p=[0.5, 0.3, 0.2]),
+        "timestamp": np.sort(as_of - rng.integers(0, NS_PER_DAY, n)),
+    }
+
+
+def flow_records(columns):
+    """列 → analyze_options_flow 的字典列表"""
+    symbols = universe_symbols(FLOW_SYMBOLS)
+    expiry = np.datetime_as_string(columns["expiry"].astype("datetime64[D]")).tolist()
+    option_type = np.where(columns["option_type"] == 1, "call", "put").tolist()
+    trade_type = np.array(["other", "sweep", "block"])[columns["trade_type"]].tolist()
+    cols = {name: columns[name].tolist() for name in ("symbol", "strike", "premium", "volume", "open_interest")}
+    return [{"symbol": symbols[cols["symbol"][i]], "option_type": option_type[i],
+             "strike": cols["strike"][i], "expiry": expiry[i], "premium": cols["premium"][i],
+             "volume": cols["volume"][i], "open_interest": cols["open_interest"][i],
+             "trade_type": trade_type[i]} for i in range(len(expiry))]
+
+
+def insider_filings(n, chunk=100_000):
+    """
+    n 条按日期递增的 Form 4 申报 (生成器), 每天 FILINGS_PER_DAY 条, 截至 END;
+    每个标的 10 个内幕人, 70% 为买入
+    """
+    symbols = universe_symbols(INSIDER_SYMBOLS)
+    names = [f"Insider {i}" for i in range(10)]
+    rng = np.random.default_rng([SEED, 2])
+    end_day = parse_timestamp(END) // NS_PER_DAY
+    first_day = end_day - -(-n // FILINGS_PER_DAY)
+    for start in range(0, n, chunk):
+        m = min(chunk, n - start)
+        days = first_day + (start + np.arange(m)) // FILINGS_PER_DAY
+        dates = np.datetime_as_string(days.astype("datetime64[D]")).tolist()
+        sym = rng.integers(0, INSIDER_SYMBOLS, m).tolist()
+        who = rng.integers(0, len(names), m).tolist()
+        buy = (rng.random(m) < 0.7).tolist()
+        for i in range(m):
+            yield {"symbol": symbols[sym[i]], "insider_name": names[who[i]],
+                   "transaction_type": "BUY" if buy[i] else "SELL", "shares": 1000,
+                   "price": 100.0, "date": dates[i], "insider_title": "Director"}
+
+
+# ── 用例 ──
+
+@case("compute_rsi")
+def bench_compute_rsi(size):
+    module = load_strategy(str(STRATEGY_DIR / "seed_momentum_rsi_v1.py"))
+    prices = make_bars(size)["close"].tolist()
+    return (lambda: module.compute_rsi(prices, 14)), size
+
+
+def _signal_case(path):
+    def setup(size):
+        module = load_strategy(str(path))
+        meta = module.STRATEGY_META
+        params = meta["params"]
+        sources = [s for s in meta["signal_sources"] if s in ALT_SOURCES]
+        alt = ALT_PAYLOADS[sources[0]] if sources else None
+        bars = columns_to_bars(make_bars(size + LOOKBACK))
+        generate = module.generate_signal
+
+        def run():
+            for i in range(LOOKBACK, len(bars)):
+                window = bars[i - LOOKBACK:i + 1]
+                generate(window, alt, params) if sources else generate(window, params=params)
+        return run, size
+    return setup
+
+
+def _state_case(path):
+    def setup(size):
+        module = load_strategy(str(path))
+        meta = module.STRATEGY_META
+        params = meta["params"]
+        sources = [s for s in meta["signal_sources"] if s in ALT_SOURCES]
+        alt = ALT_PAYLOADS[sources[0]] if sources else None
+        bars = columns_to_bars(make_bars(size))
+
+        def run():
+            state = module.create_signal_state(params)
+            for bar in bars:
+                state.update(bar, alt) if sources else state.update(bar)
+        return run, size
+    return setup
+
+
+def _batch_case(path):
+    def setup(size):
+        module = load_strategy(str(path))
+        params = module.STRATEGY_META["params"]
+        columns = make_bars(size)
+        return (lambda: module.generate_signals_batch(columns["close"], columns["high"], columns["low"],
+                                                      columns["volume"], params, LOOKBACK + 1)), size
+    return setup
+
+
+for _stem, _path in seed_strategies().items():
+    _source = _path.read_text()
+    case(f"generate_signal:{_stem}", PER_CALL_MAX)(_signal_case(_path))
+    if "def create_signal_state" in _source:
+        case(f"signal_state:{_stem}", PER_CALL_MAX)(_state_case(_path))
+    if "def generate_signals_batch" in _source:
+        case(f"signals_batch:{_stem}")(_batch_case(_path))
+
+
+@case("analyze_options_flow", PER_CALL_MAX)
+def bench_analyze_options_flow(size):
+    module = load_strategy(str(STRATEGY_DIR / "seed_options_flow_v1.py"))
+    records = flow_records(make_flow_columns(size))
+    params = module.STRATEGY_META["params"]
+    symbol = universe_symbols(FLOW_SYMBOLS)[0]
+    return (lambda: module.analyze_options_flow(records, symbol, params, as_of=END)), size
+
+
+@case("analyze_options_flow:store")
+def bench_analyze_options_flow_store(size):
+    module = load_strategy(str(STRATEGY_DIR / "seed_options_flow_v1.py"))
+    store = OptionsFlowStore.from_columns(universe_symbols(FLOW_SYMBOLS), make_flow_columns(size))
+    params = module.STRATEGY_META["params"]
+    symbol = universe_symbols(FLOW_SYMBOLS)[0]
+    return (lambda: module.analyze_options_flow(store, symbol, params, as_of=END)), size
+
+
+@case("screen_options_flow")
+def bench_screen_options_flow(size):
+    module = load_strategy(str(STRATEGY_DIR / "seed_options_flow_v1.py"))
+    store = OptionsFlowStore.from_columns(universe_symbols(FLOW_SYMBOLS), make_flow_columns(size))
+    params = module.STRATEGY_META["params"]
+    return (lambda: module.screen_options_flow(store, params, as_of=END)), size
+
+
+@case("options_flow_store:append", PER_CALL_MAX)
+def bench_options_flow_append(size):
+    columns = make_flow_columns(size)
+    records = flow_records(columns)
+    for record, ts in zip(records, columns["timestamp"].tolist()):
+        record["timestamp"] = ts
+
+    def run():
+        store = OptionsFlowStore()
+        for start in range(0, len(records), 1000):
+            store.append(records[start:start + 1000])
+    return run, size
+
+
+@case("check_insider_cluster", PER_CALL_MAX)
+def bench_check_insider_cluster(size):
+    module = load_strategy(str(STRATEGY_DIR / "seed_insider_cluster_v1.py"))
+    filings = list(insider_filings(size))
+    params = module.STRATEGY_META["params"]
+    symbol = universe_symbols(INSIDER_SYMBOLS)[0]
+    return (lambda: module.check_insider_cluster(filings, symbol, params, as_of=END)), size
+
+
+@case("insider_detector:stream")
+def bench_insider_detector(size):
+    params = load_strategy(str(STRATEGY_DIR / "seed_insider_cluster_v1.py")).STRATEGY_META["params"]
+    return (lambda: InsiderClusterDetector.from_params(params).extend(insider_filings(size), END)), size
+
+
+@case("evaluate_pre_earnings_setup")
+def bench_pre_earnings(size):
+    module = load_strategy(str(STRATEGY_DIR / "seed_pre_earnings_drift_v1.py"))
+    params = module.STRATEGY_META["params"]
+    rng = np.random.default_rng([SEED, 3])
+    pool = [{"analyst_revision_trend": ("up", "down", "flat")[rng.integers(3)],
+             "unusual_options_signal": ("bullish", "bearish", "neutral")[rng.integers(3)],
+             "insider_selling_30d": bool(rng.random() < 0.3),
+             "iv_rank": float(rng.uniform(0, 100))} for _ in range(1024)]
+    evaluate = module.evaluate_pre_earnings_setup
+
+    def run():
+        for i in range(size):
+            evaluate("AAPL", END, pool[i & 1023], params)
+    return run, size
+
+
+@case("run_backtest:seed_momentum_rsi_v1")
+def bench_run_backtest(size):
+    """端到端: 加载策略 + mmap 读取 + 批量信号 + 撮合 + 指标 (数据预先写入临时 bar_store)"""
+    path = STRATEGY_DIR / "seed_momentum_rsi_v1.py"
+    symbol = primary_symbol(load_strategy(str(path)).STRATEGY_META)
+    root = tempfile.mkdtemp(prefix="bench-bars-")
+    days = -(-size // SESSION_MINUTES)
+    meta = SyntheticMarket([symbol], 1, SEED, END).write_store(BarStore(root), days, "1Min")[0]
+    span_days = (parse_timestamp(meta["last"]) - parse_timestamp(meta["first"])) // NS_PER_DAY + 1
+
+    def run():
+        return run_backtest(str(path), span_days, 100000.0, root, "1Min")
+    run.cleanup = lambda: shutil.rmtree(root, ignore_errors=True)
+    return run, meta["count"]
+
+
+# ── 执行与比较 ──
+
+def time_case(func, ops, repeat=5, max_seconds=10.0, min_sample_seconds=0.05):
+    """
+    重复计时 (首次调用为预热), 返回每次操作的耗时统计 (微秒)
+    单次很快的用例在一个样本内循环多次, 使样本不短于 min_sample_seconds;
+    us_per_op 取最快样本 (受调度干扰最小, 用于基线比较), 另给出中位数。
+    样本数达到 repeat 或总时长超过 max_seconds 后停止 (至少 1 个样本)
+    """
+    t0 = time.perf_counter()
+    func()
+    loops = max(1, int(min_sample_seconds / max(time.perf_counter() - t0, 1e-9)))
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < repeat and (not samples or time.perf_counter() - start < max_seconds):
+        t0 = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter_ns() - t0) / 1e3 / ops / loops)
+    return {"ops": ops, "runs": len(samples) * loops,
+            "us_per_op": float(f"{min(samples):.4g}"),
+            "median_us_per_op": float(f"{statistics.median(samples):.4g}")}
+
+
+def run_benchmarks(names, sizes, repeat=5, max_seconds=10.0, log=None):
+    """执行用例, 返回 {"<用例>@<规模>": 结果}; 超出用例最大规模的组合记为 skipped"""
+    results = {}
+    for name in names:
+        setup, max_size = CASES[name]
+        for label in sizes:
+            key = f"{name}@{label}"
+            if max_size is not None and SIZES[label] > max_size:
+                results[key] = {"skipped": f"max size {max_size}"}
+                continue
+            func, ops = setup(SIZES[label])
+            try:
+                results[key] = time_case(func, ops, repeat, max_seconds)
+            finally:
+                getattr(func, "cleanup", lambda: None)()
+            if log:
+                log(f"{key:<55} {results[key]['us_per_op']:>12.4g} us/op  ({results[key]['runs']} runs)")
+    return results
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not Path(path).exists():
+        return {"machines": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(baselines, path=BASELINES_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+    tmp.replace(path)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    逐项对比基线, 在结果中加入 baseline_us_per_op / ratio / regressed; 返回回归项列表
+    ratio 为中位数之比 (旧基线无中位数时用最快样本); 最快样本之比也超过阈值才记为回归
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if "skipped" in result or not base:
+            continue
+        fastest = result["us_per_op"] / base["us_per_op"] if base["us_per_op"] > 0 else 1.0
+        base_median = base.get("median_us_per_op", base["us_per_op"])
+        ratio = result["median_us_per_op"] / base_median if base_median > 0 else 1.0
+        result.update(baseline_us_per_op=base_median, ratio=round(ratio, 3),
+                      regressed=min(ratio, fastest) > 1 + threshold)
+        if result["regressed"]:
+            regressions.append(key)
+    return regressions
+
+
+def format_table(results):
+    """结果表 (纯文本)"""
+    lines = [f"{'case':<55} {'median us/op':>12} {'baseline':>12} {'ratio':>7}"]
+    for key, r in results.items():
+        if "skipped" in r:
+            lines.append(f"{key:<55} {'skipped':>12}")
+            continue
+        base = f"{r['baseline_us_per_op']:>12.4g}" if "baseline_us_per_op" in r else f"{'-':>12}"
+        ratio = f"{r['ratio']:>7.3f}" if "ratio" in r else f"{'-':>7}"
+        flag = "  REGRESSION" if r.get("regressed") else ""
+        lines.append(f"{key:<55} {r['median_us_per_op']:>12.4g} {base} {ratio}{flag}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strategy and Backtest Benchmarks")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated subset of {','.join(SIZES)}")
+    parser.add_argument("--filter", action="append", default=None,
+                        help="Only run cases matching this glob (repeatable), e.g. 'generate_signal:*'")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed samples per case (median and fastest are compared)")
+    parser.add_argument("--max-seconds", type=float, default=10.0,
+                        help="Stop repeating a case after this many seconds (at least one run)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Fail when a case's median and fastest sample are both slower than baseline "
+                             "by more than this fraction")
+    parser.add_argument("--baselines", default=str(BASELINES_PATH))
+    parser.add_argument("--machine", default=None, help="Baseline machine tag (default: detected)")
+    parser.add_argument("--update", action="store_true", help="Record results as this machine's baseline")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--list", action="store_true", help="List cases and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, max_size) in CASES.items():
+            print(f"{name}" + (f"  (max {max_size})" if max_size else ""))
+        return 0
+    sizes = args.sizes.split(",")
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {unknown} (choose from {', '.join(SIZES)})")
+    names = [n for n in CASES if not args.filter or any(fnmatch.fnmatch(n, f) for f in args.filter)]
+    if not names:
+        parser.error("no cases match --filter")
+
+    machine = args.machine or machine_tag()
+    results = run_benchmarks(names, sizes, args.repeat, args.max_seconds,
+                             log=lambda line: print(line, file=sys.stderr))
+    baselines = load_baselines(args.baselines)
+    baseline = baselines["machines"].get(machine, {}).get("results", {})
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.update:
+        entry = baselines["machines"].setdefault(machine, {"results": {}})
+        entry["results"].update({k: {"us_per_op": r["us_per_op"], "median_us_per_op": r["median_us_per_op"],
+                                     "ops": r["ops"]}
+                                 for k, r in results.items() if "skipped" not in r})
+        entry["updated"] = datetime.utcnow().isoformat() + "Z"
+        save_baselines(baselines, args.baselines)
+
+    report = {
+        "machine": machine,
+        "threshold": args.threshold,
+        "baseline_found": bool(baseline),
+        "regressions": regressions,
+        "results": results,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+    print(format_table(results))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+    return 0 if args.update or not regressions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
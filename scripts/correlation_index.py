@@ -0,0 +1,330 @@
+"""
+候选策略权益曲线相关性索引 (收益空间去重)
+进化不断向 strategies/candidates/ 与特征图格子写入收益几乎相同的近似克隆, 而
+config/risk-params.json 的 correlation_warning / correlation_critical 只在部署后才生效。
+本索引保存每个候选按日期对齐的日收益向量, 新候选到来时对全部已存向量一次性算出相关系数,
+超过 correlation_warning 标记, 超过 correlation_critical 拒绝入库。
+
+- 对齐: 回测权益曲线按 UTC 日期取每日最后一个权益点得到日收益; 矩阵每列是一个日期,
+  未覆盖的日期为缺失 (合成行情以当天为终点, 不同日期入库的候选窗口会错开)
+- 相关系数: 在两两重叠的日期上计算 Pearson 相关; 存储矩阵 X (缺失填 0), X² 与覆盖掩码 M,
+  新向量 y 的重叠和 Σxy / Σx / Σx² / n / Σy / Σy² 由三次 (N×T)·(T×k) 矩阵乘积一次得到,
+  无两两 Python 循环; 重叠不足 min_overlap 天的记为无相关 (null)
+- 行按各自均值去中心化后以 float32 存储, 减小单遍公式的舍入误差
+- 存储: .cache/correlation_index.npz (ids / 日期 / 收益矩阵, 缺失为 NaN), 原子替换
+
+用法:
+    python scripts/correlation_index.py sync strategies/candidates/
+    python scripts/correlation_index.py add strategies/candidates/hyp_x.py --months 6
+    python scripts/correlation_index.py check strategies/candidates/hyp_x.py
+    python scripts/correlation_index.py remove hyp_x
+    python scripts/correlation_index.py info
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bar_store import NS_PER_DAY
+from portfolio_backtest import load_risk_params
+from run_backtest import (LOOKBACK, compute_signals, load_columns, load_strategy, primary_symbol,
+                          simulate_trades)
+from strategy_registry import discover
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX = REPO_ROOT / ".cache" / "correlation_index.npz"
+MIN_OVERLAP = 20
+
+
+class UnsupportedStrategy(ValueError):
+    """策略无法由单标的回测给出日收益 (sync 中记为 skipped)"""
+
+
+def daily_returns(timestamps, equity_curve):
+    """权益曲线 (与 int64 纳秒时间戳对齐) → (UTC 日序号 int64[], 日收益 float64[])"""
+    day = np.asarray(timestamps, dtype=np.int64) // NS_PER_DAY
+    equity = np.asarray(equity_curve, dtype=np.float64)
+    last = np.flatnonzero(np.append(day[1:] != day[:-1], True))
+    close = equity[last]
+    prev = np.append(equity[0], close[:-1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(prev > 0, close / prev - 1.0, 0.0)
+    return day[last], returns
+
+
+def strategy_returns(strategy_path, days=180, initial_capital=100000.0, data_dir=None, timeframe="15Min"):
+    """单标的回测, 返回 (strategy_id, 日序号, 日收益)"""
+    module = load_strategy(strategy_path)
+    meta = module.STRATEGY_META
+    from event_engine import ALT_SOURCES
+    if any(source in ALT_SOURCES for source in meta["signal_sources"]):
+        raise UnsupportedStrategy("另类数据策略 (事件驱动引擎) 不输出权益曲线, 请用 --returns-json 提供日收益")
+    params = meta["params"]
+    columns = load_columns(primary_symbol(meta), days, data_dir, timeframe)
+    if len(columns["close"]) <= LOOKBACK:
+        raise ValueError("数据不足")
+    actions, confidences = compute_signals(module, columns, params)
+    _, equity_curve, _ = simulate_trades(columns["close"], actions, confidences, params, initial_capital)
+    # equity_curve[0] 为预热结束 (第 LOOKBACK - 1 根 bar) 时的初始资金
+    day, returns = daily_returns(columns["timestamp"][LOOKBACK - 1:], equity_curve)
+    return meta["id"], day, returns
+
+
+def load_returns_json(path):
+    """{"strategy_id": ..., "dates": ["YYYY-MM-DD", ...], "returns": [...]} → (id, 日序号, 日收益)"""
+    with open(path) as f:
+        data = json.load(f)
+    day = np.array(data["dates"], dtype="datetime64[D]").astype(np.int64)
+    return data.get("strategy_id", Path(path).stem), day, np.asarray(data["returns"], dtype=np.float64)
+
+
+class CorrelationIndex:
+    """按日期对齐的收益矩阵; 行 = 策略, 列 = 日期 (按首次出现顺序追加, 无需排序)"""
+
+    def __init__(self, path=DEFAULT_INDEX, min_overlap=MIN_OVERLAP):
+        self.path = Path(path)
+        self.min_overlap = min_overlap
+        self.ids = []
+        self.row = {}
+        self.days = []
+        self.col = {}
+        self._x = np.zeros((0, 0), dtype=np.float32)   # 去中心化收益, 缺失为 0
+        self._x2 = np.zeros((0, 0), dtype=np.float32)
+        self._m = np.zeros((0, 0), dtype=np.float32)   # 覆盖掩码
+        if self.path.exists():
+            self._read()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _read(self):
+        with np.load(self.path) as data:
+            values = data["values"]
+            self.ids = [str(i) for i in data["ids"]]
+            self.days = [int(d) for d in data["days"]]
+        self.row = {sid: i for i, sid in enumerate(self.ids)}
+        self.col = {d: j for j, d in enumerate(self.days)}
+        self._m = (~np.isnan(values)).astype(np.float32)
+        self._x = np.nan_to_num(values).astype(np.float32)
+        self._x2 = self._x * self._x
+
+    def save(self):
+        n, c = len(self.ids), len(self.days)
+        values = np.where(self._m[:n, :c] > 0, self._x[:n, :c], np.nan).astype(np.float32)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=np.array(self.ids, dtype=str), days=np.array(self.days, dtype=np.int64),
+                     values=values)
+        os.replace(tmp, self.path)
+
+    def _resize(self, rows, cols):
+        cap_rows, cap_cols = self._x.shape
+        if rows <= cap_rows and cols <= cap_cols:
+            return
+        shape = (max(rows, 2 * cap_rows, 16), max(cols, cap_cols + cap_cols // 2, 64))
+        n, c = len(self.ids), len(self.days)
+        for name in ("_x", "_x2", "_m"):
+            grown = np.zeros(shape, dtype=np.float32)
+            grown[:n, :c] = getattr(self, name)[:n, :c]
+            setattr(self, name, grown)
+
+    def _align(self, days, returns):
+        """映射到已有列; 返回 (列下标, 去中心化收益), 索引中没有的日期丢弃"""
+        returns = np.asarray(returns, dtype=np.float64)
+        cols = np.fromiter((self.col.get(int(d), -1) for d in days), dtype=np.int64, count=len(days))
+        known = cols >= 0
+        return cols[known], (returns - returns.mean())[known] if len(returns) else returns
+
+    def correlate(self, days, returns):
+        """与全部已存策略在重叠日期上的 Pearson 相关 (重叠不足或零波动为 NaN)"""
+        n, c = len(self.ids), len(self.days)
+        cols, y_known = self._align(days, returns)
+        if not n or not len(cols):
+            return np.full(n, np.nan)
+        y = np.zeros(c, dtype=np.float32)
+        mask = np.zeros(c, dtype=np.float32)
+        y[cols], mask[cols] = y_known, 1.0
+        x_y, x_m = (self._x[:n, :c] @ np.column_stack((y, mask))).T.astype(np.float64)
+        xx = (self._x2[:n, :c] @ mask).astype(np.float64)
+        count, sy, syy = (self._m[:n, :c] @ np.column_stack((mask, y, y * y))).T.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = x_y - x_m * sy / count
+            var_x = xx - x_m * x_m / count
+            var_y = syy - sy * sy / count
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[(count < self.min_overlap) | ~(var_x > 1e-18) | ~(var_y > 1e-18)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def add(self, strategy_id, days, returns):
+        """写入 (或替换) 一个策略的日收益向量"""
+        days = [int(d) for d in days]
+        new_days = [d for d in dict.fromkeys(days) if d not in self.col]
+        i = self.row.get(strategy_id, len(self.ids))
+        self._resize(i + 1, len(self.days) + len(new_days))
+        for d in new_days:
+            self.col[d] = len(self.days)
+            self.days.append(d)
+        if i == len(self.ids):
+            self.row[strategy_id] = i
+            self.ids.append(strategy_id)
+        for name in ("_x", "_x2", "_m"):
+            getattr(self, name)[i] = 0.0
+        cols, y = self._align(days, returns)
+        self._x[i, cols] = y
+        self._x2[i, cols] = y * y
+        self._m[i, cols] = 1.0
+
+    def remove(self, strategy_id):
+        """删除一行 (末行移入空位)"""
+        i = self.row.pop(strategy_id, None)
+        if i is None:
+            return False
+        last = len(self.ids) - 1
+        if i != last:
+            moved = self.ids[last]
+            for name in ("_x", "_x2", "_m"):
+                matrix = getattr(self, name)
+                matrix[i] = matrix[last]
+            self.ids[i] = moved
+            self.row[moved] = i
+        for name in ("_x", "_x2", "_m"):
+            getattr(self, name)[last] = 0.0
+        self.ids.pop()
+        return True
+
+    def check(self, days, returns, warning, critical, exclude=None, top=5):
+        """对照阈值判定: level 为 ok / warning / critical, 附最相近的 top 个策略"""
+        corr = self.correlate(days, returns)
+        if exclude in self.row:
+            corr[self.row[exclude]] = np.nan
+        valid = np.flatnonzero(~np.isnan(corr))
+        nearest = valid[np.argsort(-corr[valid], kind="stable")[:top]]
+        peak = float(corr[nearest[0]]) if len(nearest) else None
+        level = "ok" if peak is None or peak < warning else "warning" if peak < critical else "critical"
+        return {
+            "level": level,
+            "max_correlation": round(peak, 4) if peak is not None else None,
+            "warning_count": int((corr[valid] >= warning).sum()),
+            "critical_count": int((corr[valid] >= critical).sum()),
+            "compared": int(len(valid)),
+            "nearest": [{"strategy_id": self.ids[j], "correlation": round(float(corr[j]), 4)} for j in nearest],
+        }
+
+    def admit(self, strategy_id, days, returns, warning, critical, force=False, top=5):
+        """check + 未达到 critical (或 force) 时写入; 同 id 的旧向量不参与比较"""
+        report = self.check(days, returns, warning, critical, exclude=strategy_id, top=top)
+        report["accepted"] = report["level"] != "critical" or force
+        if report["accepted"]:
+            self.add(strategy_id, days, returns)
+        return report
+
+    def info(self):
+        n, c = len(self.ids), len(self.days)
+        coverage = self._m[:n, :c].sum(axis=1) if n else np.zeros(0)
+        return {
+            "path": str(self.path),
+            "strategies": n,
+            "days": c,
+            "first_day": str(np.datetime64(min(self.days), "D")) if c else None,
+            "last_day": str(np.datetime64(max(self.days), "D")) if c else None,
+            "mean_days_per_strategy": round(float(coverage.mean()), 1) if n else 0.0,
+            "min_overlap": self.min_overlap,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Equity-Curve Correlation Index for Candidate Dedup")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX))
+    parser.add_argument("--min-overlap", type=int, default=MIN_OVERLAP, help="Minimum overlapping days")
+    parser.add_argument("--warning", type=float, default=None, help="Default: risk-params correlation_warning")
+    parser.add_argument("--critical", type=float, default=None, help="Default: risk-params correlation_critical")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_add = sub.add_parser("add", help="Backtest a candidate, check it and store it unless critical")
+    p_check = sub.add_parser("check", help="Backtest a candidate and report correlations only")
+    p_sync = sub.add_parser("sync", help="Add every strategy in a directory (in file order)")
+    for p in (p_add, p_check, p_sync):
+        p.add_argument("--days", type=int, default=180)
+        p.add_argument("--months", type=int, default=None, help="Backtest length in months (30 days each)")
+        p.add_argument("--capital", type=float, default=100000.0)
+        p.add_argument("--data-dir", default=None,
+                       help="Bar store root (see bar_store.py); simulated bars when omitted")
+        p.add_argument("--timeframe", default="15Min")
+    for p in (p_add, p_check):
+        source = p.add_mutually_exclusive_group(required=True)
+        source.add_argument("strategy", nargs="?", help="Path to strategy .py file")
+        source.add_argument("--returns-json", default=None,
+                            help='{"strategy_id", "dates": [...], "returns": [...]} instead of a backtest')
+        p.add_argument("--top", type=int, default=5)
+    p_add.add_argument("--force", action="store_true", help="Store even when above the critical threshold")
+    p_sync.add_argument("directory", nargs="?", default=str(REPO_ROOT / "strategies" / "candidates"))
+    p_remove = sub.add_parser("remove", help="Drop a strategy from the index")
+    p_remove.add_argument("strategy_id")
+    sub.add_parser("info", help="Index size and date range")
+    args = parser.parse_args()
+    if getattr(args, "months", None):
+        args.days = args.months * 30
+
+    limits = load_risk_params()["risk_limits"]
+    warning = args.warning if args.warning is not None else limits["correlation_warning"]
+    critical = args.critical if args.critical is not None else limits["correlation_critical"]
+    index = CorrelationIndex(args.index, args.min_overlap)
+
+    def load(path):
+        return strategy_returns(path, args.days, args.capital, args.data_dir, args.timeframe)
+
+    start = time.perf_counter()
+    code = 0
+    if args.command == "info":
+        result = index.info()
+    elif args.command == "remove":
+        result = {"strategy_id": args.strategy_id, "removed": index.remove(args.strategy_id)}
+        index.save()
+    elif args.command == "sync":
+        rows = []
+        for path in discover(args.directory):
+            try:
+                strategy_id, days, returns = load(path)
+            except UnsupportedStrategy as e:
+                rows.append({"path": str(path), "skipped": str(e)})
+                continue
+            except (ValueError, KeyError, ImportError) as e:
+                rows.append({"path": str(path), "error": str(e)})
+                continue
+            report = index.admit(strategy_id, days, returns, warning, critical, top=1)
+            rows.append({"strategy_id": strategy_id, "level": report["level"], "accepted": report["accepted"],
+                         "max_correlation": report["max_correlation"], "nearest": report["nearest"]})
+        index.save()
+        result = {"strategies": rows, "rejected": sum(1 for r in rows if r.get("accepted") is False),
+                  "skipped": sum(1 for r in rows if "skipped" in r),
+                  "errors": sum(1 for r in rows if "error" in r)}
+        code = 0 if not result["errors"] else 1
+    else:
+        try:
+            strategy_id, days, returns = load_returns_json(args.returns_json) if args.returns_json \
+                else load(args.strategy)
+        except (OSError, ValueError, KeyError) as e:
+            print(json.dumps({"status": "error", "message": str(e)}, ensure_ascii=False))
+            return 1
+        if args.command == "check":
+            result = {"strategy_id": strategy_id,
+                      **index.check(days, returns, warning, critical, exclude=strategy_id, top=args.top)}
+        else:
+            result = {"strategy_id": strategy_id,
+                      **index.admit(strategy_id, days, returns, warning, critical, args.force, args.top)}
+            if result["accepted"]:
+                index.save()
+        result["thresholds"] = {"correlation_warning": warning, "correlation_critical": critical}
+        code = 0 if result["level"] != "critical" else 1
+
+    print(json.dumps({**result, "elapsed_ms": round((time.perf_counter() - start) * 1e3, 3)},
+                     indent=2, ensure_ascii=False))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+事件驱动回测引擎
+把各标的 K 线与另类数据流 (期权异动 / 内幕申报 / 财报日历) 按时间戳做 k 路堆归并
+(heapq.merge, 惰性读取), 逐事件推进时钟; 每根 bar 只向策略提供它在
+STRATEGY_META["signal_sources"] 中声明的数据源在该时刻的视图 (point-in-time)。
+
+另类数据为 --alt-data-dir 下按时间排序的 JSONL 文件:
+    options_flow.jsonl        期权成交 (analyze_options_flow 格式 + timestamp)
+    insider_filings.jsonl     Form 4 申报 (check_insider_cluster 格式, 时间取 filed_at 或 date)
+    politician_trades.jsonl   议员交易 (与 Form 4 同格式)
+    earnings_calendar.jsonl   财报日历 {symbol, earnings_date, announced_at?,
+                              analyst_revision_trend?, iv_rank?} (fundamental 字段随行提供)
+
+内存有界: 文件逐行读取, K 线按块从 mmap 读取; 视图只保留时间窗口内的数据
+(期权 flow_window_days, 内幕 cluster_window_days, 财报只保留未到期的日程),
+每个标的的 bar 窗口为 LOOKBACK + 1 根 (或策略的增量 SignalState)。
+
+策略通过可选的 prepare_alt_data(view, symbol, params) 把视图转换为
+generate_signal(bars, alt_data, params) 的第二个参数; 只声明 technical 的策略不需要。
+同一时间戳上另类数据先于 K 线处理。
+
+用法:
+    python scripts/event_engine.py strategies/candidates/seed_insider_cluster_v1.py \\
+        --data-dir data/bars --alt-data-dir data/alt --days 365
+    python scripts/run_backtest.py <strategy> --alt-data-dir data/alt --symbols AAPL,MSFT
+"""
+import argparse
+import bisect
+import heapq
+import json
+import sys
+from array import array
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from bar_store import NS_PER_DAY, BarStore, columns_to_bars, format_timestamp, parse_timestamp
+from insider_clusters import InsiderClusterDetector
+from metrics import infer_periods_per_year
+from options_flow_store import classify_flow, flow_rules, is_unusual
+from run_backtest import ACTION_CODES, LOOKBACK, load_strategy, summarize
+from synthetic_market import SyntheticMarket, timeframe_minutes
+
+# 数据源 → (文件名, 时间字段优先级)
+ALT_SOURCES = {
+    "options_flow": ("options_flow.jsonl", ("timestamp",)),
+    "corporate_insider": ("insider_filings.jsonl", ("filed_at", "date")),
+    "politician_trading": ("politician_trades.jsonl", ("filed_at", "date")),
+    "event": ("earnings_calendar.jsonl", ("announced_at", "timestamp")),
+}
+# seed_options_flow_v1 的默认规则, 供未自带阈值的策略 (如 pre-earnings) 判定异动方向
+UNUSUAL_FLOW = flow_rules()
+BAR_CHUNK = 4096
+# insider_selling 的最长回看天数, 超出的内幕卖出记录被淘汰
+SELL_WINDOW_DAYS = 30
+# 同一时间戳的处理顺序
+ALT_PRIORITY, BAR_PRIORITY = 0, 1
+
+
+def bar_stream(symbol, days=30, data_dir=None, timeframe="15Min"):
+    """单个标的的 K 线事件 (按块从 mmap 转换, 不整体物化)"""
+    store = BarStore(data_dir) if data_dir is not None else None
+    if store is not None and store.has(symbol, timeframe):
+        columns = store.open(symbol, timeframe).last_days(days).columns
+        for start in range(0, len(columns["timestamp"]), BAR_CHUNK):
+            chunk = {name: col[start:start + BAR_CHUNK] for name, col in columns.items()}
+            for ts, bar in zip(chunk["timestamp"].tolist(), columns_to_bars(chunk)):
+                yield ts, BAR_PRIORITY, "bar", symbol, bar
+    else:
+        market = SyntheticMarket([symbol], timeframe_minutes(timeframe))
+        for chunk in market.chunks(days):
+            columns = chunk[symbol]
+            for ts, bar in zip(columns["timestamp"].tolist(), columns_to_bars(columns)):
+                yield ts, BAR_PRIORITY, "bar", symbol, bar
+
+
+def jsonl_stream(path, kind, time_fields):
+    """按时间排序的 JSONL 事件流; 缺少时间字段的记录视为从一开始即可见"""
+    last = None
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            value = next((record[k] for k in time_fields if record.get(k) is not None), None)
+            ts = parse_timestamp(value) if value is not None else 0
+            if last is not None and ts < last:
+                raise ValueError(f"{path}:{lineno} 时间戳未按升序排列")
+            last = ts
+            yield ts, ALT_PRIORITY, kind, record.get("symbol"), record
+
+
+class AltDataView:
+    """
+    策略可见的另类数据时点视图 (只维护声明的数据源)
+    universe 之外标的的记录在写入时丢弃; 期权流 / 内幕卖出 / 已过财报在写入时按标的淘汰,
+    并在每个自然日对全部标的清理一次, 内存只与窗口内的记录数有关
+    """
+
+    def __init__(self, sources, params=None, flow_window_days=1, universe=None):
+        params = params or {}
+        self.sources = set(sources)
+        self.universe = set(universe) if universe is not None else None
+        self.now = None
+        self._day = None
+        self.flow_window_ns = flow_window_days * NS_PER_DAY
+        self._flow = {}            # symbol → deque[(ts, record)]
+        self._expiry_days = {}
+        self._sells = {}           # symbol → deque[date_ns]
+        self._earnings = {}        # symbol → sorted [(earnings_ns, seq, record)]
+        self._seq = 0
+        self.insiders = InsiderClusterDetector(params.get("cluster_window_days", 30),
+                                               params.get("min_insiders", 3))
+
+    @property
+    def as_of(self):
+        return format_timestamp(self.now)
+
+    def advance(self, ts):
+        if self.now is None or ts > self.now:
+            self.now = ts
+            self.insiders.advance(ts)
+            if ts // NS_PER_DAY != self._day:
+                self._day = ts // NS_PER_DAY
+                self._prune()
+
+    def _prune(self):
+        """淘汰全部标的窗口外的记录, 清空的标的一并删除"""
+        for symbol in list(self._flow):
+            if not self._prune_flow(symbol):
+                del self._flow[symbol]
+        for symbol in list(self._sells):
+            if not self._prune_sells(symbol):
+                del self._sells[symbol]
+        for symbol in list(self._earnings):
+            if not self._prune_earnings(symbol):
+                del self._earnings[symbol]
+
+    def _prune_flow(self, symbol):
+        flow = self._flow[symbol]
+        cutoff = self.now - self.flow_window_ns
+        while flow and flow[0][0] < cutoff:
+            flow.popleft()
+        return flow
+
+    def _prune_sells(self, symbol):
+        sells = self._sells[symbol]
+        cutoff = self.now - SELL_WINDOW_DAYS * NS_PER_DAY
+        while sells and sells[0] < cutoff:
+            sells.popleft()
+        return sells
+
+    def _prune_earnings(self, symbol):
+        schedule = self._earnings[symbol]
+        del schedule[:bisect.bisect_left(schedule, (self.now // NS_PER_DAY * NS_PER_DAY,))]
+        return schedule
+
+    def on_event(self, kind, record):
+        symbol = record.get("symbol")
+        if self.universe is not None and symbol not in self.universe:
+            return
+        if kind == "options_flow":
+            self._flow.setdefault(symbol, deque()).append((self.now, record))
+            self._prune_flow(symbol)
+        elif kind in ("corporate_insider", "politician_trading"):
+            self.insiders.add(record, as_of=self.now)
+            if record.get("transaction_type") == "SELL":
+                self._sells.setdefault(symbol, deque()).append(parse_timestamp(record["date"]))
+                self._prune_sells(symbol)
+        elif kind == "event":
+            entry = (parse_timestamp(record["earnings_date"]), self._seq, record)
+            self._seq += 1
+            bisect.insort(self._earnings.setdefault(symbol, []), entry)
+            self._prune_earnings(symbol)
+
+    def _expiry_day(self, value):
+        day = self._expiry_days.get(value)
+        if day is None:
+            day = self._expiry_days[value] = parse_timestamp(value) // NS_PER_DAY
+        return day
+
+    def options_flow(self, symbol):
+        """flow_window_days 内该标的的期权成交记录"""
+        if symbol not in self._flow:
+            return []
+        return [record for _, record in self._prune_flow(symbol)]
+
+    def options_signal(self, symbol, params=None):
+        """异动方向判定 (analyze_options_flow 规则; params 缺省的键取 seed_options_flow_v1 默认值)"""
+        params = UNUSUAL_FLOW if params is None else flow_rules(params)
+        max_expiry_day = self.now // NS_PER_DAY + params["max_dte"]
+        unusual = [r for r in self.options_flow(symbol)
+                   if is_unusual(r, params, max_expiry_day, self._expiry_day)]
+        if len(unusual) < params["min_trades"]:
+            return {"signal": "neutral", "strength": 0.0, "details": []}
+        return classify_flow(unusual, params)
+
+    def insider_cluster(self, symbol):
+        return self.insiders.check(symbol)
+
+    def insider_selling(self, symbol, days=SELL_WINDOW_DAYS):
+        """days 日内是否有内幕卖出 (最多回看 SELL_WINDOW_DAYS 日)"""
+        if symbol not in self._sells:
+            return False
+        cutoff = self.now - min(days, SELL_WINDOW_DAYS) * NS_PER_DAY
+        return any(date >= cutoff for date in self._prune_sells(symbol))
+
+    def next_earnings(self, symbol):
+        """尚未发生的最近一次财报 (earnings_date 已过的条目被丢弃)"""
+        if symbol not in self._earnings:
+            return None
+        schedule = self._prune_earnings(symbol)
+        return schedule[0][2] if schedule else None
+
+    def days_until(self, date):
+        return (parse_timestamp(date) - self.now // NS_PER_DAY * NS_PER_DAY) // NS_PER_DAY
+
+
+def resolve_symbols(meta, symbols=None, data_dir=None, timeframe="15Min"):
+    """固定标的列表直接使用; dynamic 时取 --symbols 或 K 线缓存中的全部标的"""
+    if symbols:
+        return list(symbols)
+    if isinstance(meta["symbols"], list):
+        return meta["symbols"]
+    if data_dir is not None:
+        store = BarStore(data_dir)
+        return [s for s in store.symbols() if store.has(s, timeframe)]
+    return []
+
+
+def run_event_backtest(strategy_path, days=30, initial_capital=100000.0, data_dir=None,
+                       timeframe="15Min", alt_data_dir=None, symbols=None, flow_window_days=1,
+                       profiler=None):
+    """
+    执行事件驱动回测 (多标的共享资金, 每个标的最多一个多头仓位)
+    profiler (profiler.py) 记录 load_strategy / event_loop / metrics 阶段与每次信号调用延迟
+    """
+    phase = profiler.phase if profiler is not None else (lambda name: nullcontext())
+    with phase("load_strategy"):
+        module = load_strategy(strategy_path)
+    meta = module.STRATEGY_META
+    params = meta["params"]
+    symbols = resolve_symbols(meta, symbols, data_dir, timeframe)
+    if not symbols:
+        return {"status": "error", "message": "symbols=dynamic 时需要 --symbols 或 --data-dir"}
+
+    sources = [s for s in meta["signal_sources"] if s in ALT_SOURCES]
+    streams = [bar_stream(s, days, data_dir, timeframe) for s in symbols]
+    missing = []
+    for source in sources:
+        name, time_fields = ALT_SOURCES[source]
+        path = Path(alt_data_dir) / name if alt_data_dir else None
+        if path is not None and path.exists():
+            streams.append(jsonl_stream(path, source, time_fields))
+        else:
+            missing.append(source)
+
+    view = AltDataView(sources, params, flow_window_days, universe=symbols)
+    prepare = getattr(module, "prepare_alt_data", None) if sources else None
+    create_state = getattr(module, "create_signal_state", None)
+    states = {s: create_state(params) for s in symbols} if create_state else None
+    if states is not None:
+        def signal_for(symbol, bar, alt):
+            return states[symbol].update(bar, alt) if sources else states[symbol].update(bar)
+    else:
+        def signal_for(symbol, bar, alt):
+            window = windows[symbol]
+            window.append(bar)
+            return module.generate_signal(list(window), alt, params) if sources \
+                else module.generate_signal(list(window), params=params)
+    if profiler is not None:
+        signal_for = profiler.timed(signal_for, "state" if states is not None else "per_bar")
+    windows = {s: deque(maxlen=LOOKBACK + 1) for s in symbols}
+    bars_seen = dict.fromkeys(symbols, 0)
+
+    cash = initial_capital
+    positions = {}             # symbol → (qty, entry_price, entry_ts)
+    last_prices = {}
+    trades = []
+    equity_curve = array("d", [initial_capital])
+    exposure_curve = array("d")
+    equity_ts = array("q")
+    event_counts = dict.fromkeys(["bar", *sources], 0)
+    max_holding_ns = params["max_holding_days"] * NS_PER_DAY if "max_holding_days" in params else None
+    current_ts = None
+    trading = False
+
+    def mark():
+        exposure = sum(qty * last_prices[s] for s, (qty, _, _) in positions.items())
+        equity_curve.append(cash + exposure)
+        exposure_curve.append(exposure)
+        equity_ts.append(current_ts)
+
+    def close(symbol, price, ts):
+        nonlocal cash
+        qty, entry, _ = positions.pop(symbol)
+        cash += qty * price
+        trades.append({
+            "symbol": symbol,
+            "entry": entry,
+            "exit": price,
+            "qty": qty,
+            "pnl": round(qty * (price - entry), 2),
+            "pnl_pct": round((price - entry) / entry, 4),
+            "exit_time": format_timestamp(ts),
+        })
+
+    with phase("event_loop"):
+        for ts, _, kind, symbol, payload in heapq.merge(*streams, key=lambda e: (e[0], e[1])):
+            if kind != "bar":
+                view.advance(ts)
+                view.on_event(kind, payload)
+                event_counts[kind] += 1
+                continue
+
+            if ts != current_ts:
+                # 权益曲线从首个标的完成预热后开始记录 (与 simulate_trades 一致)
+                if trading:
+                    mark()
+                current_ts = ts
+            view.advance(ts)
+            event_counts["bar"] += 1
+            price = payload["close"]
+            last_prices[symbol] = price
+            bars_seen[symbol] += 1
+
+            alt = prepare(view, symbol, params) if prepare else None
+            signal = signal_for(symbol, payload, alt)
+            if bars_seen[symbol] <= LOOKBACK:
+                continue
+            trading = True
+
+            action = ACTION_CODES.get(signal["action"], 0)
+            position = positions.get(symbol)
+            if action == 1 and position is None and signal["confidence"] >= 0.5:
+                equity = cash + sum(q * last_prices[s] for s, (q, _, _) in positions.items())
+                qty = int(min(equity * params["max_position_pct"], cash) / price)
+                if qty > 0:
+                    positions[symbol] = (qty, price, ts)
+                    cash -= qty * price
+            elif position is not None:
+                pnl_pct = (price - position[1]) / position[1]
+                if (action == -1 or pnl_pct <= params["stop_loss_pct"]
+                        or pnl_pct >= params["take_profit_pct"]
+                        or (max_holding_ns is not None and ts - position[2] >= max_holding_ns)):
+                    close(symbol, price, ts)
+        if trading:
+            mark()
+    if profiler is not None:
+        profiler.count_bars(event_counts["bar"])
+
+    result = {
+        "mode": "event",
+        "strategy_id": meta["id"],
+        "symbols": symbols,
+        "signal_sources": meta["signal_sources"],
+        "missing_sources": missing,
+        "events": event_counts,
+        "backtest_days": days,
+        "initial_capital": initial_capital,
+    }
+    if not trades:
+        return {"status": "no_trades", "message": "回测期间无交易", **result}
+    with phase("metrics"):
+        metrics = summarize(trades, equity_curve, initial_capital, exposure_curve,
+                            infer_periods_per_year(equity_ts))
+    return {
+        "status": "success",
+        **result,
+        **metrics,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-Driven Backtest Engine")
+    parser.add_argument("strategy", help="Path to strategy .py file")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--output", default=None, help="Output JSON path")
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); simulated bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    parser.add_argument("--alt-data-dir", default=None, help="Directory of time-sorted alt-data JSONL files")
+    parser.add_argument("--symbols", default=None, help="Comma-separated universe (overrides STRATEGY_META)")
+    parser.add_argument("--flow-window-days", type=int, default=1)
+    args = parser.parse_args()
+
+    result = run_event_backtest(args.strategy, args.days, args.capital, args.data_dir, args.timeframe,
+                                args.alt_data_dir, args.symbols.split(",") if args.symbols else None,
+                                args.flow_window_days)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    return 0 if result.get("status") == "success" and result.get("sharpe_ratio", 0) > 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""
+进化记录 SQLite 索引
+把 evo/cycles/ (MICRO_CYCLE_REPORT, daily-YYYY-MM-DD.json), evo/debates/ (HYPOTHESIS /
+RISK_ASSESSMENT / REBUTTAL / CONCEDE / VERDICT 消息), memory/reflections/ 与 memory/causal/
+增量导入本地 SQLite (.cache/evo_index.sqlite), 字段为带类型的列: 周期 id, 策略 id, 原型,
+裁决, Sharpe, 回撤, 时间戳。日报 / 周报聚合 (ARCHITECTURE.md §5.2–5.3) 与反思合成
+(protocols/discussion-rules.md §2) 改为带索引的 SQL 查询, 耗时与累计周期数无关。
+
+- sync(): 按 (mtime, 大小) 跳过未变文件, 变化时比对 sha256, 内容不同才重新解析;
+  一个文件的全部行按 path 整体替换, 删除的文件同步删除其行
+- 支持 .json (对象 / 列表 / {"messages": [...]}), .jsonl, 以及 memory/ 下的 .md (标题 + 日期)
+- 原型 (archetype) 来自 HYPOTHESIS.expected_traits; 周期记录缺失时按 hypothesis_id 关联辩论补全
+
+用法:
+    python scripts/evo_index.py sync
+    python scripts/evo_index.py watch --interval 5
+    python scripts/evo_index.py daily 2026-02-23
+    python scripts/evo_index.py weekly 2026-W08
+    python scripts/evo_index.py reflections --hours 24
+    python scripts/evo_index.py query "SELECT verdict, COUNT(*) FROM debates GROUP BY verdict"
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB = REPO_ROOT / ".cache" / "evo_index.sqlite"
+SOURCES = {  # 相对仓库根目录 → 记录类别
+    "evo/cycles": "cycles",
+    "evo/debates": "debates",
+    "memory/reflections": "reflection",
+    "memory/causal": "causal",
+}
+SUFFIXES = {".json", ".jsonl", ".md"}
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha256 TEXT, kind TEXT,
+    records INTEGER, error TEXT, indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS cycles (
+    path TEXT NOT NULL, cycle_id TEXT NOT NULL, timestamp TEXT, date TEXT,
+    strategy_id TEXT, archetype TEXT, verdict TEXT, confidence REAL,
+    sharpe REAL, max_drawdown REAL, feature_map_delta_cells INTEGER,
+    PRIMARY KEY (path, cycle_id)
+);
+CREATE INDEX IF NOT EXISTS cycles_date ON cycles (date);
+CREATE INDEX IF NOT EXISTS cycles_strategy ON cycles (strategy_id);
+CREATE TABLE IF NOT EXISTS daily_reports (
+    path TEXT NOT NULL, date TEXT NOT NULL, cycles_completed INTEGER, strategies_approved INTEGER,
+    strategies_rejected INTEGER, strategies_revised INTEGER, feature_map_coverage_pct REAL,
+    top_strategy_id TEXT, top_sharpe REAL, daily_pnl_pct REAL,
+    PRIMARY KEY (path, date)
+);
+CREATE INDEX IF NOT EXISTS daily_reports_date ON daily_reports (date);
+CREATE TABLE IF NOT EXISTS debates (
+    path TEXT NOT NULL, hypothesis_id TEXT NOT NULL, timestamp TEXT, date TEXT,
+    parent_strategy_id TEXT, archetype TEXT, asset_class TEXT, risk_rating TEXT,
+    rounds INTEGER, conceded INTEGER, verdict TEXT, confidence REAL,
+    sharpe REAL, max_drawdown REAL, win_rate REAL, total_trades INTEGER, committed_to TEXT,
+    PRIMARY KEY (path, hypothesis_id)
+);
+CREATE INDEX IF NOT EXISTS debates_date ON debates (date);
+CREATE INDEX IF NOT EXISTS debates_hypothesis ON debates (hypothesis_id);
+CREATE TABLE IF NOT EXISTS reflections (
+    path TEXT NOT NULL, id TEXT NOT NULL, kind TEXT, timestamp TEXT, date TEXT,
+    strategy_id TEXT, archetype TEXT, verdict TEXT, summary TEXT,
+    PRIMARY KEY (path, id)
+);
+CREATE INDEX IF NOT EXISTS reflections_timestamp ON reflections (timestamp);
+"""
+TABLES = ("cycles", "daily_reports", "debates", "reflections")
+COMPACT_TS = re.compile(r"(\d{8})_(\d{4})")
+ISO_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+# ── 解析 ──
+
+def first(record, *keys):
+    """取第一个存在且非空的字段; 键可用 a.b 访问嵌套字段"""
+    for key in keys:
+        value = record
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value is not None:
+            return value
+    return None
+
+
+def _number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def when(record, *names, fallback=None):
+    """记录时间 (ISO, UTC): 时间字段 → id / 文件名中的 YYYYMMDD_HHMM 或 YYYY-MM-DD → fallback"""
+    value = first(record, "timestamp", "created", "created_at", "time", "date")
+    if isinstance(value, str) and ISO_DATE.match(value):
+        return value if "T" in value else value + "T00:00:00Z"
+    for name in names:
+        if not isinstance(name, str):
+            continue
+        match = COMPACT_TS.search(name)
+        if match:
+            d, t = match.groups()
+            return f"{d[:4]}-{d[4:6]}-{d[6:]}T{t[:2]}:{t[2:]}:00Z"
+        match = ISO_DATE.search(name)
+        if match:
+            return match.group(1) + "T00:00:00Z"
+    return fallback
+
+
+def load_records(path):
+    """JSON / JSONL → 记录列表; Markdown → 一条 {id, summary}"""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".md":
+        title = next((line.lstrip("# ").strip() for line in text.splitlines() if line.strip()), "")
+        return [{"id": path.stem, "summary": title}]
+    if path.suffix == ".jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    if isinstance(data, dict) and isinstance(data.get("messages"), list):
+        return data["messages"]
+    return data if isinstance(data, list) else [data]
+
+
+def debate_rows(messages, fallback):
+    """一组辩论消息 → 每个 hypothesis_id 一行"""
+    debates = {}
+    for msg in messages:
+        hid = first(msg, "hypothesis_id", "strategy_id", "id")
+        if hid is None:
+            continue
+        row = debates.setdefault(hid, {"hypothesis_id": hid, "rounds": 0, "conceded": 0,
+                                        "timestamp": when(msg, hid, fallback=fallback)})
+        kind = msg.get("type")
+        row["rounds"] = max(row["rounds"], int(msg.get("round") or 0))
+        if kind == "HYPOTHESIS":
+            row["archetype"] = first(msg, "expected_traits.archetype", "archetype")
+            row["asset_class"] = first(msg, "expected_traits.asset_class", "asset_class")
+            row["parent_strategy_id"] = msg.get("parent_strategy_id")
+        elif kind == "RISK_ASSESSMENT":
+            row["risk_rating"] = msg.get("risk_rating")
+        elif kind == "CONCEDE":
+            row["conceded"] = 1
+        elif kind == "VERDICT":
+            row["verdict"] = msg.get("verdict")
+            row["confidence"] = _number(msg.get("confidence"))
+            row["sharpe"] = _number(first(msg, "backtest_result.sharpe"))
+            row["max_drawdown"] = _number(first(msg, "backtest_result.max_drawdown"))
+            row["win_rate"] = _number(first(msg, "backtest_result.win_rate"))
+            row["total_trades"] = first(msg, "backtest_result.total_trades")
+            row["committed_to"] = msg.get("committed_to")
+    return list(debates.values())
+
+
+def parse_file(path, kind, fallback):
+    """文件 → {表名: [行字典]}"""
+    records = load_records(path)
+    rows = {table: [] for table in TABLES}
+    if kind == "debates":
+        rows["debates"] = debate_rows(records, fallback)
+    elif kind == "cycles":
+        for rec in records:
+            if rec.get("type") == "DAILY_REPORT" or path.stem.startswith("daily-"):
+                rows["daily_reports"].append({
+                    "date": first(rec, "date") or when(rec, path.stem, fallback=fallback)[:10],
+                    "cycles_completed": rec.get("cycles_completed"),
+                    "strategies_approved": rec.get("strategies_approved"),
+                    "strategies_rejected": rec.get("strategies_rejected"),
+                    "strategies_revised": rec.get("strategies_revised"),
+                    "feature_map_coverage_pct": _number(rec.get("feature_map_coverage_pct")),
+                    "top_strategy_id": first(rec, "top_strategy.id"),
+                    "top_sharpe": _number(first(rec, "top_strategy.sharpe")),
+                    "daily_pnl_pct": _number(first(rec, "trading_feedback.daily_pnl_pct")),
+                })
+            elif rec.get("type") in ("HYPOTHESIS", "RISK_ASSESSMENT", "REBUTTAL", "CONCEDE", "VERDICT"):
+                rows["debates"].extend(debate_rows([rec], fallback))
+            else:
+                cycle_id = first(rec, "cycle_id", "id") or path.stem
+                rows["cycles"].append({
+                    "cycle_id": cycle_id,
+                    "timestamp": when(rec, cycle_id, path.stem, fallback=fallback),
+                    "strategy_id": first(rec, "hypothesis_id", "strategy_id"),
+                    "archetype": first(rec, "archetype", "expected_traits.archetype"),
+                    "verdict": rec.get("verdict"),
+                    "confidence": _number(rec.get("confidence")),
+                    "sharpe": _number(first(rec, "backtest_sharpe", "sharpe", "backtest_result.sharpe")),
+                    "max_drawdown": _number(first(rec, "backtest_max_drawdown", "max_drawdown",
+                                                  "backtest_result.max_drawdown")),
+                    "feature_map_delta_cells": rec.get("feature_map_delta_cells"),
+                })
+    else:
+        for i, rec in enumerate(records):
+            rid = first(rec, "reflection_id", "causal_id", "principle_id", "id") or \
+                (path.stem if len(records) == 1 else f"{path.stem}:{i}")
+            rows["reflections"].append({
+                "id": rid, "kind": kind,
+                "timestamp": when(rec, rid, path.stem, fallback=fallback),
+                "strategy_id": first(rec, "strategy_id", "hypothesis_id"),
+                "archetype": first(rec, "archetype", "expected_traits.archetype"),
+                "verdict": first(rec, "verdict", "outcome"),
+                "summary": first(rec, "summary", "statement", "lesson", "reason", "reasoning"),
+            })
+    for table in ("cycles", "debates", "reflections"):
+        for row in rows[table]:
+            row["date"] = row["timestamp"][:10] if row.get("timestamp") else None
+    return rows
+
+
+# ── 索引 ──
+
+class EvoIndex:
+    """进化记录的增量 SQLite 索引与 Evolver 聚合查询"""
+
+    def __init__(self, db_path=DEFAULT_DB, root=REPO_ROOT):
+        self.root = Path(root)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            for table in ("files",) + TABLES:
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _scan(self):
+        """{相对路径: (类别, stat)}"""
+        found = {}
+        for rel, kind in SOURCES.items():
+            directory = self.root / rel
+            if not directory.is_dir():
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[1] in SUFFIXES and not entry.name.startswith(".") \
+                            and entry.is_file():
+                        found[f"{rel}/{entry.name}"] = (kind, entry.stat())
+        return found
+
+    def _replace(self, rel, rows):
+        for table in TABLES:
+            self.conn.execute(f"DELETE FROM {table} WHERE path = ?", (rel,))
+            for row in rows.get(table, []):
+                columns = ["path"] + list(row)
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})", [rel] + list(row.values()))
+
+    def sync(self):
+        """增量导入; 返回 {"added", "updated", "removed", "unchanged", "errors"}"""
+        known = {row["path"]: row for row in self.conn.execute("SELECT path, mtime_ns, size, sha256 FROM files")}
+        found = self._scan()
+        report = {"added": [], "updated": [], "removed": [], "unchanged": 0, "errors": {}}
+        now = datetime.utcnow().isoformat() + "Z"
+        with self.conn:
+            for rel in sorted(set(known) - set(found)):
+                self._replace(rel, {})
+                self.conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+                report["removed"].append(rel)
+            for rel, (kind, st) in sorted(found.items()):
+                prev = known.get(rel)
+                if prev is not None and prev["mtime_ns"] == st.st_mtime_ns and prev["size"] == st.st_size:
+                    report["unchanged"] += 1
+                    continue
+                path = self.root / rel
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+                error, count = None, None
+                if prev is None or prev["sha256"] != digest:
+                    fallback = datetime.fromtimestamp(st.st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                    try:
+                        rows = parse_file(path, kind, fallback)
+                        self._replace(rel, rows)
+                        count = sum(len(r) for r in rows.values())
+                    except (ValueError, KeyError, AttributeError, TypeError) as e:
+                        self._replace(rel, {})
+                        error = report["errors"][rel] = f"{type(e).__name__}: {e}"
+                    report["added" if prev is None else "updated"].append(rel)
+                else:
+                    report["unchanged"] += 1
+                self.conn.execute(
+                    "INSERT INTO files (path, mtime_ns, size, sha256, kind, records, error, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET mtime_ns=excluded.mtime_ns, "
+                    "size=excluded.size, sha256=excluded.sha256, kind=excluded.kind, "
+                    "records=COALESCE(excluded.records, files.records), error=excluded.error, "
+                    "indexed_at=excluded.indexed_at",
+                    (rel, st.st_mtime_ns, st.st_size, digest, kind, count, error, now))
+        return report
+
+    # 查询
+
+    def query(self, sql, params=()):
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def _cycles(self):
+        """日期区间 (两个参数) 内的周期子查询, 原型缺失时由辩论补全"""
+        return """
+            SELECT c.cycle_id, c.date, c.strategy_id, c.verdict, c.sharpe, c.max_drawdown,
+                   c.feature_map_delta_cells,
+                   COALESCE(c.archetype, (SELECT d.archetype FROM debates d
+                                          WHERE d.hypothesis_id = c.strategy_id AND d.archetype IS NOT NULL
+                                          LIMIT 1)) AS archetype
+            FROM cycles c WHERE c.date BETWEEN ? AND ?"""
+
+    def daily_summary(self, day):
+        """§5.2 日报的进化部分 (DAILY_REPORT 字段)"""
+        day = str(day)[:10]
+        sub, span = self._cycles(), (day, day)
+        counts = {row["verdict"]: row["n"] for row in self.conn.execute(
+            f"SELECT verdict, COUNT(*) AS n FROM ({sub}) GROUP BY verdict", span)}
+        top = self.conn.execute(
+            f"SELECT strategy_id, sharpe FROM ({sub}) WHERE sharpe IS NOT NULL "
+            "ORDER BY sharpe DESC LIMIT 1", span).fetchone()
+        return {
+            "date": day,
+            "cycles_completed": sum(counts.values()),
+            "strategies_approved": counts.get("APPROVE", 0),
+            "strategies_rejected": counts.get("REJECT", 0),
+            "strategies_revised": counts.get("REVISE", 0),
+            "feature_map_delta_cells": self.conn.execute(
+                f"SELECT COALESCE(SUM(feature_map_delta_cells), 0) FROM ({sub})", span).fetchone()[0],
+            "top_strategy": {"id": top["strategy_id"], "sharpe": top["sharpe"]} if top else None,
+            "by_archetype": self.query(
+                f"SELECT archetype, COUNT(*) AS cycles, SUM(verdict = 'APPROVE') AS approved, "
+                f"AVG(sharpe) AS avg_sharpe FROM ({sub}) GROUP BY archetype ORDER BY cycles DESC", span),
+            "reflections": self.conn.execute(
+                "SELECT COUNT(*) FROM reflections WHERE date = ?", (day,)).fetchone()[0],
+        }
+
+    def weekly_summary(self, week):
+        """§5.3 周报 + 元反思的裁决分布; week 为 ISO 周 "YYYY-Www" """
+        year, number = week.split("-W")
+        start = date.fromisocalendar(int(year), int(number), 1)
+        end = start + timedelta(days=6)
+        sub, span = self._cycles(), (start.isoformat(), end.isoformat())
+        distribution = {row["verdict"]: row["n"] for row in self.conn.execute(
+            f"SELECT verdict, COUNT(*) AS n FROM ({sub}) GROUP BY verdict", span)}
+        debates = self.conn.execute(
+            "SELECT COUNT(*) AS total, SUM(conceded) AS conceded, "
+            "SUM(risk_rating = 'REJECT' AND verdict = 'APPROVE') AS critic_overridden "
+            "FROM debates WHERE date BETWEEN ? AND ?", span).fetchone()
+        return {
+            "week": week,
+            "total_cycles": sum(distribution.values()),
+            "strategies_approved": distribution.get("APPROVE", 0),
+            "verdict_distribution": distribution,
+            "best_strategy_sharpe": self.conn.execute(f"SELECT MAX(sharpe) FROM ({sub})", span).fetchone()[0],
+            "total_debates": debates["total"],
+            "explorer_conceded": debates["conceded"] or 0,
+            "critic_override_rate": round((debates["critic_overridden"] or 0) / debates["total"], 4)
+            if debates["total"] else 0.0,
+            "daily_reports": self.query(
+                "SELECT date, cycles_completed, strategies_approved, feature_map_coverage_pct, daily_pnl_pct "
+                "FROM daily_reports WHERE date BETWEEN ? AND ? ORDER BY date", span),
+        }
+
+    def reflections_since(self, hours=24, now=None, pattern_min=3):
+        """§2.1 原则合成的输入: 近 hours 小时的反思 / 因果记录, 及按原型聚合的重复模式 (≥ pattern_min)"""
+        now = now or datetime.now(timezone.utc)
+        since = (now - timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows = self.query("SELECT id, kind, timestamp, strategy_id, archetype, verdict, summary "
+                          "FROM reflections WHERE timestamp >= ? ORDER BY timestamp", (since,))
+        patterns = self.query(
+            "SELECT archetype, kind, COUNT(*) AS n, GROUP_CONCAT(id) AS ids FROM reflections "
+            "WHERE timestamp >= ? AND archetype IS NOT NULL GROUP BY archetype, kind HAVING n >= ? "
+            "ORDER BY n DESC", (since, pattern_min))
+        return {"since": since, "records": rows, "patterns": patterns}
+
+    def strategy_history(self, strategy_id):
+        """某策略 / 假设的周期与辩论记录"""
+        return {
+            "cycles": self.query("SELECT * FROM cycles WHERE strategy_id = ? ORDER BY timestamp", (strategy_id,)),
+            "debates": self.query("SELECT * FROM debates WHERE hypothesis_id = ? ORDER BY timestamp",
+                                  (strategy_id,)),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite Index over Evolution Cycles, Debates and Reflections")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    parser.add_argument("--root", default=str(REPO_ROOT), help="Repository root")
+    parser.add_argument("--no-sync", action="store_true", help="Query without syncing first")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="Ingest new/changed files and drop removed ones")
+    p_watch = sub.add_parser("watch", help="Poll and sync on file changes")
+    p_watch.add_argument("--interval", type=float, default=5.0)
+    p_daily = sub.add_parser("daily", help="Daily-cycle aggregation (ARCHITECTURE.md 5.2)")
+    p_daily.add_argument("date", nargs="?", default=None)
+    p_weekly = sub.add_parser("weekly", help="Weekly-cycle aggregation (ARCHITECTURE.md 5.3)")
+    p_weekly.add_argument("week", nargs="?", default=None, help="ISO week, e.g. 2026-W08")
+    p_refl = sub.add_parser("reflections", help="Recent reflections and recurring patterns")
+    p_refl.add_argument("--hours", type=float, default=24.0)
+    p_strategy = sub.add_parser("strategy", help="Cycles and debates of one strategy/hypothesis")
+    p_strategy.add_argument("strategy_id")
+    p_query = sub.add_parser("query", help="Run a read-only SQL query")
+    p_query.add_argument("sql")
+    args = parser.parse_args()
+
+    index = EvoIndex(args.db, args.root)
+    try:
+        if args.command == "watch":
+            try:
+                while True:
+                    report = index.sync()
+                    if report["added"] or report["updated"] or report["removed"] or report["errors"]:
+                        print(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **report},
+                                         ensure_ascii=False), flush=True)
+                    time.sleep(args.interval)
+            except KeyboardInterrupt:
+                return 0
+
+        start = time.perf_counter()
+        sync = index.sync() if not args.no_sync or args.command == "sync" else {"errors": {}}
+        if args.command == "sync":
+            result = {**sync, "added": len(sync["added"]), "updated": len(sync["updated"]),
+                      "removed": len(sync["removed"])}
+        elif args.command == "daily":
+            result = index.daily_summary(args.date or datetime.utcnow().date().isoformat())
+        elif args.command == "weekly":
+            result = index.weekly_summary(args.week or "{}-W{:02d}".format(*datetime.utcnow().isocalendar()[:2]))
+        elif args.command == "reflections":
+            result = index.reflections_since(args.hours)
+        elif args.command == "strategy":
+            result = index.strategy_history(args.strategy_id)
+        else:
+            if not args.sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                parser.error("only SELECT/WITH queries are allowed")
+            result = index.query(args.sql)
+        print(json.dumps({**result, "elapsed_ms": round((time.perf_counter() - start) * 1e3, 3)}
+                         if isinstance(result, dict) else result, indent=2, ensure_ascii=False))
+        return 0 if not sync["errors"] else 1
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
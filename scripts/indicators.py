@@ -0,0 +1,211 @@
+"""
+增量指标引擎
+每根新 bar 以 O(1) 更新 (与历史长度无关), 供实盘 Trader 与回测共用。
+所有指标可通过 to_dict()/indicator_from_dict() 序列化为 JSON, 重启后恢复状态。
+
+策略可选导出:
+
+    create_signal_state(params) -> state
+    state.update(bar) -> { action, confidence, reason }
+    state.to_dict() / 策略模块的 load_signal_state(data)
+
+注意: WilderRSI 为无限历史的标准 Wilder 平滑, 与 generate_signal
+在固定窗口内重新播种的 RSI 数值上略有差异。
+"""
+from collections import deque
+
+
+class SMA:
+    """环形缓冲区简单移动平均"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.buffer = [0.0] * period
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.value = None
+
+    def update(self, x: float):
+        if self.count == self.period:
+            self.total -= self.buffer[self.index]
+        else:
+            self.count += 1
+        self.buffer[self.index] = x
+        self.total += x
+        self.index = (self.index + 1) % self.period
+        if self.index == 0:
+            # 每绕一圈重算一次, 消除浮点累积误差 (摊还 O(1))
+            self.total = sum(self.buffer[:self.count])
+        self.value = self.total / self.period if self.count == self.period else None
+        return self.value
+
+    def to_dict(self):
+        return {
+            "type": "SMA",
+            "period": self.period,
+            "buffer": list(self.buffer),
+            "index": self.index,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls(data["period"])
+        obj.buffer = list(data["buffer"])
+        obj.index = data["index"]
+        obj.count = data["count"]
+        obj.total = sum(obj.buffer[:obj.count])
+        obj.value = obj.total / obj.period if obj.count == obj.period else None
+        return obj
+
+
+class EMA:
+    """指数移动平均, 以前 period 个值的 SMA 播种"""
+
+    def __init__(self, period: int, alpha: float = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = None
+
+    def update(self, x: float):
+        if self.value is None:
+            self.count += 1
+            self.seed_total += x
+            if self.count == self.period:
+                self.value = self.seed_total / self.period
+            return self.value
+        self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def to_dict(self):
+        return {
+            "type": "EMA",
+            "period": self.period,
+            "alpha": self.alpha,
+            "count": self.count,
+            "seed_total": self.seed_total,
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls(data["period"], data["alpha"])
+        obj.count = data["count"]
+        obj.seed_total = data["seed_total"]
+        obj.value = data["value"]
+        return obj
+
+
+class WilderRSI:
+    """Wilder RSI: 前 period 个涨跌幅取均值播种, 之后递推平滑"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+
+    def update(self, price: float):
+        if self.prev is None:
+            self.prev = price
+            return None
+        delta = price - self.prev
+        self.prev = price
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.count < self.period:
+            self.count += 1
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return None
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100.0 - (100.0 / (1.0 + self.avg_gain / self.avg_loss))
+        return self.value
+
+    def to_dict(self):
+        return {
+            "type": "WilderRSI",
+            "period": self.period,
+            "prev": self.prev,
+            "count": self.count,
+            "avg_gain": self.avg_gain,
+            "avg_loss": self.avg_loss,
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls(data["period"])
+        obj.prev = data["prev"]
+        obj.count = data["count"]
+        obj.avg_gain = data["avg_gain"]
+        obj.avg_loss = data["avg_loss"]
+        obj.value = data["value"]
+        return obj
+
+
+class RollingMax:
+    """单调双端队列滚动最大值 (窗口内未满时返回已见数据的最大值)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()  # (序号, 值), 值单调递减
+        self.seq = 0
+        self.value = None
+
+    def _dominates(self, new, old):
+        return new >= old
+
+    def update(self, x: float):
+        while self.window and self._dominates(x, self.window[-1][1]):
+            self.window.pop()
+        self.window.append((self.seq, x))
+        if self.window[0][0] <= self.seq - self.period:
+            self.window.popleft()
+        self.seq += 1
+        self.value = self.window[0][1]
+        return self.value
+
+    def to_dict(self):
+        return {
+            "type": type(self).__name__,
+            "period": self.period,
+            "window": [list(item) for item in self.window],
+            "seq": self.seq,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls(data["period"])
+        obj.window = deque((seq, value) for seq, value in data["window"])
+        obj.seq = data["seq"]
+        obj.value = obj.window[0][1] if obj.window else None
+        return obj
+
+
+class RollingMin(RollingMax):
+    """单调双端队列滚动最小值"""
+
+    def _dominates(self, new, old):
+        return new <= old
+
+
+INDICATOR_TYPES = {cls.__name__: cls for cls in (SMA, EMA, WilderRSI, RollingMax, RollingMin)}
+
+
+def indicator_from_dict(data):
+    """根据 to_dict() 的 type 字段恢复指标"""
+    return INDICATOR_TYPES[data["type"]].from_dict(data)
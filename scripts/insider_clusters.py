@@ -0,0 +1,183 @@
+"""
+内幕交易聚集 (insider cluster) 流式检测
+按到达顺序消费 Form 4 申报, 为每个标的维护 cluster_window_days 滑动窗口内的
+买入申报与去重买入人计数; 所有申报按日期进入同一个最小堆, 时间推进时只弹出
+过期申报, 不扫描全部历史。去重买入人数向上穿越 min_insiders 时产生 cluster_start
+事件, 回落到阈值以下时产生 cluster_end 事件。
+
+时间由调用方显式给出 (as_of), 可按历史顺序回放用于回测;
+窗口语义与 seed_insider_cluster_v1.check_insider_cluster 一致: as_of - window <= date <= as_of。
+
+用法:
+    python scripts/insider_clusters.py replay filings.jsonl --output events.jsonl
+    python scripts/insider_clusters.py replay filings.json --as-of 2026-10-16 --active
+"""
+import argparse
+import heapq
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+from bar_store import NS_PER_DAY, format_timestamp, parse_timestamp
+
+
+class InsiderClusterDetector:
+    """滑动时间窗口内的去重内幕买入人计数 (增量更新)"""
+
+    def __init__(self, window_days=30, min_insiders=3):
+        self.window_days = window_days
+        self.min_insiders = min_insiders
+        self.now = None           # 当前时间 (纳秒), 只前进
+        self._heap = []           # (date_ns, seq, symbol, insider_name)
+        self._seq = 0
+        self._buyers = {}         # symbol → Counter(insider_name → 窗口内申报数)
+        self._filings = {}        # symbol → {seq: filing}
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params["cluster_window_days"], params["min_insiders"])
+
+    @property
+    def cutoff(self):
+        return None if self.now is None else self.now - self.window_days * NS_PER_DAY
+
+    def insider_count(self, symbol):
+        return len(self._buyers.get(symbol, ()))
+
+    def _event(self, kind, symbol):
+        return {"type": kind, "symbol": symbol, "time": format_timestamp(self.now),
+                "insider_count": self.insider_count(symbol)}
+
+    def advance(self, as_of):
+        """推进时间并淘汰窗口外的申报, 返回 cluster_end 事件"""
+        as_of = parse_timestamp(as_of)
+        if self.now is not None and as_of < self.now:
+            raise ValueError(f"时间不能回退: {format_timestamp(as_of)} < {format_timestamp(self.now)}")
+        self.now = as_of
+        cutoff = self.cutoff
+        events = []
+        while self._heap and self._heap[0][0] < cutoff:
+            _, seq, symbol, name = heapq.heappop(self._heap)
+            buyers = self._buyers[symbol]
+            before = len(buyers)
+            buyers[name] -= 1
+            if buyers[name] == 0:
+                del buyers[name]
+            del self._filings[symbol][seq]
+            if before >= self.min_insiders > len(buyers):
+                events.append(self._event("cluster_end", symbol))
+            if not buyers:
+                del self._buyers[symbol]
+                del self._filings[symbol]
+        return events
+
+    def add(self, filing, as_of=None):
+        """
+        消费一条申报, 返回产生的事件
+        as_of 为申报被获知的时间; 缺省时取 max(当前时间, 申报日期)
+        日期晚于 as_of 的申报 (未来数据) 丢弃, 不计入窗口
+        """
+        date = parse_timestamp(filing["date"])
+        as_of = parse_timestamp(as_of) if as_of is not None else max(date, self.now or date)
+        events = self.advance(as_of)
+        if filing.get("transaction_type") != "BUY" or not self.cutoff <= date <= self.now:
+            return events
+
+        symbol = filing["symbol"]
+        buyers = self._buyers.setdefault(symbol, Counter())
+        before = len(buyers)
+        buyers[filing["insider_name"]] += 1
+        self._filings.setdefault(symbol, {})[self._seq] = filing
+        heapq.heappush(self._heap, (date, self._seq, symbol, filing["insider_name"]))
+        self._seq += 1
+        if before < self.min_insiders <= len(buyers):
+            events.append(self._event("cluster_start", symbol))
+        return events
+
+    def extend(self, filings, as_of=None):
+        """批量消费 (按给定顺序), 最后推进到 as_of"""
+        events = []
+        for filing in filings:
+            events += self.add(filing)
+        if as_of is not None:
+            events += self.advance(as_of)
+        return events
+
+    def active_clusters(self):
+        """{symbol: insider_count}, 仅含达到阈值的标的"""
+        return {s: len(b) for s, b in self._buyers.items() if len(b) >= self.min_insiders}
+
+    def check(self, symbol, as_of=None):
+        """与 check_insider_cluster 相同结构的结果 (as_of 会推进时间)"""
+        if as_of is not None:
+            self.advance(as_of)
+        filings = sorted(self._filings.get(symbol, {}).items())
+        count = self.insider_count(symbol)
+        return {
+            "signal": count >= self.min_insiders,
+            "insider_count": count,
+            "details": [
+                {"name": f["insider_name"], "title": f.get("insider_title"),
+                 "shares": f.get("shares"), "price": f.get("price"), "date": f["date"]}
+                for _, f in filings
+            ],
+        }
+
+    def to_dict(self):
+        return {
+            "window_days": self.window_days,
+            "min_insiders": self.min_insiders,
+            "now": self.now,
+            "filings": [f for _, f in sorted((seq, f) for fs in self._filings.values()
+                                             for seq, f in fs.items())],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        detector = cls(data["window_days"], data["min_insiders"])
+        for filing in data["filings"]:
+            detector.add(filing, as_of=data["now"] if data["now"] is not None else None)
+        return detector
+
+
+def read_filings(path):
+    """读取 JSON 数组或 JSONL"""
+    with open(path) as f:
+        if str(path).endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data.get("filings", data) if isinstance(data, dict) else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming Insider Cluster Detector")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_replay = sub.add_parser("replay", help="Replay filings in date order and emit cluster events")
+    p_replay.add_argument("path", help="Filings .json/.jsonl")
+    p_replay.add_argument("--window-days", type=int, default=30)
+    p_replay.add_argument("--min-insiders", type=int, default=3)
+    p_replay.add_argument("--as-of", default=None, help="Advance to this time after the last filing")
+    p_replay.add_argument("--active", action="store_true", help="Print active clusters at the end")
+    p_replay.add_argument("--output", default=None, help="Write events as JSONL")
+    args = parser.parse_args()
+
+    filings = sorted(read_filings(args.path), key=lambda f: parse_timestamp(f["date"]))
+    detector = InsiderClusterDetector(args.window_days, args.min_insiders)
+    events = detector.extend(filings, args.as_of)
+
+    lines = [json.dumps(e, ensure_ascii=False) for e in events]
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+    else:
+        print("\n".join(lines))
+    if args.active:
+        print(json.dumps({"as_of": format_timestamp(detector.now) if detector.now else None,
+                          "active_clusters": detector.active_clusters()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,577 @@
+"""
+Trader 实盘运行时 (asyncio)
+订阅 K 线源, 为每个标的维护滚动窗口 (LOOKBACK + 1 根); 每个时间戳把新 bar 并发分发给
+交易该标的的全部生产策略, 汇总信号后按 config/risk-params.json 的 portfolio 限制生成订单,
+经可插拔的 Broker 接口下单。同一时间戳的 bar 一起处理, 处理完才进入下一个时间戳。
+
+每个策略的执行方式:
+    inline   在事件循环内直接计算 (导出 create_signal_state 的策略默认, O(1)/bar)
+    thread   线程池 (其他策略默认; 适合释放 GIL 的 NumPy 计算)
+    process  进程池 (CPU 密集的逐 bar generate_signal; worker 经 strategy_registry 缓存加载策略)
+增量信号状态只在 inline 下维护; thread / process 总是对窗口副本调用 generate_signal:
+超出预算被丢弃的任务在线程 / 进程中仍会算完, 共享的状态对象会被并发、乱序更新。
+
+延迟预算: 从收到 bar 到订单被 broker 确认的端到端耗时超过 latency_budget_ms 记为超时 (overrun);
+预算内未算完信号的策略本 bar 不下单 (dropped), 不用过期数据交易。
+延迟分布使用 profiler.LatencyHistogram (p50/p99/max)。
+
+给出 strategy_dir 时每 refresh_seconds 经 strategy_registry.refresh() 热更新: 新增策略开始交易,
+变化的策略保留持仓并重置信号状态, 删除的策略在下一根 bar 平仓。
+K 线源只订阅启动时 symbols() 给出的标的: 热加载的策略若交易新标的, 回放 (ReplayFeed) 中收不到
+这些标的的 bar, 需要重启; 实盘 BarFeed 应在 refresh 后按 symbols() 重新订阅。
+另类数据策略通过 alt_provider(meta, symbol, ts) 获得 generate_signal 的第二个参数,
+未提供时为 None (策略按自身逻辑 HOLD)。
+给出 risk (risk_engine.RiskEngine) 时每个时间戳先做风控检查并同步成交; HALT 后撤销全部挂单,
+不再下单 (信号状态照常更新), 直到 risk.resume()。
+
+回放 (ReplayFeed, 本地 bar_store 或合成行情) + 模拟撮合 (SimulatedBroker):
+    python scripts/live_runtime.py --strategy-dir strategies/production --days 5
+    python scripts/live_runtime.py --strategy strategies/candidates/seed_momentum_rsi_v1.py \\
+        --data-dir data/bars --speed 60 --latency-budget-ms 100 --mode seed_momentum_rsi_v1=process
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from bar_store import NS_PER_DAY, format_timestamp
+from event_engine import ALT_SOURCES, bar_stream
+from portfolio_backtest import load_risk_params
+from profiler import LatencyHistogram
+from risk_engine import RiskEngine
+from run_backtest import LOOKBACK
+from strategy_registry import registry
+from synthetic_market import timeframe_minutes
+
+MODES = ("inline", "thread", "process")
+DEFAULT_LATENCY_BUDGET_MS = 250.0
+
+
+# ── K 线源 ──
+
+class BarFeed:
+    """K 线源接口: 异步迭代 (timestamp_ns, {symbol: bar}), 同一时间戳的 bar 一起给出"""
+
+    def __aiter__(self):
+        raise NotImplementedError
+
+
+class ReplayFeed(BarFeed):
+    """
+    按时间顺序回放本地 bar_store (无缓存时为合成行情)
+    speed 为回放倍速 (0 = 不等待); 收盘到次日开盘的间隔按一根 bar 计
+    """
+
+    def __init__(self, symbols, days=5, data_dir=None, timeframe="15Min", speed=0.0):
+        self.symbols = list(symbols)
+        self.days = days
+        self.data_dir = data_dir
+        self.timeframe = timeframe
+        self.speed = speed
+        self.bar_seconds = timeframe_minutes(timeframe) * 60
+
+    async def __aiter__(self):
+        streams = [bar_stream(s, self.days, self.data_dir, self.timeframe) for s in self.symbols]
+        batch_ts, batch = None, {}
+        for ts, _, _, symbol, bar in heapq.merge(*streams, key=lambda e: e[0]):
+            if ts != batch_ts and batch:
+                yield batch_ts, batch
+                await self._pace(ts - batch_ts)
+                batch = {}
+            batch_ts = ts
+            batch[symbol] = bar
+        if batch:
+            yield batch_ts, batch
+
+    async def _pace(self, gap_ns):
+        if self.speed > 0:
+            await asyncio.sleep(min(gap_ns / 1e9, self.bar_seconds) / self.speed)
+        else:
+            await asyncio.sleep(0)
+
+
+# ── Broker ──
+
+class Broker:
+    """下单接口; 实盘 (如 Alpaca) 实现 submit_order / cancel_all / account"""
+
+    def on_bar(self, symbol, bar):
+        """每根 bar 到达时调用 (模拟撮合用于标记价格, 实盘可忽略)"""
+
+    async def submit_order(self, order):
+        """
+        提交市价单 {"id", "strategy_id", "symbol", "side": buy|sell, "qty"}
+        返回回报 {"order_id", "status": filled|rejected, "price", "qty", "reason"?}
+        """
+        raise NotImplementedError
+
+    async def cancel_all(self):
+        """撤销全部挂单, 返回撤单数"""
+        raise NotImplementedError
+
+    async def account(self):
+        """{"cash", "equity", "positions": {symbol: qty}}"""
+        raise NotImplementedError
+
+
+class SimulatedBroker(Broker):
+    """本地模拟撮合: 按最新 bar 收盘价 ± 滑点立即成交, 可模拟下单往返延迟"""
+
+    def __init__(self, initial_capital=100000.0, slippage_bps=0.0, latency_ms=0.0):
+        self.cash = initial_capital
+        self.slippage = slippage_bps / 1e4
+        self.latency_ms = latency_ms
+        self.positions = {}
+        self.prices = {}
+        self.fills = []
+
+    def on_bar(self, symbol, bar):
+        self.prices[symbol] = bar["close"]
+
+    @property
+    def equity(self):
+        return self.cash + sum(qty * self.prices[s] for s, qty in self.positions.items())
+
+    async def submit_order(self, order):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1e3)
+        symbol, qty = order["symbol"], order["qty"]
+        sign = 1 if order["side"] == "buy" else -1
+        price = round(self.prices[symbol] * (1 + sign * self.slippage), 4)
+        held = self.positions.get(symbol, 0)
+        if sign > 0 and qty * price > self.cash:
+            return {"order_id": order["id"], "status": "rejected", "reason": "insufficient cash"}
+        if sign < 0 and qty > held:
+            return {"order_id": order["id"], "status": "rejected", "reason": "insufficient position"}
+        self.cash -= sign * qty * price
+        if held + sign * qty:
+            self.positions[symbol] = held + sign * qty
+        else:
+            self.positions.pop(symbol, None)
+        fill = {"order_id": order["id"], "status": "filled", "symbol": symbol, "side": order["side"],
+                "qty": qty, "price": price}
+        self.fills.append(fill)
+        return fill
+
+    async def cancel_all(self):
+        return 0  # 市价单立即成交, 没有挂单
+
+    async def account(self):
+        return {"cash": round(self.cash, 2), "equity": round(self.equity, 2),
+                "positions": dict(self.positions)}
+
+
+# ── 策略 ──
+
+def evaluate_in_worker(path, bars, alt, params, with_alt):
+    """进程池任务: 经 worker 内的注册表 (按内容缓存) 加载策略并计算信号"""
+    module = registry.get(path)
+    return module.generate_signal(bars, alt, params) if with_alt \
+        else module.generate_signal(bars, params=params)
+
+
+def _warm_worker(snapshot):
+    registry.warm_from(snapshot)
+
+
+class StrategySlot:
+    """运行时中的一个策略: 模块 + 执行方式 + 各标的信号状态与持仓 + 统计"""
+
+    def __init__(self, path, module, symbols, mode=None):
+        self.path = path
+        self.module = module
+        self.meta = module.STRATEGY_META
+        self.id = self.meta["id"]
+        self.params = self.meta["params"]
+        self.symbols = list(symbols)
+        self.sources = [s for s in self.meta["signal_sources"] if s in ALT_SOURCES]
+        create_state = getattr(module, "create_signal_state", None)
+        if mode is None:
+            mode = "inline" if create_state is not None else "thread"
+        if mode not in MODES:
+            raise ValueError(f"未知执行方式: {mode} (可选 {', '.join(MODES)})")
+        self.mode = mode
+        self.states = {s: create_state(self.params) for s in self.symbols} \
+            if create_state is not None and mode == "inline" else None
+        self.positions = {}  # symbol → (qty, entry_price)
+        self.retired = False
+        self.latency = LatencyHistogram()
+        self.stats = {"signals": 0, "orders": 0, "dropped": 0, "errors": 0}
+
+    def signal(self, symbol, bars, alt):
+        """同步计算信号 (inline / thread); 增量状态 (仅 inline) 只需要最新一根 bar"""
+        if self.states is not None:
+            state = self.states[symbol]
+            return state.update(bars[-1], alt) if self.sources else state.update(bars[-1])
+        return self.module.generate_signal(bars, alt, self.params) if self.sources \
+            else self.module.generate_signal(bars, params=self.params)
+
+    def to_dict(self):
+        return {"path": self.path, "mode": self.mode, "symbols": len(self.symbols),
+                "retired": self.retired, "positions": {s: q for s, (q, _) in self.positions.items()},
+                **self.stats, "signal_latency": {k: v for k, v in self.latency.to_dict().items()
+                                                 if k != "histogram"}}
+
+
+# ── 运行时 ──
+
+class LiveRuntime:
+    """把 K 线并发分发给多个策略并经 Broker 下单"""
+
+    def __init__(self, broker, strategy_paths=(), strategy_dir=None, symbols=None, modes=None,
+                 latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS, workers=None, risk_params=None,
+                 alt_provider=None, refresh_seconds=60.0, log_path=None, risk=None):
+        self.broker = broker
+        self.strategy_dir = strategy_dir
+        self.universe = list(symbols or [])
+        self.modes = dict(modes or {})
+        self.budget_ns = int(latency_budget_ms * 1e6)
+        self.limits = (risk_params or load_risk_params())["portfolio"]
+        self.alt_provider = alt_provider
+        self.risk = risk
+        self._halt_handled = False
+        if risk is not None:
+            risk.add_listener(lambda alert: self._log({"type": "risk_alert", **alert}))
+        self.refresh_seconds = refresh_seconds
+        self.log_path = Path(log_path) if log_path else None
+
+        self.threads = ThreadPoolExecutor(workers)
+        self._workers = workers
+        self._processes = None
+        self.slots = {}            # 策略路径 → StrategySlot
+        self.windows = {}          # symbol → deque(LOOKBACK + 1)
+        self.bars_seen = {}
+        self.decision_latency = LatencyHistogram()
+        self.order_latency = LatencyHistogram()
+        self.events = deque(maxlen=1000)
+        self.trades = []
+        self.counts = {"timestamps": 0, "bars": 0, "orders": 0, "fills": 0, "overruns": 0,
+                       "dropped": 0, "halted_bars": 0}
+        self.rejected = {"exposure": 0, "cash_reserve": 0, "daily_trades": 0, "broker": 0}
+        self._order_seq = 0
+        self._day = None
+        self._day_trades = 0
+        self._last_refresh = None
+
+        for path in strategy_paths:
+            self._add(str(Path(path).resolve()), registry.get(path))
+        if strategy_dir is not None:
+            self.refresh()
+
+    # 策略管理
+
+    def _symbols_for(self, meta):
+        return meta["symbols"] if isinstance(meta["symbols"], list) else self.universe
+
+    def _add(self, path, module, previous=None):
+        meta = module.STRATEGY_META
+        slot = StrategySlot(path, module, self._symbols_for(meta), self.modes.get(meta["id"]))
+        if previous is not None:
+            slot.positions = previous.positions
+            slot.stats = previous.stats
+        self.slots[path] = slot
+        if slot.mode == "process" and self._processes is None:
+            self._processes = ProcessPoolExecutor(self._workers, initializer=_warm_worker,
+                                                  initargs=(registry.snapshot(),))
+        return slot
+
+    def symbols(self):
+        """全部策略交易的标的 (K 线源订阅列表)"""
+        return sorted({s for slot in self.slots.values() for s in slot.symbols})
+
+    def refresh(self):
+        """按 strategy_dir 热更新策略, 返回 strategy_registry.refresh 的报告"""
+        self._last_refresh = time.monotonic()
+        report = registry.refresh(self.strategy_dir)
+        for path in report["loaded"] + report["reloaded"]:
+            self._add(path, registry.get(path), previous=self.slots.get(path))
+        for path in report["removed"]:
+            slot = self.slots.get(path)
+            if slot is not None and slot.positions:
+                slot.retired = True
+            else:
+                self.slots.pop(path, None)
+        for path, message in report["errors"].items():
+            self._log({"type": "strategy_error", "path": path, "message": message})
+        if any(report[k] for k in ("loaded", "reloaded", "removed")):
+            self._log({"type": "refresh", **{k: report[k] for k in ("loaded", "reloaded", "removed")}})
+        return report
+
+    # 事件
+
+    def _log(self, event):
+        self.events.append(event)
+        if self.log_path is not None:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def _overrun(self, kind, ts, elapsed_ns, **fields):
+        self.counts["overruns"] += 1
+        self._log({"type": "overrun", "kind": kind, "bar_time": format_timestamp(ts),
+                   "latency_ms": round(elapsed_ns / 1e6, 3),
+                   "budget_ms": round(self.budget_ns / 1e6, 3), **fields})
+
+    # 每个时间戳
+
+    async def _evaluate(self, slot, symbol, ts):
+        """计算单个 (策略, 标的) 的信号; 预热期或出错时返回 None"""
+        warm = self.bars_seen[symbol] > LOOKBACK
+        if slot.states is None and not warm:
+            return None
+        window = list(self.windows[symbol])
+        alt = self.alt_provider(slot.meta, symbol, ts) if slot.sources and self.alt_provider else None
+        start = time.perf_counter_ns()
+        try:
+            if slot.mode == "inline":
+                signal = slot.signal(symbol, window, alt)
+            elif slot.mode == "thread":
+                signal = await asyncio.get_running_loop().run_in_executor(
+                    self.threads, slot.signal, symbol, window, alt)
+            else:
+                signal = await asyncio.get_running_loop().run_in_executor(
+                    self._processes, evaluate_in_worker, slot.path, window, alt, slot.params,
+                    bool(slot.sources))
+        except Exception as e:  # 单个策略异常不影响其他策略
+            slot.stats["errors"] += 1
+            self._log({"type": "strategy_error", "strategy_id": slot.id, "symbol": symbol,
+                       "bar_time": format_timestamp(ts), "message": f"{type(e).__name__}: {e}"})
+            return None
+        slot.latency.record(time.perf_counter_ns() - start)
+        slot.stats["signals"] += 1
+        return signal if warm else None
+
+    def _orders(self, ts, bars, decisions, account):
+        """信号 → 订单 (组合限制与 portfolio_backtest.run_ledger 一致)"""
+        limits = self.limits
+        min_conf = max(0.5, limits.get("min_signal_confidence", 0.5))
+        max_exposure = limits.get("max_total_exposure", 1.0)
+        cash_reserve = limits.get("cash_reserve", 0.0)
+        max_daily_trades = limits.get("max_daily_trades", float("inf"))
+        if ts // NS_PER_DAY != self._day:
+            self._day, self._day_trades = ts // NS_PER_DAY, 0
+        equity, cash = account["equity"], account["cash"]
+        market_value = equity - cash
+        orders = []
+
+        def order(slot, symbol, side, qty, reason):
+            self._order_seq += 1
+            self._day_trades += 1
+            orders.append({"id": f"o{self._order_seq}", "strategy_id": slot.id, "symbol": symbol,
+                           "side": side, "qty": qty, "reason": reason,
+                           "bar_time": format_timestamp(ts), "_slot": slot})
+
+        for slot in self.slots.values():
+            if slot.retired:
+                for symbol, (qty, _) in slot.positions.items():
+                    if symbol in bars:
+                        order(slot, symbol, "sell", qty, "strategy removed")
+
+        for slot, symbol, signal in decisions:
+            price = bars[symbol]["close"]
+            position = slot.positions.get(symbol)
+            if position is not None:
+                pnl_pct = (price - position[1]) / position[1]
+                if signal["action"] == "SELL" or pnl_pct <= slot.params["stop_loss_pct"] \
+                        or pnl_pct >= slot.params["take_profit_pct"]:
+                    order(slot, symbol, "sell", position[0], signal.get("reason", "exit"))
+                continue
+            if signal["action"] != "BUY" or signal["confidence"] < min_conf:
+                continue
+            pct = min(slot.params["max_position_pct"], limits.get("max_single_position", 1.0),
+                      limits.get("max_single_asset", 1.0))
+            qty = int(equity * pct / price)
+            cost = qty * price
+            if qty <= 0:
+                continue
+            if self._day_trades >= max_daily_trades:
+                self.rejected["daily_trades"] += 1
+            elif market_value + cost > equity * max_exposure:
+                self.rejected["exposure"] += 1
+            elif cash - cost < equity * cash_reserve:
+                self.rejected["cash_reserve"] += 1
+            else:
+                cash -= cost
+                market_value += cost
+                order(slot, symbol, "buy", qty, signal.get("reason", ""))
+        return orders
+
+    async def _submit(self, order, ts, received_ns):
+        slot = order.pop("_slot")
+        fill = await self.broker.submit_order(order)
+        elapsed = time.perf_counter_ns() - received_ns
+        self.order_latency.record(elapsed)
+        self.counts["orders"] += 1
+        slot.stats["orders"] += 1
+        if elapsed > self.budget_ns:
+            self._overrun("order", ts, elapsed, strategy_id=slot.id, symbol=order["symbol"])
+        if fill.get("status") != "filled":
+            self.rejected["broker"] += 1
+            self._log({"type": "order_rejected", **order, "reason": fill.get("reason")})
+            return fill
+        self.counts["fills"] += 1
+        symbol, qty, price = order["symbol"], fill["qty"], fill["price"]
+        if self.risk is not None:
+            self.risk.on_fill(slot.id, symbol, qty if order["side"] == "buy" else -qty, price)
+        if order["side"] == "buy":
+            slot.positions[symbol] = (qty, price)
+        else:
+            _, entry = slot.positions.pop(symbol)
+            if slot.retired and not slot.positions:
+                self.slots.pop(slot.path, None)
+            self.trades.append({"strategy_id": slot.id, "symbol": symbol, "entry": entry, "exit": price,
+                                "qty": qty, "pnl": round(qty * (price - entry), 2),
+                                "pnl_pct": round((price - entry) / entry, 4),
+                                "exit_time": format_timestamp(ts)})
+        self._log({"type": "fill", **order, "price": price,
+                   "latency_ms": round(elapsed / 1e6, 3)})
+        return fill
+
+    async def on_bars(self, ts, bars):
+        """处理一个时间戳的全部 bar: 并发算信号 → 组合限制 → 并发下单"""
+        received = time.perf_counter_ns()
+        self.counts["timestamps"] += 1
+        self.counts["bars"] += len(bars)
+        for symbol, bar in bars.items():
+            if symbol not in self.windows:
+                self.windows[symbol] = deque(maxlen=LOOKBACK + 1)
+                self.bars_seen[symbol] = 0
+            self.windows[symbol].append(bar)
+            self.bars_seen[symbol] += 1
+            self.broker.on_bar(symbol, bar)
+        if self.risk is not None:
+            self.risk.on_bar(ts, {symbol: bar["close"] for symbol, bar in bars.items()})
+
+        tasks = {}
+        for slot in self.slots.values():
+            if slot.retired:
+                continue
+            for symbol in slot.symbols:
+                if symbol in bars:
+                    tasks[asyncio.ensure_future(self._evaluate(slot, symbol, ts))] = (slot, symbol)
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.budget_ns / 1e9)
+        for task in pending:
+            task.cancel()
+            slot, symbol = tasks[task]
+            slot.stats["dropped"] += 1
+            self.counts["dropped"] += 1
+            self._overrun("signal", ts, time.perf_counter_ns() - received,
+                          strategy_id=slot.id, symbol=symbol)
+        decisions = [(slot, symbol, task.result()) for task, (slot, symbol) in tasks.items()
+                     if task not in pending and task.result() is not None]
+        self.decision_latency.record(time.perf_counter_ns() - received)
+
+        if self.risk is not None and self.risk.halted:
+            self.counts["halted_bars"] += 1
+            if not self._halt_handled:
+                self._halt_handled = True
+                self._log({"type": "halt", "bar_time": format_timestamp(ts),
+                           "cancelled": await self.broker.cancel_all()})
+            return
+        self._halt_handled = False
+        orders = self._orders(ts, bars, decisions, await self.broker.account())
+        if orders:
+            await asyncio.gather(*(self._submit(order, ts, received) for order in orders))
+
+    async def run(self, feed):
+        """消费 K 线源直到结束, 返回报告"""
+        try:
+            async for ts, bars in feed:
+                if self.strategy_dir is not None and \
+                        time.monotonic() - self._last_refresh >= self.refresh_seconds:
+                    self.refresh()
+                await self.on_bars(ts, bars)
+            return {**self.report(), "account": await self.broker.account()}
+        finally:
+            self.close()
+
+    def report(self):
+        return {
+            "latency_budget_ms": self.budget_ns / 1e6,
+            **self.counts,
+            "rejected": self.rejected,
+            "bar_to_decision": self.decision_latency.to_dict(),
+            "bar_to_order": self.order_latency.to_dict(),
+            "trades": len(self.trades),
+            "realized_pnl": round(sum(t["pnl"] for t in self.trades), 2),
+            "strategies": {slot.id: slot.to_dict() for slot in self.slots.values()},
+            "recent_overruns": [e for e in self.events if e["type"] == "overrun"][-20:],
+            "risk": self.risk.status() if self.risk is not None else None,
+        }
+
+    def close(self):
+        self.threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_modes(specs):
+    """["id=process", ...] → {id: mode}"""
+    modes = {}
+    for spec in specs or []:
+        strategy_id, _, mode = spec.partition("=")
+        if mode not in MODES:
+            raise ValueError(f"执行方式应为 id={'|'.join(MODES)}: {spec}")
+        modes[strategy_id] = mode
+    return modes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio Live Trading Runtime (replay + simulated broker)")
+    parser.add_argument("--strategy", action="append", default=[], help="Strategy file (repeatable)")
+    parser.add_argument("--strategy-dir", default=None,
+                        help="Hot-reloaded strategy directory (e.g. strategies/production)")
+    parser.add_argument("--symbols", default=None, help="Comma-separated universe for symbols=\"dynamic\"")
+    parser.add_argument("--mode", action="append", default=[],
+                        help="Execution mode per strategy: <strategy_id>=inline|thread|process")
+    parser.add_argument("--workers", type=int, default=None, help="Thread/process pool size")
+    parser.add_argument("--latency-budget-ms", type=float, default=DEFAULT_LATENCY_BUDGET_MS)
+    parser.add_argument("--refresh-seconds", type=float, default=60.0)
+    parser.add_argument("--days", type=int, default=5, help="Replay length")
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); synthetic bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed multiple (0 = no waiting)")
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--broker-latency-ms", type=float, default=0.0,
+                        help="Simulated order round-trip latency")
+    parser.add_argument("--risk", action="store_true",
+                        help="Run the Guardian risk engine each bar (HALT stops new orders)")
+    parser.add_argument("--log", default=None, help="Append fills/overruns/reloads as JSONL")
+    parser.add_argument("--output", default=None, help="Output JSON path")
+    parser.add_argument("--fail-on-overrun", action="store_true",
+                        help="Exit non-zero when any bar-to-order latency exceeded the budget")
+    args = parser.parse_args()
+    if not args.strategy and not args.strategy_dir:
+        parser.error("--strategy or --strategy-dir is required")
+
+    broker = SimulatedBroker(args.capital, args.slippage_bps, args.broker_latency_ms)
+    runtime = LiveRuntime(broker, args.strategy, args.strategy_dir,
+                          args.symbols.split(",") if args.symbols else None, parse_modes(args.mode),
+                          args.latency_budget_ms, args.workers, refresh_seconds=args.refresh_seconds,
+                          log_path=args.log, risk=RiskEngine(equity=args.capital) if args.risk else None)
+    if not runtime.symbols():
+        parser.error("no symbols to trade (dynamic strategies need --symbols)")
+    feed = ReplayFeed(runtime.symbols(), args.days, args.data_dir, args.timeframe, args.speed)
+    result = {**asyncio.run(runtime.run(feed)), "timestamp": datetime.utcnow().isoformat() + "Z"}
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 1 if args.fail_on_overrun and result["overruns"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
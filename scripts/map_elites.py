@@ -0,0 +1,403 @@
+"""
+MAP-Elites 特征图存档
+evo/feature_map.json 只保存维度定义与统计 (小 JSON 头), 精英存放在同目录的
+二进制追加日志 evo/feature_map.bin 中, 每条记录定长:
+
+    cell uint32 | generation uint32 | value float64 | timestamp int64 | kind uint8 | strategy_id 47B
+
+kind=0 为精英 (value=fitness), kind=1 为好奇度更新 (value=curiosity)。
+只有更优精英和好奇度变化才追加记录; 加载时重放日志, 日志明显膨胀时压缩重写。
+
+内存中维护 cell → 槽位的稀疏索引, insert-if-better 为 O(1), 统计量增量维护,
+均匀采样 O(1), 好奇度加权采样 O(log n) (Fenwick 树)。
+
+用法:
+    python scripts/map_elites.py stats
+    python scripts/map_elites.py insert --strategy-id hyp_x --fitness 1.45 \\
+        --holding-minutes 120 --sharpe 1.45 --max-dd 0.08 --win-rate 0.57 \\
+        --asset-class equity --archetype momentum
+    python scripts/map_elites.py sample --n 3 --mode curiosity
+    python scripts/map_elites.py compact
+"""
+import argparse
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_HEADER = Path(__file__).resolve().parent.parent / "evo" / "feature_map.json"
+RECORD = struct.Struct("<IIdqB47s")
+KIND_ELITE = 0
+KIND_CURIOSITY = 1
+# 维度顺序即坐标顺序 (与 schemas.md 中 feature_map_cell 一致)
+DIMENSION_ORDER = ["holding_period", "sharpe_ratio", "max_drawdown", "win_rate", "asset_class", "archetype"]
+CURIOSITY_REWARD = 1.0
+CURIOSITY_PENALTY = -0.5
+
+
+class _SumTree:
+    """Fenwick 树: 前缀和与按权重采样均为 O(log n)"""
+
+    def __init__(self):
+        self.tree = [0.0]
+        self.values = []
+
+    def append(self, value):
+        self.values.append(0.0)
+        self.tree.append(0.0)
+        # 新节点 i 覆盖 (i - lowbit(i), i], 先汇总已有子区间
+        i = len(self.values)
+        j = i - 1
+        low = i - (i & -i)
+        while j > low:
+            self.tree[i] += self.tree[j]
+            j -= j & -j
+        self.set(i - 1, value)
+
+    def set(self, index, value):
+        delta = value - self.values[index]
+        self.values[index] = value
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        i, s = len(self.values), 0.0
+        while i > 0:
+            s += self.tree[i]
+            i -= i & -i
+        return s
+
+    def find(self, target):
+        """返回前缀和首次超过 target 的下标"""
+        pos, step = 0, 1 << len(self.values).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self.tree) and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return min(pos, len(self.values) - 1)
+
+
+class FeatureMapArchive:
+    """稀疏 MAP-Elites 存档"""
+
+    def __init__(self, header_path=DEFAULT_HEADER):
+        self.header_path = Path(header_path)
+        with open(self.header_path) as f:
+            self.header = json.load(f)
+        self.dimensions = self.header["dimensions"]
+        self.shape = [
+            len(self.dimensions[d]["values"]) if "values" in self.dimensions[d] else self.dimensions[d]["bins"]
+            for d in DIMENSION_ORDER
+        ]
+        self.total_cells = math.prod(self.shape)
+        archive = self.header.get("archive", {})
+        self.bin_path = self.header_path.with_name(archive.get("file", self.header_path.stem + ".bin"))
+        self.generation = self.header.get("stats", {}).get("total_generations", 0)
+
+        # 槽位数组 (按首次占据顺序), cell → 槽位
+        self.slot_of = {}
+        self.cells = []
+        self.fitness = []
+        self.strategy_ids = []
+        self.generations = []
+        self.curiosity = _SumTree()
+        self.fitness_sum = 0.0
+        self.best_fitness = None
+        self.records = 0
+
+        self._replay()
+        legacy = self.header.get("cells")
+        if legacy:
+            self._migrate(legacy)
+
+    # ---- 坐标 ----
+
+    def cell_index(self, coords):
+        """坐标 → 扁平下标 (行主序)"""
+        index = 0
+        for c, n in zip(coords, self.shape):
+            if not 0 <= c < n:
+                raise ValueError(f"坐标越界: {coords}")
+            index = index * n + c
+        return index
+
+    def coords(self, index):
+        """扁平下标 → 坐标"""
+        out = []
+        for n in reversed(self.shape):
+            index, c = divmod(index, n)
+            out.append(c)
+        return out[::-1]
+
+    def descriptor_to_coords(self, holding_minutes, sharpe, max_drawdown, win_rate, asset_class, archetype):
+        """把策略行为描述映射到格子坐标 (持仓周期按对数分箱, 其余线性分箱)"""
+        d = self.dimensions
+
+        def linear(value, spec, lo_key="min", hi_key="max"):
+            lo, hi = spec[lo_key], spec[hi_key]
+            return min(max(int((value - lo) / (hi - lo) * spec["bins"]), 0), spec["bins"] - 1)
+
+        hp = d["holding_period"]
+        span = math.log(hp["max_minutes"] / hp["min_minutes"])
+        hp_bin = int(math.log(max(holding_minutes, hp["min_minutes"]) / hp["min_minutes"]) / span * hp["bins"])
+        return [
+            min(max(hp_bin, 0), hp["bins"] - 1),
+            linear(sharpe, d["sharpe_ratio"]),
+            linear(max_drawdown, d["max_drawdown"]),
+            linear(win_rate, d["win_rate"]),
+            d["asset_class"]["values"].index(asset_class),
+            d["archetype"]["values"].index(archetype),
+        ]
+
+    # ---- 读写 ----
+
+    def _replay(self):
+        if not self.bin_path.exists():
+            return
+        data = self.bin_path.read_bytes()
+        usable = len(data) - len(data) % RECORD.size
+        if usable != len(data):
+            # 截断写入中断留下的半条记录
+            with open(self.bin_path, "r+b") as f:
+                f.truncate(usable)
+        for cell, generation, value, _, kind, sid in RECORD.iter_unpack(data[:usable]):
+            if kind == KIND_ELITE:
+                self._apply_elite(cell, value, sid.rstrip(b"\0").decode(), generation)
+            else:
+                self._apply_curiosity(cell, value)
+            self.records += 1
+
+    def _apply_elite(self, cell, fitness, strategy_id, generation):
+        slot = self.slot_of.get(cell)
+        if slot is None:
+            slot = len(self.cells)
+            self.slot_of[cell] = slot
+            self.cells.append(cell)
+            self.fitness.append(fitness)
+            self.strategy_ids.append(strategy_id)
+            self.generations.append(generation)
+            self.curiosity.append(1.0)
+            self.fitness_sum += fitness
+        else:
+            self.fitness_sum += fitness - self.fitness[slot]
+            self.fitness[slot] = fitness
+            self.strategy_ids[slot] = strategy_id
+            self.generations[slot] = generation
+        if self.best_fitness is None or fitness > self.best_fitness:
+            self.best_fitness = fitness
+
+    def _apply_curiosity(self, cell, value):
+        slot = self.slot_of.get(cell)
+        if slot is not None:
+            self.curiosity.set(slot, max(value, 0.0) + 1.0)
+
+    def _append(self, records):
+        with open(self.bin_path, "ab") as f:
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += len(records)
+
+    def _pack(self, kind, cell, value, strategy_id="", generation=0):
+        return RECORD.pack(cell, generation, value, int(time.time()), kind,
+                           strategy_id.encode()[:47].decode("utf-8", "ignore").encode())
+
+    def _migrate(self, cells):
+        """把旧版 JSON cells 字典 ({"i,j,k,l,m,n": {...}}) 迁入二进制存档"""
+        for key, elite in cells.items():
+            coords = [int(c) for c in str(key).strip("[]()").split(",")]
+            self.insert(coords, elite["fitness"], elite.get("strategy_id", ""), elite.get("generation"))
+        self.header.pop("cells", None)
+        self.save_header()
+
+    def insert(self, coords, fitness, strategy_id, generation=None):
+        """
+        insert-if-better: 空格子或更优时写入并追加一条记录
+        coords 可为坐标列表或扁平下标; 返回是否写入
+        """
+        cell = coords if isinstance(coords, int) else self.cell_index(coords)
+        slot = self.slot_of.get(cell)
+        if slot is not None and fitness <= self.fitness[slot]:
+            return False
+        generation = self.generation if generation is None else generation
+        self._apply_elite(cell, fitness, strategy_id, generation)
+        self._append([self._pack(KIND_ELITE, cell, fitness, strategy_id, generation)])
+        return True
+
+    def get(self, coords):
+        cell = coords if isinstance(coords, int) else self.cell_index(coords)
+        slot = self.slot_of.get(cell)
+        if slot is None:
+            return None
+        return self._elite(slot)
+
+    def _elite(self, slot):
+        return {
+            "cell": self.coords(self.cells[slot]),
+            "strategy_id": self.strategy_ids[slot],
+            "fitness": self.fitness[slot],
+            "generation": self.generations[slot],
+            "curiosity": self.curiosity.values[slot] - 1.0,
+        }
+
+    def elites(self):
+        return [self._elite(slot) for slot in range(len(self.cells))]
+
+    # ---- 父代采样 ----
+
+    def sample_parents(self, n=1, mode="uniform", rng=None):
+        """
+        采样父代精英
+        mode="uniform": 在已占据格子中均匀采样
+        mode="curiosity": 按好奇度 (后代被接收 +1, 被拒绝 -0.5, 下限 0) + 1 加权
+        """
+        if not self.cells:
+            return []
+        rng = rng or random
+        if mode == "uniform":
+            slots = [rng.randrange(len(self.cells)) for _ in range(n)]
+        elif mode == "curiosity":
+            total = self.curiosity.total()
+            slots = [self.curiosity.find(rng.random() * total) for _ in range(n)]
+        else:
+            raise ValueError(f"未知采样模式: {mode}")
+        return [self._elite(slot) for slot in slots]
+
+    def record_offspring(self, parent_coords, accepted):
+        """根据后代是否进入存档更新父代好奇度"""
+        cell = parent_coords if isinstance(parent_coords, int) else self.cell_index(parent_coords)
+        slot = self.slot_of.get(cell)
+        if slot is None:
+            return
+        score = self.curiosity.values[slot] - 1.0
+        score = max(score + (CURIOSITY_REWARD if accepted else CURIOSITY_PENALTY), 0.0)
+        self._apply_curiosity(cell, score)
+        self._append([self._pack(KIND_CURIOSITY, cell, score)])
+
+    # ---- 统计与持久化 ----
+
+    @property
+    def stats(self):
+        occupied = len(self.cells)
+        return {
+            "total_cells": self.total_cells,
+            "occupied_cells": occupied,
+            "coverage_pct": round(occupied / self.total_cells * 100, 6),
+            "avg_fitness": round(self.fitness_sum / occupied, 6) if occupied else 0.0,
+            "best_fitness": round(self.best_fitness, 6) if self.best_fitness is not None else 0.0,
+            "total_generations": self.generation,
+        }
+
+    def next_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def save_header(self):
+        """原子写入 JSON 头 (维度 + 统计)"""
+        self.header["updated_at"] = datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+        self.header["archive"] = {
+            "file": self.bin_path.name,
+            "record_format": RECORD.format,
+            "record_size": RECORD.size,
+            "records": self.records,
+        }
+        self.header["stats"] = self.stats
+        # 维度定义每项一行, 与仓库中手写的格式保持一致
+        dims = ",\n".join(f"    {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}"
+                           for k, v in self.dimensions.items())
+        body = json.dumps({**self.header, "dimensions": "__DIMS__"}, indent=2, ensure_ascii=False)
+        body = body.replace('"__DIMS__"', "{\n" + dims + "\n  }")
+        tmp = self.header_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            f.write(body + "\n")
+        os.replace(tmp, self.header_path)
+
+    def compact(self):
+        """重写日志: 每个格子保留一条精英记录 + 一条非零好奇度记录"""
+        records = []
+        for slot, cell in enumerate(self.cells):
+            records.append(self._pack(KIND_ELITE, cell, self.fitness[slot],
+                                      self.strategy_ids[slot], self.generations[slot]))
+            score = self.curiosity.values[slot] - 1.0
+            if score:
+                records.append(self._pack(KIND_CURIOSITY, cell, score))
+        tmp = self.bin_path.with_suffix(".bin.tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.bin_path)
+        self.records = len(records)
+
+    def commit(self, compact_ratio=4.0):
+        """收尾: 日志膨胀超过 compact_ratio 倍时压缩, 然后写 JSON 头"""
+        if self.records > compact_ratio * max(len(self.cells), 1) * 2:
+            self.compact()
+        self.save_header()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MAP-Elites Feature Map Archive")
+    parser.add_argument("--header", default=str(DEFAULT_HEADER), help="Feature map JSON header path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats", help="Show archive statistics")
+
+    p_insert = sub.add_parser("insert", help="Insert an elite if it beats the cell's incumbent")
+    p_insert.add_argument("--strategy-id", required=True)
+    p_insert.add_argument("--fitness", type=float, required=True)
+    p_insert.add_argument("--cell", default=None, help="Comma-separated coordinates")
+    p_insert.add_argument("--holding-minutes", type=float)
+    p_insert.add_argument("--sharpe", type=float)
+    p_insert.add_argument("--max-dd", type=float)
+    p_insert.add_argument("--win-rate", type=float)
+    p_insert.add_argument("--asset-class")
+    p_insert.add_argument("--archetype")
+    p_insert.add_argument("--parent-cell", default=None,
+                          help="Parent coordinates; updates parent curiosity")
+
+    p_sample = sub.add_parser("sample", help="Sample parent elites")
+    p_sample.add_argument("--n", type=int, default=1)
+    p_sample.add_argument("--mode", choices=["uniform", "curiosity"], default="uniform")
+    p_sample.add_argument("--seed", type=int, default=None)
+
+    sub.add_parser("compact", help="Rewrite the log with one record per cell")
+    args = parser.parse_args()
+
+    archive = FeatureMapArchive(args.header)
+    if args.command == "stats":
+        result = archive.stats
+    elif args.command == "insert":
+        if args.cell:
+            coords = [int(c) for c in args.cell.split(",")]
+        else:
+            coords = archive.descriptor_to_coords(args.holding_minutes, args.sharpe, args.max_dd,
+                                                  args.win_rate, args.asset_class, args.archetype)
+        archive.next_generation()
+        inserted = archive.insert(coords, args.fitness, args.strategy_id)
+        if args.parent_cell:
+            archive.record_offspring([int(c) for c in args.parent_cell.split(",")], inserted)
+        archive.commit()
+        result = {"feature_map_cell": coords, "feature_map_updated": inserted, "stats": archive.stats}
+    elif args.command == "sample":
+        rng = random.Random(args.seed) if args.seed is not None else None
+        result = archive.sample_parents(args.n, args.mode, rng)
+    else:
+        archive.compact()
+        archive.save_header()
+        result = archive.stats
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+绩效指标
+基于 NumPy 数组一次性计算回测/实盘绩效与风险统计, 供回测运行器、Evolver 与 CI 复用。
+年化因子由实际 bar 频率推断 (美股常规交易时段 390 分钟/天, 252 天/年)。
+
+VaR95 以正数表示损失比例, 与 config/risk-params.json 中 var95_* 阈值同号:
+- var95_historical / var95_parametric: 单个 bar 周期
+- var95_daily: 参数法按 sqrt(每日 bar 数) 放大到一个交易日 (Guardian 使用)
+"""
+import numpy as np
+
+TRADING_DAYS = 252
+SESSION_MINUTES = 390
+Z_95 = 1.6448536269514722
+NS_PER_MINUTE = 60 * 10**9
+
+
+def infer_periods_per_year(timestamps, default=TRADING_DAYS * SESSION_MINUTES // 15):
+    """
+    由 int64 纳秒时间戳的中位间隔推断每年 bar 数
+    日内: 252 * (390 / 间隔分钟); 日线及以上: 252 / 间隔天数 (自然日按 7/5 折算交易日)
+    """
+    if timestamps is None or len(timestamps) < 2:
+        return default
+    spacing = float(np.median(np.diff(np.asarray(timestamps, dtype=np.int64)))) / NS_PER_MINUTE
+    if spacing <= 0:
+        return default
+    if spacing < SESSION_MINUTES:
+        return TRADING_DAYS * SESSION_MINUTES / spacing
+    calendar_days = spacing / 1440
+    return TRADING_DAYS / max(calendar_days * 5 / 7, 1.0)
+
+
+def drawdown_stats(equity):
+    """返回 (最大回撤, 最长水下持续 bar 数)"""
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    index = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(equity >= peak, index, 0))
+    return float(dd.max()) if len(dd) else 0.0, int((index - last_peak).max()) if len(index) else 0
+
+
+def trade_stats(trades):
+    """成交统计: 胜率 / 盈亏比 / 平均收益率 / 成交额"""
+    if not trades:
+        return {"total_trades": 0, "win_rate": 0, "profit_factor": 0, "avg_pnl_pct": 0.0}, 0.0
+    pnl = np.fromiter((t["pnl"] for t in trades), dtype=np.float64, count=len(trades))
+    pnl_pct = np.fromiter((t["pnl_pct"] for t in trades), dtype=np.float64, count=len(trades))
+    notional = sum(t.get("qty", 0) * (t["entry"] + t["exit"]) for t in trades)
+    gross_win = pnl[pnl > 0].sum()
+    gross_loss = -pnl[pnl < 0].sum()
+    return {
+        "total_trades": len(trades),
+        "win_rate": round(float((pnl > 0).mean()), 2),
+        "profit_factor": round(float(gross_win / gross_loss), 2) if gross_loss > 0 else 999,
+        "avg_pnl_pct": round(float(pnl_pct.mean()), 4),
+    }, float(notional)
+
+
+def compute_metrics(equity_curve, trades=None, exposure_curve=None, periods_per_year=None,
+                    initial_capital=None):
+    """
+    计算绩效指标
+
+    Args:
+        equity_curve: 权益序列 (首个元素为初始资金)
+        trades: 成交记录 (含 entry/exit/pnl/pnl_pct, 可选 qty)
+        exposure_curve: 与 equity_curve[1:] 对齐的持仓市值序列
+        periods_per_year: 每年 bar 数 (默认按 15 分钟 bar)
+        initial_capital: 初始资金 (默认 equity_curve[0])
+    """
+    equity = np.asarray(equity_curve, dtype=np.float64)
+    if periods_per_year is None:
+        periods_per_year = TRADING_DAYS * SESSION_MINUTES / 15
+    if initial_capital is None:
+        initial_capital = float(equity[0])
+
+    prev = equity[:-1]
+    valid = prev > 0
+    returns = (equity[1:][valid] - prev[valid]) / prev[valid]
+    n = len(returns)
+    mean = float(returns.mean()) if n else 0.0
+    std = float(returns.std()) if n else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))) if n else 0.0
+    ann = np.sqrt(periods_per_year)
+
+    total_return = (float(equity[-1]) - initial_capital) / initial_capital
+    # 对数空间年化, 短样本高收益外推溢出时记为 None
+    if n and equity[-1] > 0:
+        with np.errstate(over="ignore"):
+            ann_return = float(np.expm1(np.log(float(equity[-1]) / initial_capital) * periods_per_year / n))
+        if not np.isfinite(ann_return):
+            ann_return = None
+    else:
+        ann_return = 0.0
+    max_dd, dd_bars = drawdown_stats(equity)
+    bars_per_day = periods_per_year / TRADING_DAYS
+
+    stats, notional = trade_stats(trades or [])
+    mean_equity = float(equity.mean())
+    if exposure_curve is not None and len(exposure_curve):
+        exposure = float(np.mean(np.asarray(exposure_curve, dtype=np.float64) / equity[1:]))
+    else:
+        exposure = 0.0
+
+    return {
+        "final_value": round(float(equity[-1]), 2),
+        "total_return": round(total_return, 4),
+        "annualized_return": round(ann_return, 4) if ann_return is not None else None,
+        "sharpe_ratio": round(mean / std * ann, 2) if std > 0 else 0,
+        "sortino_ratio": round(mean / downside * ann, 2) if downside > 0 else 0,
+        "calmar_ratio": round(ann_return / max_dd, 2) if max_dd > 0 and ann_return is not None else 0,
+        "max_drawdown": round(max_dd, 4),
+        "max_drawdown_duration_bars": dd_bars,
+        "var95_historical": round(float(-np.percentile(returns, 5)), 6) if n else 0.0,
+        "var95_parametric": round(-(mean - Z_95 * std), 6),
+        "var95_daily": round(-(mean * bars_per_day - Z_95 * std * np.sqrt(bars_per_day)), 6),
+        **stats,
+        "turnover": round(notional / mean_equity, 4) if mean_equity > 0 else 0.0,
+        "exposure": round(exposure, 4),
+        "periods_per_year": round(periods_per_year, 2),
+    }
@@ -0,0 +1,315 @@
+"""
+交易绩效列式存储 (trading/metrics/daily/)
+Guardian 每日追加每个策略一行 (策略 × 日期), Evolver 反馈摄入与 Operator 报告按查询读取,
+不再逐个打开解析每日 JSON; 查询耗时只与所查区间有关, 与累计历史长度无关。
+
+目录结构:
+    index.json          小索引: 列定义, 策略编码表, 各分区行数 / 已排序行数 / 日期范围
+    <YYYY-MM>.bin       按月分区, 定长记录 (RECORD); 前 sorted 行按 (策略, 日期) 排序,
+                        之后为追加尾部; 尾部超过 max(COMPACT_MIN_ROWS, sorted) 时压缩重写
+
+同一 (策略, 日期) 重复写入时以最后一次为准 (查询与压缩时去重)。
+文件先写数据再原子替换 index.json, 中断的追加只会留下被索引忽略的尾部字节。
+
+    store = MetricsStore()
+    store.append("2026-02-23", [{"strategy_id": "strategy_a", "pnl_usd": 812.4, "pnl_pct": 0.008, "trades": 15}])
+    store.strategy("strategy_a", days=30)     # {"date": datetime64[D], "pnl_pct": ..., ...}
+    store.on_date("2026-02-23")               # {"strategy_id": [...], "pnl_pct": ..., ...}
+
+用法:
+    python scripts/metrics_store.py ingest trading/metrics/daily/*.json   # DAILY_TRADING_REPORT
+    python scripts/metrics_store.py strategy strategy_a --days 30
+    python scripts/metrics_store.py date 2026-02-23
+    python scripts/metrics_store.py compact
+    python scripts/metrics_store.py info
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date as date_type
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / "trading" / "metrics" / "daily"
+RECORD = np.dtype([
+    ("date", "<i4"),        # 自 1970-01-01 起的天数
+    ("strategy", "<i4"),    # index.json strategies 中的编码
+    ("stage", "i1"),        # 0=production, 1=staging
+    ("trades", "<i4"),
+    ("wins", "<i4"),
+    ("losses", "<i4"),
+    ("pnl_usd", "<f8"),
+    ("pnl_pct", "<f8"),
+    ("equity", "<f8"),      # 策略资金 + 累计盈亏 (收盘)
+    ("exposure", "<f8"),    # 收盘总敞口 / 权益
+    ("drawdown", "<f8"),    # 相对峰值的回撤 (负数)
+])
+VALUE_COLUMNS = [name for name in RECORD.names if name not in ("date", "strategy")]
+STAGES = {"production": 0, "staging": 1}
+COMPACT_MIN_ROWS = 256
+INDEX_VERSION = 1
+
+
+def to_day(value):
+    """"YYYY-MM-DD" / ISO 时间 / date / 天数 → 自 1970-01-01 起的天数"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (datetime, date_type)):
+        value = value.isoformat()
+    return int(np.datetime64(str(value)[:10], "D").astype(np.int64))
+
+
+def _dedupe(rows):
+    """按 (策略, 日期) 稳定排序, 同键保留最后写入的一行"""
+    order = np.lexsort((rows["date"], rows["strategy"]))
+    rows = rows[order]
+    if len(rows) < 2:
+        return rows
+    key = rows["strategy"].astype(np.int64) << 32 | (rows["date"].astype(np.int64) & 0xFFFFFFFF)
+    last = np.append(key[1:] != key[:-1], True)
+    return rows[last]
+
+
+class MetricsStore:
+    """按月分区的策略日度绩效列式存储"""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+        self.index = self._read_index()
+        self._codes = {sid: i for i, sid in enumerate(self.index["strategies"])}
+        self._maps = {}  # 分区 → (行数, memmap)
+
+    # 索引
+
+    def _read_index(self):
+        path = self.root / "index.json"
+        if path.exists():
+            index = json.loads(path.read_text())
+            if index.get("version") == INDEX_VERSION:
+                return index
+        return {"version": INDEX_VERSION, "columns": list(RECORD.names), "strategies": [], "partitions": {}}
+
+    def _write_index(self):
+        self.index["updated_at"] = datetime.utcnow().isoformat() + "Z"
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f"index.json.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(self.index, indent=2, ensure_ascii=False))
+        os.replace(tmp, self.root / "index.json")
+
+    def _code(self, strategy_id):
+        code = self._codes.get(strategy_id)
+        if code is None:
+            code = self._codes[strategy_id] = len(self.index["strategies"])
+            self.index["strategies"].append(strategy_id)
+        return code
+
+    def strategies(self):
+        return list(self.index["strategies"])
+
+    def _path(self, partition):
+        return self.root / f"{partition}.bin"
+
+    def _rows(self, partition):
+        """分区全部已索引行 (只读 memmap)"""
+        meta = self.index["partitions"].get(partition)
+        if meta is None or not meta["rows"]:
+            return np.empty(0, dtype=RECORD)
+        cached = self._maps.get(partition)
+        if cached is None or cached[0] != meta["rows"]:
+            cached = self._maps[partition] = (
+                meta["rows"], np.memmap(self._path(partition), dtype=RECORD, mode="r", shape=(meta["rows"],)))
+        return cached[1]
+
+    # 写入
+
+    def _to_records(self, day, rows):
+        records = np.zeros(len(rows), dtype=RECORD)
+        for name in ("pnl_usd", "pnl_pct", "equity", "exposure", "drawdown"):
+            records[name] = np.nan
+        for i, row in enumerate(rows):
+            record = records[i]
+            record["date"] = to_day(row.get("date", day))
+            record["strategy"] = self._code(row.get("strategy_id", row.get("id")))
+            record["stage"] = STAGES.get(row.get("stage", "production"), 0)
+            for name in VALUE_COLUMNS[1:]:
+                value = row.get(name)
+                if value is not None:
+                    record[name] = value
+        return records
+
+    def append(self, day, rows):
+        """追加一天 (或行内各自带 date) 的策略行, 返回写入行数"""
+        if not rows:
+            return 0
+        records = self._to_records(day, rows)
+        months = records["date"].astype("datetime64[D]").astype("datetime64[M]")
+        for month in np.unique(months):
+            part, partition = records[months == month], str(month)
+            meta = self.index["partitions"].setdefault(
+                partition, {"rows": 0, "sorted": 0, "min_date": None, "max_date": None})
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self._path(partition)
+            with open(path, "r+b" if path.exists() else "wb") as f:
+                f.seek(meta["rows"] * RECORD.itemsize)
+                f.write(part.tobytes())
+                f.truncate()
+            meta["rows"] += len(part)
+            lo, hi = int(part["date"].min()), int(part["date"].max())
+            meta["min_date"] = lo if meta["min_date"] is None else min(meta["min_date"], lo)
+            meta["max_date"] = hi if meta["max_date"] is None else max(meta["max_date"], hi)
+        self._write_index()
+        for partition, meta in list(self.index["partitions"].items()):
+            if meta["rows"] - meta["sorted"] >= max(COMPACT_MIN_ROWS, meta["sorted"]):
+                self.compact(partition)
+        return len(records)
+
+    def compact(self, partition=None):
+        """排序去重并重写分区 (默认全部有未排序尾部的分区), 返回重写的分区"""
+        partitions = [partition] if partition else [
+            p for p, meta in self.index["partitions"].items() if meta["rows"] > meta["sorted"]]
+        for name in partitions:
+            rows = _dedupe(np.array(self._rows(name)))
+            self._maps.pop(name, None)
+            path = self._path(name)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            rows.tofile(tmp)
+            os.replace(tmp, path)
+            self.index["partitions"][name].update(rows=len(rows), sorted=len(rows))
+        if partitions:
+            self._write_index()
+        return partitions
+
+    # 查询
+
+    def _partitions(self, start, end):
+        return [p for p, meta in sorted(self.index["partitions"].items())
+                if meta["rows"] and meta["max_date"] >= start and meta["min_date"] <= end]
+
+    def _select(self, start, end, code=None):
+        parts = []
+        for partition in self._partitions(start, end):
+            rows = self._rows(partition)
+            done = self.index["partitions"][partition]["sorted"]
+            head, tail = rows[:done], rows[done:]
+            if code is not None:
+                strategy = head["strategy"]
+                head = head[np.searchsorted(strategy, code, "left"):np.searchsorted(strategy, code, "right")]
+                tail = tail[tail["strategy"] == code]
+            for block in (head, tail):
+                block = block[(block["date"] >= start) & (block["date"] <= end)]
+                if len(block):
+                    parts.append(np.asarray(block))
+        rows = _dedupe(np.concatenate(parts)) if parts else np.empty(0, dtype=RECORD)
+        return rows
+
+    def _columns(self, rows):
+        columns = {"date": rows["date"].astype("datetime64[D]")}
+        columns.update({name: rows[name].copy() for name in VALUE_COLUMNS})
+        return columns
+
+    def strategy(self, strategy_id, days=None, end=None, start=None):
+        """单个策略的日度序列 (按日期升序); days 为截至 end (默认最新日期) 的自然日数"""
+        code = self._codes.get(strategy_id)
+        end = to_day(end) if end is not None else self.last_date()
+        if code is None or end is None:
+            return self._columns(np.empty(0, dtype=RECORD))
+        start = to_day(start) if start is not None else (end - days + 1 if days else -2**31)
+        rows = self._select(start, end, code)
+        return self._columns(rows[np.argsort(rows["date"], kind="stable")])
+
+    def on_date(self, day):
+        """某日全部策略 (按策略编码顺序), 额外返回 strategy_id 列"""
+        day = to_day(day)
+        rows = self._select(day, day)
+        columns = self._columns(rows)
+        ids = np.array(self.index["strategies"], dtype=object)
+        columns["strategy_id"] = ids[rows["strategy"]] if len(rows) else np.empty(0, dtype=object)
+        return columns
+
+    def range(self, start, end):
+        """区间内全部行 (按策略、日期排序), 含 strategy_id 列"""
+        rows = self._select(to_day(start), to_day(end))
+        columns = self._columns(rows)
+        ids = np.array(self.index["strategies"], dtype=object)
+        columns["strategy_id"] = ids[rows["strategy"]] if len(rows) else np.empty(0, dtype=object)
+        return columns
+
+    def last_date(self):
+        dates = [meta["max_date"] for meta in self.index["partitions"].values() if meta["rows"]]
+        return max(dates) if dates else None
+
+    def info(self):
+        return {
+            "root": str(self.root),
+            "strategies": len(self.index["strategies"]),
+            "rows": sum(meta["rows"] for meta in self.index["partitions"].values()),
+            "partitions": {p: {**meta, "min_date": str(np.datetime64(meta["min_date"], "D")) if meta["rows"] else None,
+                               "max_date": str(np.datetime64(meta["max_date"], "D")) if meta["rows"] else None}
+                           for p, meta in sorted(self.index["partitions"].items())},
+            "bytes": sum(self._path(p).stat().st_size for p in self.index["partitions"] if self._path(p).exists()),
+        }
+
+
+def report_rows(report):
+    """DAILY_TRADING_REPORT → (日期, 策略行); staging_strategies 记为 stage=staging"""
+    rows = [{**item, "strategy_id": item["id"], "stage": "production"}
+            for item in report.get("strategy_attribution", [])]
+    rows += [{"strategy_id": item["id"], "stage": "staging", "pnl_pct": item.get("pnl_pct"),
+              "trades": item.get("trades", 0)} for item in report.get("staging_strategies", [])]
+    return report["date"], rows
+
+
+def to_jsonable(columns):
+    """数组 → JSON 列表 (日期为字符串, NaN 为 null)"""
+    out = {}
+    for name, col in columns.items():
+        if col.dtype.kind == "M":
+            out[name] = col.astype(str).tolist()
+        elif col.dtype.kind == "f":
+            out[name] = [None if v != v else v for v in col.tolist()]
+        else:
+            out[name] = col.tolist()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar Daily Trading Metrics Store")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT))
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="Append DAILY_TRADING_REPORT JSON files")
+    p_ingest.add_argument("files", nargs="+")
+    p_strategy = sub.add_parser("strategy", help="One strategy over the last N days")
+    p_strategy.add_argument("strategy_id")
+    p_strategy.add_argument("--days", type=int, default=30)
+    p_strategy.add_argument("--end", default=None)
+    p_date = sub.add_parser("date", help="All strategies on one date")
+    p_date.add_argument("date")
+    sub.add_parser("compact", help="Sort, deduplicate and rewrite partitions with an unsorted tail")
+    sub.add_parser("info")
+    args = parser.parse_args()
+
+    store = MetricsStore(args.root)
+    if args.command == "ingest":
+        written = 0
+        for path in args.files:
+            if Path(path).name == "index.json":
+                continue
+            day, rows = report_rows(json.loads(Path(path).read_text()))
+            written += store.append(day, rows)
+        print(json.dumps({"rows": written, **store.info()}, indent=2, ensure_ascii=False))
+    elif args.command == "strategy":
+        print(json.dumps(to_jsonable(store.strategy(args.strategy_id, args.days, args.end)), ensure_ascii=False))
+    elif args.command == "date":
+        print(json.dumps(to_jsonable(store.on_date(args.date)), ensure_ascii=False))
+    elif args.command == "compact":
+        print(json.dumps({"compacted": store.compact()}, ensure_ascii=False))
+    else:
+        print(json.dumps(store.info(), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
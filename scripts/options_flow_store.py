@@ -0,0 +1,360 @@
+"""
+期权异动 (options flow) 列式存储与全市场筛选
+记录在写入时一次性解析为定长列 (标的编码 / 期权类型 / 到期日 / 权利金 / 成交量 / 持仓量 ...),
+到期日字符串按取值缓存解析结果; 按 (标的, 到期日) 维护排序索引, 追加时只对新增记录
+排序后归并, 适合盘中逐 bar 追加 sweep。
+
+screen() 对全部记录做一次向量化过滤 + 按标的 bincount 聚合, 输出与
+seed_options_flow_v1.analyze_options_flow 相同规则的 bullish / bearish / neutral 判定。
+规则 (异动阈值 / 成交类型 / 方向阈值) 只定义在 seed_options_flow_v1 的 STRATEGY_META["params"],
+这里按传入的 params 判定, 缺省的键取该 seed 的取值 (flow_rules)。
+
+用法:
+    python scripts/options_flow_store.py screen flow.jsonl --as-of 2026-10-16 --top 20
+    python scripts/options_flow_store.py screen flow.json --save data/options_flow.npz
+    python scripts/options_flow_store.py info data/options_flow.npz
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from bar_store import NS_PER_DAY, parse_timestamp
+from result_cache import read_strategy_meta
+
+DEFAULT_STRATEGY = Path(__file__).resolve().parent.parent / "strategies" / "candidates" / "seed_options_flow_v1.py"
+COLUMNS = {
+    "symbol": np.int32,       # self.symbols 中的编码
+    "option_type": np.int8,   # 1=call, -1=put
+    "strike": np.float64,
+    "expiry": np.int32,       # 自 1970-01-01 起的天数
+    "premium": np.float64,
+    "volume": np.int64,
+    "open_interest": np.int64,
+    "trade_type": np.int8,    # 1=sweep, 2=block, 0=其他
+    "timestamp": np.int64,    # 成交时间 (纳秒), 缺失时取写入时间
+}
+OPTION_TYPES = {"call": 1, "put": -1}
+TRADE_TYPES = {"sweep": 1, "block": 2}
+SIGNAL_NAMES = {1: "bullish", -1: "bearish", 0: "neutral"}
+RULE_KEYS = ("min_premium_usd", "min_volume_oi_ratio", "max_dte", "min_trades", "unusual_trade_types",
+             "bullish_call_ratio", "bearish_call_ratio")
+DEFAULT_RULES = {key: value for key, value in read_strategy_meta(DEFAULT_STRATEGY.read_text())["params"].items()
+                 if key in RULE_KEYS}
+
+
+def flow_rules(params=None):
+    """异动与方向判定规则: params 中缺省的键取 seed_options_flow_v1 的默认参数"""
+    return {**DEFAULT_RULES, **(params or {})}
+
+
+def _now_ns():
+    return int(datetime.now(timezone.utc).timestamp() * 10**9)
+
+
+class OptionsFlowStore:
+    """按 (标的, 到期日) 索引的期权成交列存储"""
+
+    def __init__(self, capacity=1024):
+        self.symbols = []
+        self._codes = {}
+        self._expiry_days = {}
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self._keys = np.empty(0, dtype=np.int64)   # 排序后的 (标的 << 32 | 到期日)
+        self._order = np.empty(0, dtype=np.int64)  # 对应的记录下标
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        return self._columns[name][:self._size]
+
+    def _code(self, symbol):
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def _expiry(self, value):
+        day = self._expiry_days.get(value)
+        if day is None:
+            day = self._expiry_days[value] = parse_timestamp(value) // NS_PER_DAY
+        return day
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns["symbol"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def append(self, records, timestamp=None):
+        """
+        追加成交记录 (analyze_options_flow 的 flow_data 格式, 可选 timestamp 字段)
+        timestamp 为记录缺少成交时间时使用的时间 (默认当前时间)
+        """
+        n = len(records)
+        if n == 0:
+            return 0
+        default_ts = _now_ns() if timestamp is None else parse_timestamp(timestamp)
+        self._reserve(n)
+        start, end = self._size, self._size + n
+        cols = self._columns
+        cols["symbol"][start:end] = [self._code(r["symbol"]) for r in records]
+        cols["option_type"][start:end] = [OPTION_TYPES.get(r["option_type"], 0) for r in records]
+        cols["strike"][start:end] = [r.get("strike", 0.0) for r in records]
+        cols["expiry"][start:end] = [self._expiry(r["expiry"]) for r in records]
+        cols["premium"][start:end] = [r["premium"] for r in records]
+        cols["volume"][start:end] = [r["volume"] for r in records]
+        cols["open_interest"][start:end] = [r["open_interest"] for r in records]
+        cols["trade_type"][start:end] = [TRADE_TYPES.get(r.get("trade_type"), 0) for r in records]
+        cols["timestamp"][start:end] = [parse_timestamp(r["timestamp"]) if "timestamp" in r else default_ts
+                                        for r in records]
+        self._size = end
+        self._merge_index(start, end)
+        return n
+
+    def _merge_index(self, start, end):
+        """新增记录排序后归并进索引 (O(n) 而非整体重排)"""
+        keys = (self._columns["symbol"][start:end].astype(np.int64) << 32) \
+            | self._columns["expiry"][start:end].astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        pos = np.searchsorted(self._keys, keys, side="right")
+        self._keys = np.insert(self._keys, pos, keys)
+        self._order = np.insert(self._order, pos, order + start)
+
+    def query(self, symbol, max_expiry_day=None, min_expiry_day=None):
+        """某标的 (可限定到期日区间) 的记录下标, 按到期日升序"""
+        code = self._codes.get(symbol)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        base = np.int64(code) << 32
+        lo = base + (min_expiry_day if min_expiry_day is not None else 0)
+        hi = base + (max_expiry_day + 1 if max_expiry_day is not None else 1 << 32)
+        a, b = np.searchsorted(self._keys, [lo, hi], side="left")
+        return self._order[a:b]
+
+    def records(self, rows):
+        """记录下标 → 字典列表 (与输入格式一致)"""
+        option_names = {v: k for k, v in OPTION_TYPES.items()}
+        trade_names = {v: k for k, v in TRADE_TYPES.items()}
+        cols = {name: self.column(name)[rows].tolist() for name in COLUMNS}
+        return [{
+            "symbol": self.symbols[cols["symbol"][i]],
+            "option_type": option_names.get(cols["option_type"][i], "unknown"),
+            "strike": cols["strike"][i],
+            "expiry": str(np.datetime64(cols["expiry"][i], "D")),
+            "premium": cols["premium"][i],
+            "volume": cols["volume"][i],
+            "open_interest": cols["open_interest"][i],
+            "trade_type": trade_names.get(cols["trade_type"][i], "other"),
+        } for i in range(len(rows))]
+
+    def _unusual_mask(self, params, as_of_ns, since=None, rows=None):
+        params = flow_rules(params)
+
+        def col(name):
+            c = self.column(name)
+            return c if rows is None else c[rows]
+        max_expiry_day = as_of_ns // NS_PER_DAY + params["max_dte"]
+        mask = (col("premium") >= params["min_premium_usd"]) \
+            & (col("volume") >= params["min_volume_oi_ratio"] * np.maximum(col("open_interest"), 1)) \
+            & (col("expiry") <= max_expiry_day) \
+            & np.isin(col("trade_type"), [TRADE_TYPES[t] for t in params["unusual_trade_types"]])
+        if since is not None:
+            mask &= col("timestamp") >= parse_timestamp(since)
+        return mask
+
+    def screen(self, params, as_of=None, since=None):
+        """
+        全市场筛选 (一次向量化扫描)
+
+        Args:
+            params: 策略参数 (RULE_KEYS 中的异动 / 方向规则, 缺省取 seed_options_flow_v1 默认值)
+            as_of: 计算剩余到期天数的基准时间 (默认当前时间)
+            since: 只统计该时间之后的成交 (如当日开盘)
+
+        Returns:
+            按标的编码对齐的数组 {"symbol", "signal" (1/-1/0), "strength", "num_trades",
+            "call_premium", "put_premium"}
+        """
+        params = flow_rules(params)
+        as_of_ns = _now_ns() if as_of is None else parse_timestamp(as_of)
+        mask = self._unusual_mask(params, as_of_ns, since)
+        codes = self.column("symbol")[mask]
+        premium = self.column("premium")[mask]
+        is_call = self.column("option_type")[mask] == 1
+        is_put = self.column("option_type")[mask] == -1
+        m = len(self.symbols)
+
+        num_trades = np.bincount(codes, minlength=m)
+        call_premium = np.bincount(codes, weights=premium * is_call, minlength=m)
+        put_premium = np.bincount(codes, weights=premium * is_put, minlength=m)
+        total = call_premium + put_premium
+        with np.errstate(divide="ignore", invalid="ignore"):
+            call_ratio = np.where(total > 0, call_premium / total, 0.5)
+
+        active = (num_trades >= params["min_trades"]) & (total > 0)
+        signal = np.where(active & (call_ratio > params["bullish_call_ratio"]), 1,
+                          np.where(active & (call_ratio < params["bearish_call_ratio"]), -1, 0)).astype(np.int8)
+        strength = np.where(signal == 1, call_ratio, np.where(signal == -1, 1 - call_ratio, 0.0))
+        return {
+            "symbol": np.array(self.symbols, dtype=object),
+            "signal": signal,
+            "strength": strength,
+            "num_trades": num_trades,
+            "call_premium": call_premium,
+            "put_premium": put_premium,
+        }
+
+    def analyze(self, symbol, params, as_of=None, since=None):
+        """单标的分析 (走索引), 返回与 analyze_options_flow 相同结构"""
+        params = flow_rules(params)
+        as_of_ns = _now_ns() if as_of is None else parse_timestamp(as_of)
+        rows = self.query(symbol, max_expiry_day=as_of_ns // NS_PER_DAY + params["max_dte"])
+        rows = np.sort(rows[self._unusual_mask(params, as_of_ns, since, rows)])
+        if len(rows) < params["min_trades"]:
+            return {"signal": "neutral", "strength": 0.0, "details": []}
+        return classify_flow(self.records(rows), params)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, symbols=np.array(self.symbols, dtype=str),
+                     **{name: self.column(name) for name in COLUMNS})
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_columns(data["symbols"].tolist(), {name: data[name] for name in COLUMNS})
+
+    @classmethod
+    def from_columns(cls, symbols, columns):
+        """由已编码的列构建 (symbol 为 symbols 下标, expiry 为天数, 其余见 COLUMNS)"""
+        n = len(columns["symbol"])
+        store = cls(capacity=max(n, 1))
+        store.symbols = list(symbols)
+        store._codes = {s: i for i, s in enumerate(store.symbols)}
+        for name in COLUMNS:
+            store._columns[name][:n] = columns[name]
+        store._size = n
+        store._merge_index(0, n)
+        return store
+
+
+def is_unusual(record, params, max_expiry_day, expiry_day):
+    """
+    单条记录是否为异动 (expiry_day: 到期日字符串 → 天数, 调用方负责缓存)
+    params 须为完整规则 (flow_rules 的结果), 逐条调用时不再合并默认值
+    """
+    return (record["premium"] >= params["min_premium_usd"]
+            and record["volume"] / max(record["open_interest"], 1) >= params["min_volume_oi_ratio"]
+            and expiry_day(record["expiry"]) <= max_expiry_day
+            and record["trade_type"] in params["unusual_trade_types"])
+
+
+def classify_flow(unusual, params=None):
+    """已过滤的异动记录 → {"signal", "strength", "details"} (call 权利金占比判定方向)"""
+    params = flow_rules(params)
+    call_premium = sum(f["premium"] for f in unusual if f["option_type"] == "call")
+    put_premium = sum(f["premium"] for f in unusual if f["option_type"] == "put")
+    total = call_premium + put_premium
+    if total == 0:
+        return {"signal": "neutral", "strength": 0.0, "details": unusual}
+    call_ratio = call_premium / total
+    if call_ratio > params["bullish_call_ratio"]:
+        return {"signal": "bullish", "strength": call_ratio, "details": unusual}
+    if call_ratio < params["bearish_call_ratio"]:
+        return {"signal": "bearish", "strength": 1 - call_ratio, "details": unusual}
+    return {"signal": "neutral", "strength": 0.0, "details": unusual}
+
+
+def screen_results(screen, include_neutral=False):
+    """screen() 的数组结果 → {symbol: {"signal", "strength", "num_trades", "total_premium"}}"""
+    keep = np.ones(len(screen["signal"]), dtype=bool) if include_neutral else screen["signal"] != 0
+    total = screen["call_premium"] + screen["put_premium"]
+    return {
+        screen["symbol"][i]: {
+            "signal": SIGNAL_NAMES[int(screen["signal"][i])],
+            "strength": round(float(screen["strength"][i]), 4),
+            "num_trades": int(screen["num_trades"][i]),
+            "total_premium": round(float(total[i]), 2),
+        }
+        for i in np.flatnonzero(keep)
+    }
+
+
+def read_flow(path):
+    """读取 JSON 数组或 JSONL"""
+    with open(path) as f:
+        if str(path).endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    return data.get("flow", data) if isinstance(data, dict) else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Options Flow Store / Screener")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_screen = sub.add_parser("screen", help="Screen a flow file (or saved store) for unusual activity")
+    p_screen.add_argument("path", help="Flow .json/.jsonl or saved .npz store")
+    p_screen.add_argument("--strategy", default=str(DEFAULT_STRATEGY),
+                          help="Strategy whose params define 'unusual'")
+    p_screen.add_argument("--as-of", default=None)
+    p_screen.add_argument("--since", default=None, help="Only count trades at or after this time")
+    p_screen.add_argument("--top", type=int, default=20)
+    p_screen.add_argument("--save", default=None, help="Save the parsed store (.npz)")
+
+    p_info = sub.add_parser("info", help="Show a saved store")
+    p_info.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        store = OptionsFlowStore.load(args.path)
+        expiry = store.column("expiry")
+        print(json.dumps({
+            "records": len(store),
+            "symbols": len(store.symbols),
+            "expiry_range": [str(np.datetime64(int(expiry.min()), "D")),
+                             str(np.datetime64(int(expiry.max()), "D"))] if len(store) else None,
+        }, indent=2))
+        return 0
+
+    if args.path.endswith(".npz"):
+        store = OptionsFlowStore.load(args.path)
+    else:
+        store = OptionsFlowStore()
+        store.append(read_flow(args.path))
+    if args.save:
+        store.save(args.save)
+
+    params = read_strategy_meta(Path(args.strategy).read_text())["params"]
+    results = screen_results(store.screen(params, args.as_of, args.since))
+    ranked = sorted(results.items(), key=lambda kv: (-kv[1]["strength"], -kv[1]["total_premium"]))
+    print(json.dumps({
+        "records": len(store),
+        "symbols": len(store.symbols),
+        "bullish": sum(1 for r in results.values() if r["signal"] == "bullish"),
+        "bearish": sum(1 for r in results.values() if r["signal"] == "bearish"),
+        "top": dict(ranked[:args.top]),
+    }, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
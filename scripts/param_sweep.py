@@ -0,0 +1,318 @@
+"""
+参数扫描
+对 STRATEGY_META["params"] 做网格 / 随机 / 拉丁超立方采样, 行情只加载一次并放入
+共享内存, 由进程池并行评估。结果按完成顺序流式写入 JSONL, 结束时输出排名表。
+
+共享计算:
+- 只差 EXECUTION_PARAMS (止损/止盈/仓位) 的参数组复用同一份信号数组;
+- 策略导出 INDICATOR_PARAMS + compute_indicators_batch + signals_from_indicators 时,
+  只差阈值的参数组复用同一份指标数组。
+任务按指标键分组派发, 使共享发生在同一进程内。
+
+参数规格 (可重复 --param):
+    name=v1,v2,v3      离散取值
+    name=lo:hi:step    网格步进 (含 hi)
+    name=lo:hi         连续区间 (random / lhs; 两端均为整数时取整数)
+
+用法:
+    python scripts/param_sweep.py strategies/candidates/seed_momentum_rsi_v1.py \\
+        --mode grid --param rsi_oversold=20:45:5 --param sma_period=10,20,30 \\
+        --param stop_loss_pct=-0.05:-0.02:0.01 --output sweep.jsonl
+    python scripts/param_sweep.py <strategy> --mode lhs --samples 2000 --param rsi_oversold=15:45
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from metrics import infer_periods_per_year
+from run_backtest import (EXECUTION_PARAMS, LOOKBACK, compute_signals, load_columns,
+                          load_strategy, primary_symbol, simulate_trades, summarize)
+
+INDICATOR_CACHE_SIZE = 8
+# 每个进程内的共享状态 (由 init_worker 设置)
+worker_state = {}
+
+
+def _parse_number(text):
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text and "e" not in text.lower() else value
+
+
+def parse_param_spec(spec):
+    """解析 name=... 规格, 返回 (name, {"values": [...]} 或 {"low", "high", "step"})"""
+    name, _, body = spec.partition("=")
+    if not body:
+        raise ValueError(f"参数规格格式错误: {spec!r}")
+    if ":" in body:
+        parts = [_parse_number(p) for p in body.split(":")]
+        if len(parts) not in (2, 3):
+            raise ValueError(f"区间规格应为 lo:hi 或 lo:hi:step: {spec!r}")
+        return name, {"low": parts[0], "high": parts[1], "step": parts[2] if len(parts) == 3 else None}
+    return name, {"values": [_parse_number(v) for v in body.split(",")]}
+
+
+def _grid_values(name, spec):
+    if "values" in spec:
+        return spec["values"]
+    if spec["step"] is None:
+        raise ValueError(f"网格模式需要步长: {name}")
+    low, high, step = spec["low"], spec["high"], spec["step"]
+    count = int(np.floor((high - low) / step + 1e-9)) + 1
+    values = [low + i * step for i in range(count)]
+    if all(isinstance(v, int) for v in (low, high, step)):
+        return values
+    return [round(v, 10) for v in values]
+
+
+def _scale(spec, u):
+    """将 [0, 1) 均匀数映射到规格的取值"""
+    if "values" in spec:
+        values = spec["values"]
+        return [values[min(int(x * len(values)), len(values) - 1)] for x in u]
+    low, high = spec["low"], spec["high"]
+    if isinstance(low, int) and isinstance(high, int):
+        return [int(v) for v in np.floor(low + u * (high - low + 1)).clip(low, high)]
+    return [float(v) for v in low + u * (high - low)]
+
+
+def generate_param_sets(base_params, specs, mode="grid", samples=100, seed=0):
+    """
+    生成参数组列表
+
+    Args:
+        base_params: 策略默认参数
+        specs: {name: spec} (parse_param_spec 的结果)
+        mode: grid | random | lhs
+        samples: random / lhs 的样本数
+        seed: 随机种子
+    """
+    unknown = set(specs) - set(base_params)
+    if unknown:
+        raise ValueError(f"未知参数: {sorted(unknown)}")
+    names = list(specs)
+
+    if mode == "grid":
+        combos = itertools.product(*(_grid_values(n, specs[n]) for n in names))
+        return [{**base_params, **dict(zip(names, combo))} for combo in combos]
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in names:
+        if mode == "random":
+            u = rng.random(samples)
+        elif mode == "lhs":
+            u = (rng.permutation(samples) + rng.random(samples)) / samples
+        else:
+            raise ValueError(f"未知采样模式: {mode}")
+        columns[name] = _scale(specs[name], u)
+    return [{**base_params, **{n: columns[n][i] for n in names}} for i in range(samples)]
+
+
+def share_columns(columns):
+    """把行情列复制到共享内存, 返回 (句柄列表, 描述)"""
+    handles, layout = [], {}
+    for name, col in columns.items():
+        col = np.ascontiguousarray(col)
+        shm = shared_memory.SharedMemory(create=True, size=max(col.nbytes, 1))
+        np.ndarray(col.shape, dtype=col.dtype, buffer=shm.buf)[:] = col
+        handles.append(shm)
+        layout[name] = (shm.name, col.shape, col.dtype.str)
+    return handles, layout
+
+
+def init_worker(strategy_path, layout, initial_capital):
+    """进程池初始化: 加载策略并挂载共享内存中的行情 (只读)"""
+    columns, handles = {}, []
+    for name, (shm_name, shape, dtype) in layout.items():
+        # 子进程与父进程共用 resource_tracker, unlink 由父进程负责
+        shm = shared_memory.SharedMemory(name=shm_name)
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        columns[name] = arr
+        handles.append(shm)
+    worker_state.update(
+        module=load_strategy(strategy_path),
+        columns=columns,
+        handles=handles,
+        initial_capital=initial_capital,
+        indicators=OrderedDict(),
+        periods_per_year=infer_periods_per_year(columns["timestamp"]),
+    )
+
+
+def signals_for(params):
+    """在 worker 进程内生成整段行情的信号 (复用指标缓存)"""
+    module, columns = worker_state["module"], worker_state["columns"]
+    indicator_params = getattr(module, "INDICATOR_PARAMS", None)
+    if indicator_params is None or not hasattr(module, "compute_indicators_batch"):
+        return compute_signals(module, columns, params)
+
+    key = tuple(params[p] for p in indicator_params)
+    cache = worker_state["indicators"]
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        cache[key] = module.compute_indicators_batch(
+            columns["close"], columns["high"], columns["low"], columns["volume"],
+            params, LOOKBACK + 1)
+        if len(cache) > INDICATOR_CACHE_SIZE:
+            cache.popitem(last=False)
+    return module.signals_from_indicators(cache[key], params)
+
+
+def evaluate_chunk(chunk):
+    """评估一组参数 (同一指标键), 返回结果行列表"""
+    closes = worker_state["columns"]["close"]
+    initial_capital = worker_state["initial_capital"]
+    results = []
+    signal_cache = {}
+    for index, params in chunk:
+        signal_key = tuple(sorted((k, v) for k, v in params.items() if k not in EXECUTION_PARAMS))
+        if signal_key not in signal_cache:
+            signal_cache[signal_key] = signals_for(params)
+        actions, confidences = signal_cache[signal_key]
+        trades, equity_curve, exposure_curve = simulate_trades(closes, actions, confidences,
+                                                               params, initial_capital)
+        row = {"index": index, "params": params}
+        if trades:
+            row.update(status="success", **summarize(trades, equity_curve, initial_capital,
+                                                     exposure_curve, worker_state["periods_per_year"]))
+        else:
+            row.update(status="no_trades")
+        results.append(row)
+    return results
+
+
+def chunk_tasks(module, param_sets, chunk_size):
+    """按指标键 / 信号键排序后切块, 让可共享计算的参数组落在同一任务中"""
+    indicator_params = getattr(module, "INDICATOR_PARAMS", ())
+
+    def sort_key(item):
+        params = item[1]
+        return (tuple(repr(params[p]) for p in indicator_params),
+                tuple(sorted((k, repr(v)) for k, v in params.items() if k not in EXECUTION_PARAMS)))
+
+    ordered = sorted(enumerate(param_sets), key=sort_key)
+    return [ordered[i:i + chunk_size] for i in range(0, len(ordered), chunk_size)]
+
+
+def run_sweep(strategy_path, param_sets, days=30, initial_capital=100000.0, data_dir=None,
+              timeframe="15Min", workers=None, chunk_size=64, on_result=None):
+    """
+    并行评估参数组
+
+    Args:
+        on_result: 每完成一个参数组时回调 on_result(row), 用于流式输出
+
+    Returns:
+        全部结果, 按 sharpe_ratio 降序 (no_trades 排最后)
+    """
+    module = load_strategy(strategy_path)
+    symbol = primary_symbol(module.STRATEGY_META)
+    columns = {name: np.asarray(col) for name, col in
+               load_columns(symbol, days, data_dir, timeframe).items()}
+
+    handles, layout = share_columns(columns)
+    rows = []
+    try:
+        chunks = chunk_tasks(module, param_sets, chunk_size)
+        workers = min(workers or os.cpu_count() or 1, max(len(chunks), 1))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(strategy_path, layout, initial_capital)) as pool:
+            futures = [pool.submit(evaluate_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                for row in future.result():
+                    rows.append(row)
+                    if on_result is not None:
+                        on_result(row)
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    return rank_results(rows)
+
+
+def rank_results(rows, key="sharpe_ratio", top=None):
+    """按指标降序排名"""
+    scored = [r for r in rows if r.get("status") == "success"]
+    ranked = heapq.nlargest(top or len(scored), scored, key=lambda r: r[key])
+    if top is None:
+        ranked += [r for r in rows if r.get("status") != "success"]
+    return ranked
+
+
+def format_table(rows, names, key="sharpe_ratio", top=20):
+    """排名表 (纯文本)"""
+    metrics = ["sharpe_ratio", "total_return", "max_drawdown", "win_rate", "total_trades"]
+    if key not in metrics:
+        metrics.insert(0, key)
+    header = ["rank"] + names + metrics
+    lines = ["  ".join(f"{h:>14}" for h in header)]
+    for rank, row in enumerate(rank_results(rows, key, top), 1):
+        cells = [rank] + [row["params"][n] for n in names] + [row.get(m) for m in metrics]
+        lines.append("  ".join(f"{c:>14}" if not isinstance(c, float) else f"{c:>14.4g}"
+                               for c in cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel Parameter Sweep")
+    parser.add_argument("strategy", help="Path to strategy .py file")
+    parser.add_argument("--param", action="append", required=True,
+                        help="Param spec: name=v1,v2 | name=lo:hi:step | name=lo:hi")
+    parser.add_argument("--mode", choices=["grid", "random", "lhs"], default="grid")
+    parser.add_argument("--samples", type=int, default=100, help="Sample count for random/lhs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); simulated bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: CPU count)")
+    parser.add_argument("--rank-by", default="sharpe_ratio")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", default=None, help="Stream every result to this JSONL path")
+    args = parser.parse_args()
+
+    specs = dict(parse_param_spec(s) for s in args.param)
+    meta = load_strategy(args.strategy).STRATEGY_META
+    try:
+        primary_symbol(meta)
+    except ValueError as e:
+        parser.error(str(e))
+    param_sets = generate_param_sets(meta["params"], specs, args.mode, args.samples, args.seed)
+
+    out = None
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        out = open(args.output, "w")
+
+    def on_result(row):
+        if out is not None:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+
+    try:
+        rows = run_sweep(args.strategy, param_sets, args.days, args.capital, args.data_dir,
+                         args.timeframe, args.workers, on_result=on_result)
+    finally:
+        if out is not None:
+            out.close()
+
+    print(f"evaluated {len(rows)} parameter sets")
+    print(format_table(rows, list(specs), args.rank_by, args.top))
+    return 0 if any(r.get("status") == "success" for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+组合回测
+对策略 symbols 中的全部标的并行生成信号 (进程池, 每个标的一个任务),
+再由共享的现金/持仓账本按时间顺序合并撮合, 并执行 config/risk-params.json
+中的组合限制: max_total_exposure / max_single_position / max_single_asset /
+cash_reserve / max_daily_trades / min_signal_confidence。
+
+用法:
+    python scripts/portfolio_backtest.py strategies/candidates/seed_momentum_rsi_v1.py --days 60
+    python scripts/run_backtest.py <strategy> --portfolio
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bar_store import NS_PER_DAY, format_timestamp
+from metrics import infer_periods_per_year
+from run_backtest import LOOKBACK, compute_signals, load_columns, load_strategy, summarize
+
+RISK_PARAMS_PATH = Path(__file__).resolve().parent.parent / "config" / "risk-params.json"
+
+
+def load_risk_params(path=RISK_PARAMS_PATH):
+    """读取风控参数"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def symbol_signals(task):
+    """进程池任务: 加载单个标的行情并生成信号"""
+    strategy_path, symbol, params, days, data_dir, timeframe = task
+    module = load_strategy(strategy_path)
+    if params is None:
+        params = module.STRATEGY_META["params"]
+    columns = load_columns(symbol, days, data_dir, timeframe)
+    actions, confidences = compute_signals(module, columns, params)
+    return (symbol, np.asarray(columns["timestamp"]), np.asarray(columns["close"]),
+            actions, confidences)
+
+
+def run_ledger(series, params, portfolio_limits, initial_capital):
+    """
+    按时间戳归并各标的信号, 在共享账本上撮合并执行组合限制。
+
+    Args:
+        series: [(symbol, timestamps, closes, actions, confidences), ...]
+        params: 策略参数 (止损/止盈/仓位)
+        portfolio_limits: risk-params.json 的 portfolio 段
+        initial_capital: 初始资金
+
+    Returns:
+        (trades, equity_curve, exposure_curve, equity_timestamps, rejected)
+    """
+    symbols = [s[0] for s in series]
+    lengths = [len(s[1]) for s in series]
+    sym_idx = np.repeat(np.arange(len(series)), lengths)
+    bar_idx = np.concatenate([np.arange(n) for n in lengths])
+    ts_all = np.concatenate([s[1] for s in series])
+    order = np.argsort(ts_all, kind="stable")
+    ts_sorted = ts_all[order]
+    group_end = np.append(ts_sorted[1:] != ts_sorted[:-1], True)
+
+    closes = [s[2].tolist() for s in series]
+    actions = [s[3].tolist() for s in series]
+    confidences = [s[4].tolist() for s in series]
+
+    min_conf = max(0.5, portfolio_limits.get("min_signal_confidence", 0.5))
+    position_pct = min(params["max_position_pct"],
+                       portfolio_limits.get("max_single_position", 1.0),
+                       portfolio_limits.get("max_single_asset", 1.0))
+    max_exposure = portfolio_limits.get("max_total_exposure", 1.0)
+    cash_reserve = portfolio_limits.get("cash_reserve", 0.0)
+    max_daily_trades = portfolio_limits.get("max_daily_trades", float("inf"))
+
+    cash = initial_capital
+    market_value = 0.0
+    positions = [0] * len(series)
+    entry_prices = [0.0] * len(series)
+    last_prices = [0.0] * len(series)
+    trades = []
+    equity_curve = [initial_capital]
+    exposure_curve = []
+    equity_ts = []
+    rejected = {"exposure": 0, "cash_reserve": 0, "daily_trades": 0}
+    day = None
+    day_trades = 0
+
+    def close_position(k, price, ts):
+        nonlocal cash, market_value, day_trades
+        qty = positions[k]
+        entry = entry_prices[k]
+        cash += qty * price
+        market_value -= qty * price
+        positions[k] = 0
+        day_trades += 1
+        trades.append({
+            "symbol": symbols[k],
+            "entry": entry,
+            "exit": price,
+            "qty": qty,
+            "pnl": round(qty * (price - entry), 2),
+            "pnl_pct": round((price - entry) / entry, 4),
+            "exit_time": format_timestamp(ts),
+        })
+
+    for ev, ts, end in zip(order.tolist(), ts_sorted.tolist(), group_end.tolist()):
+        k = int(sym_idx[ev])
+        i = int(bar_idx[ev])
+        price = closes[k][i]
+        if ts // NS_PER_DAY != day:
+            day = ts // NS_PER_DAY
+            day_trades = 0
+
+        market_value += positions[k] * (price - last_prices[k])
+        last_prices[k] = price
+
+        if i >= LOOKBACK:
+            action = actions[k][i]
+            if action == 1 and positions[k] == 0 and confidences[k][i] >= min_conf:
+                equity = cash + market_value
+                qty = int(equity * position_pct / price)
+                cost = qty * price
+                if qty <= 0:
+                    pass
+                elif day_trades >= max_daily_trades:
+                    rejected["daily_trades"] += 1
+                elif market_value + cost > equity * max_exposure:
+                    rejected["exposure"] += 1
+                elif cash - cost < equity * cash_reserve:
+                    rejected["cash_reserve"] += 1
+                else:
+                    positions[k] = qty
+                    entry_prices[k] = price
+                    cash -= cost
+                    market_value += cost
+                    day_trades += 1
+
+            elif action == -1 and positions[k] > 0:
+                close_position(k, price, ts)
+
+            # 止损/止盈
+            elif positions[k] > 0:
+                pnl_pct = (price - entry_prices[k]) / entry_prices[k]
+                if pnl_pct <= params["stop_loss_pct"] or pnl_pct >= params["take_profit_pct"]:
+                    close_position(k, price, ts)
+
+        if end:
+            equity_curve.append(cash + market_value)
+            exposure_curve.append(market_value)
+            equity_ts.append(ts)
+
+    return trades, equity_curve, exposure_curve, equity_ts, rejected
+
+
+def attribution(trades, symbols, initial_capital):
+    """按标的拆分已实现盈亏"""
+    result = {}
+    for symbol in symbols:
+        sym_trades = [t for t in trades if t["symbol"] == symbol]
+        pnl = sum(t["pnl"] for t in sym_trades)
+        result[symbol] = {
+            "trades": len(sym_trades),
+            "pnl": round(pnl, 2),
+            "contribution_pct": round(pnl / initial_capital, 4),
+            "win_rate": round(sum(1 for t in sym_trades if t["pnl"] > 0) / len(sym_trades), 2)
+            if sym_trades else 0,
+        }
+    return result
+
+
+def run_portfolio_backtest(strategy_path: str, days: int = 30, initial_capital: float = 100000.0,
+                           data_dir=None, timeframe: str = "15Min", workers=None,
+                           risk_params=None, params=None):
+    """执行组合回测"""
+    module = load_strategy(strategy_path)
+    meta = module.STRATEGY_META
+    symbols = meta["symbols"]
+    if not isinstance(symbols, list):
+        return {"status": "error", "message": f"组合回测需要固定标的列表, 当前 symbols={symbols!r}"}
+    if params is None:
+        params = meta["params"]
+    if risk_params is None:
+        risk_params = load_risk_params()
+
+    tasks = [(strategy_path, sym, params, days, data_dir, timeframe) for sym in symbols]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            series = list(pool.map(symbol_signals, tasks))
+    else:
+        series = [symbol_signals(task) for task in tasks]
+
+    series = [s for s in series if len(s[1]) >= LOOKBACK]
+    if not series:
+        return {"status": "error", "message": "数据不足"}
+
+    trades, equity_curve, exposure_curve, equity_ts, rejected = run_ledger(
+        series, params, risk_params["portfolio"], initial_capital)
+    if not trades:
+        return {"status": "no_trades", "message": "回测期间无交易"}
+
+    return {
+        "status": "success",
+        "mode": "portfolio",
+        "strategy_id": meta["id"],
+        "symbols": [s[0] for s in series],
+        "backtest_days": days,
+        "initial_capital": initial_capital,
+        **summarize(trades, equity_curve, initial_capital, exposure_curve,
+                    infer_periods_per_year(equity_ts)),
+        "rejected_orders": rejected,
+        "attribution": attribution(trades, [s[0] for s in series], initial_capital),
+        "equity_curve": {
+            "timestamps": [format_timestamp(t) for t in equity_ts],
+            "values": [round(v, 2) for v in equity_curve[1:]],
+        },
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio Backtest Runner")
+    parser.add_argument("strategy", help="Path to strategy .py file")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--output", default=None, help="Output JSON path")
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); simulated bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: CPU count)")
+    args = parser.parse_args()
+
+    result = run_portfolio_backtest(args.strategy, args.days, args.capital, args.data_dir,
+                                    args.timeframe, args.workers)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    return 0 if result.get("status") == "success" and result.get("sharpe_ratio", 0) > 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+回测热路径剖析 (run_backtest.py --profile)
+记录各阶段 (策略加载 / 数据 / 信号 / 撮合 / 指标) 的墙钟时间与 Python 内存块分配数变化,
+以及每次信号调用 (generate_signal / SignalState.update) 的延迟直方图 (p50/p99/max);
+批量接口 generate_signals_batch 只有一次调用, 以 per_bar_us 衡量。
+可选 tracemalloc 峰值内存与 cProfile/pstats 输出。
+
+Evolver 用 --max-bar-latency-us 在候选进入 Trader 之前拒绝超出单 bar 延迟预算的策略。
+
+钩子 API (供回测引擎 / 实盘运行时复用):
+
+    profiler = Profiler(listeners=[callback])    # callback(event, name, value)
+    with profiler.phase("load_data"):            # event="phase", value=阶段统计
+        ...
+    signal = profiler.timed(module.generate_signal)
+    profiler.record_batch(elapsed_ns, bars)
+    result["profile"] = profiler.report()
+
+用法:
+    python scripts/run_backtest.py <strategy> --profile
+    python scripts/run_backtest.py <strategy> --profile-output /tmp/bt.pstats --max-bar-latency-us 200
+    python -m pstats /tmp/bt.pstats
+"""
+import cProfile
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+SUB_BUCKETS = 16  # 每个 2 的幂区间再等分为 16 格, 分位数相对误差 < 1/16
+
+
+class LatencyHistogram:
+    """对数-线性分桶的纳秒延迟直方图 (固定内存, 可合并)"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket(ns):
+        if ns < SUB_BUCKETS:
+            return ns
+        shift = ns.bit_length() - 5  # 保留最高 5 位 (最高位 + 4 位子桶)
+        return (shift + 1) * SUB_BUCKETS + ((ns >> shift) - SUB_BUCKETS)
+
+    @staticmethod
+    def upper_bound(index):
+        """桶的上界 (纳秒)"""
+        if index < SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        return ((index % SUB_BUCKETS + SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, ns):
+        index = self.bucket(ns)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def merge(self, other):
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """第 q 百分位 (纳秒, 取所在桶上界, 不超过 max)"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def to_dict(self):
+        """微秒单位的摘要; histogram 为按 2 的幂合并的 [上界 us, 次数]"""
+        coarse = {}
+        for index, n in self.counts.items():
+            upper = 1 << self.upper_bound(index).bit_length()
+            coarse[upper] = coarse.get(upper, 0) + n
+        return {
+            "calls": self.count,
+            "mean_us": round(self.total / self.count / 1e3, 3) if self.count else 0.0,
+            "p50_us": round(self.percentile(50) / 1e3, 3),
+            "p99_us": round(self.percentile(99) / 1e3, 3),
+            "max_us": round(self.max / 1e3, 3),
+            "histogram": [[round(upper / 1e3, 3), n] for upper, n in sorted(coarse.items())],
+        }
+
+
+class Profiler:
+    """
+    阶段计时 + 信号调用延迟 + 可选 tracemalloc / cProfile
+    listeners 在每个阶段结束时收到 ("phase", 名称, 阶段统计), report() 时收到 ("report", None, 报告)
+    """
+
+    def __init__(self, memory=False, cprofile=False, listeners=()):
+        self.memory = memory
+        self.listeners = list(listeners)
+        self.phases = {}
+        self.latency = LatencyHistogram()
+        self.signal_mode = None
+        self.signal_ns = 0
+        self.bars = 0
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._start = time.perf_counter_ns()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def _emit(self, event, name, value):
+        for callback in self.listeners:
+            callback(event, name, value)
+
+    @contextmanager
+    def phase(self, name):
+        """计时一个阶段; 同名阶段累加"""
+        if self.memory:
+            tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if self._cprofile is not None:
+                self._cprofile.disable()
+            stats = self.phases.setdefault(name, {"seconds": 0.0, "allocated_blocks": 0})
+            stats["seconds"] = round(stats["seconds"] + elapsed / 1e9, 6)
+            stats["allocated_blocks"] += sys.getallocatedblocks() - blocks
+            if self.memory:
+                peak_kib = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+                stats["peak_kib"] = max(stats.get("peak_kib", 0.0), peak_kib)
+            self._emit("phase", name, stats)
+
+    def timed(self, func, mode="per_bar"):
+        """包装信号函数, 逐次记录调用延迟"""
+        self.signal_mode = mode
+        clock = time.perf_counter_ns
+        record = self.latency.record
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            result = func(*args, **kwargs)
+            elapsed = clock() - start
+            record(elapsed)
+            self.signal_ns += elapsed
+            return result
+
+        return wrapper
+
+    def record_batch(self, elapsed_ns, bars):
+        """generate_signals_batch 的一次调用 (覆盖 bars 根 bar)"""
+        self.signal_mode = "batch"
+        self.latency.record(elapsed_ns)
+        self.signal_ns += elapsed_ns
+        self.bars += bars
+
+    def count_bars(self, bars):
+        self.bars += bars
+
+    def report(self, max_bar_latency_us=None):
+        """剖析结果 (写入回测结果的 profile 字段)"""
+        signal = {"mode": self.signal_mode, "bars": self.bars,
+                  "per_bar_us": round(self.signal_ns / self.bars / 1e3, 3) if self.bars else 0.0,
+                  **self.latency.to_dict()}
+        report = {
+            "total_seconds": round((time.perf_counter_ns() - self._start) / 1e9, 6),
+            "phases": self.phases,
+            "signal": signal,
+        }
+        if max_bar_latency_us is not None:
+            report["budget"] = check_budget(signal, max_bar_latency_us)
+        self._emit("report", None, report)
+        return report
+
+    def dump_stats(self, path):
+        """写出 cProfile 数据 (python -m pstats 查看)"""
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(str(path))
+
+    def close(self):
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def check_budget(signal, max_bar_latency_us):
+    """
+    单 bar 延迟预算: 逐 bar 调用看 p99, 批量接口看摊销后的 per_bar_us
+    返回 {"max_bar_latency_us", "observed_us", "exceeded"}
+    """
+    observed = signal["per_bar_us"] if signal["mode"] == "batch" else signal["p99_us"]
+    return {"max_bar_latency_us": max_bar_latency_us, "observed_us": observed,
+            "exceeded": observed > max_bar_latency_us}
@@ -0,0 +1,130 @@
+"""
+回测结果缓存 (内容寻址)
+键 = sha256(策略源码, 参数, 行情切片指纹, 初始资金, 回测模式, 引擎版本)。
+命中时直接返回存储的结果 JSON, 不加载策略也不读取行情:
+STRATEGY_META 通过 ast 字面量解析获得, 行情指纹只读取 bar_store 的 meta.json。
+
+缓存目录默认 .cache/backtests/, 每个键一个 JSON 文件;
+按总字节数上限做 LRU 淘汰 (命中时刷新 mtime)。
+"""
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "backtests"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def read_strategy_meta(source: str):
+    """不执行模块, 用 ast 取出 STRATEGY_META 字面量"""
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == "STRATEGY_META" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError("策略缺少 STRATEGY_META")
+
+
+def data_fingerprint(symbols, days, data_dir=None, timeframe="15Min"):
+    """
+    行情切片指纹: 本地缓存中存在的标的取 meta.json 内容与文件状态,
+    否则记为模拟数据 (由 timeframe 与 days 决定; run_backtest 固定使用默认种子与配置)
+    """
+    parts = []
+    for symbol in symbols:
+        meta_path = Path(data_dir) / symbol.upper() / timeframe / "meta.json" if data_dir else None
+        if meta_path is not None and meta_path.exists():
+            stat = meta_path.stat()
+            parts.append([symbol, "store", timeframe, days, meta_path.read_text(),
+                          stat.st_size, stat.st_mtime_ns])
+        else:
+            parts.append([symbol, "simulated", timeframe, days])
+    return parts
+
+
+def alt_data_fingerprint(alt_data_dir):
+    """另类数据目录指纹: 各 JSONL 文件的名称 / 大小 / 修改时间"""
+    if alt_data_dir is None or not Path(alt_data_dir).is_dir():
+        return None
+    return [[p.name, p.stat().st_size, p.stat().st_mtime_ns]
+            for p in sorted(Path(alt_data_dir).glob("*.jsonl"))]
+
+
+def backtest_key(strategy_path, mode, days, initial_capital, data_dir=None, timeframe="15Min",
+                 params=None, engine_version="", symbols=None, alt_data_dir=None):
+    """计算回测缓存键 (symbols 覆盖 STRATEGY_META 中的标的)"""
+    from event_engine import ALT_SOURCES  # event_engine → run_backtest → result_cache
+    source = Path(strategy_path).read_text()
+    meta = read_strategy_meta(source)
+    # 与 run_backtest 的引擎选择一致: 声明另类数据源的策略才走事件驱动引擎
+    event_driven = any(name in ALT_SOURCES for name in meta.get("signal_sources", []))
+    if symbols is None:
+        symbols = meta["symbols"] if isinstance(meta["symbols"], list) else []
+        if not symbols and event_driven and data_dir is not None and Path(data_dir).is_dir():
+            symbols = sorted(p.name for p in Path(data_dir).iterdir() if p.is_dir())
+    if mode != "portfolio" and not event_driven:
+        symbols = symbols[:1]
+    payload = {
+        "source_sha256": hashlib.sha256(source.encode()).hexdigest(),
+        "params": params,
+        "data": data_fingerprint(symbols, days, data_dir, timeframe),
+        "alt_data": alt_data_fingerprint(alt_data_dir) if event_driven else None,
+        "capital": initial_capital,
+        "mode": mode,
+        "engine": engine_version,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+class ResultCache:
+    """按字节数上限 LRU 淘汰的本地结果缓存"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)  # 刷新 LRU 时间
+        return result
+
+    def put(self, key, result):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时按 mtime 从旧到新删除"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            os.remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        if self.cache_dir.exists():
+            for entry in os.scandir(self.cache_dir):
+                os.remove(entry.path)
@@ -0,0 +1,345 @@
+"""
+memory/ 与 knowledge/ 的本地 BM25 检索索引 (完全离线)
+Explorer 研究阶段按假设查询 top-k 段落, 不再整目录读取 principles / causal / papers /
+strategy-frameworks.md。
+
+- 分段: Markdown 按标题与空行分段 (每段约 PASSAGE_CHARS 字符, 前缀所属标题), JSON / JSONL
+  每条记录一段 (展开字符串字段), 其他文本按空行分段
+- 分词: 英文小写字母数字词 + 停用词 + 轻量复数词干 (S-stemmer); 中文按连续汉字的二元组
+  (单字词保留单字), 中英混排同一文本均可检索
+- 增量: 按 (mtime, 大小) 跳过未变文件, sha256 不同才重新分段; 旧段落记为墓碑,
+  墓碑超过存活段落的 1/4 时整体重建 postings
+- 存储: .cache/retrieval/index.bin (marshal), postings 为每个词的 (段落 id uint32[], 词频 uint16[]);
+  查询时 NumPy 向量化累加 BM25 分数
+
+用法:
+    python scripts/retrieval_index.py update
+    python scripts/retrieval_index.py search "momentum low VIX regime" -k 5
+    python scripts/retrieval_index.py search "内幕交易 聚集买入" --prefix memory/
+    python scripts/retrieval_index.py info
+"""
+import argparse
+import hashlib
+import json
+import marshal
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX = REPO_ROOT / ".cache" / "retrieval" / "index.bin"
+SOURCES = ("memory", "knowledge")
+EXCLUDE = ("knowledge/sources/monitor-list.json",)  # 扫描源配置, 不是知识内容
+SUFFIXES = {".md", ".txt", ".json", ".jsonl"}
+PASSAGE_CHARS = 800
+K1 = 1.2
+B = 0.75
+INDEX_VERSION = 1
+
+WORD = re.compile(r"[a-z0-9]+|[㐀-䶿一-鿿]+")
+HEADING = re.compile(r"^(#{1,6})\s+(.*)")
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have if in into is it its of on or that the their then
+there these this to was were will with within not no than which who when where what how can may
+""".split())
+
+
+# ── 分词 ──
+
+def stem(word):
+    """S-stemmer: 只去掉英文复数词尾"""
+    if len(word) > 4 and word.endswith("ies") and not word.endswith(("eies", "aies")):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("es") and not word.endswith(("aes", "ees", "oes", "ses")):
+        return word[:-1]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("us", "ss", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    tokens = []
+    for match in WORD.findall(text.lower()):
+        if match[0] < "㐀":
+            if match not in STOPWORDS:
+                tokens.append(stem(match))
+        elif len(match) == 1:
+            tokens.append(match)
+        else:
+            tokens.extend(match[i:i + 2] for i in range(len(match) - 1))
+    return tokens
+
+
+# ── 分段 ──
+
+def _flatten(value, out):
+    if isinstance(value, str):
+        out.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _flatten(item, out)
+    elif isinstance(value, list):
+        for item in value:
+            _flatten(item, out)
+    return out
+
+
+def split_markdown(text):
+    """→ [(起始行号, 段落文本)]; 段落以所属标题路径开头"""
+    passages, headings, block, start = [], [], [], 1
+
+    def flush():
+        body = "\n".join(block).strip()
+        if body:
+            prefix = " > ".join(headings)
+            passages.append((start, f"{prefix}\n{body}" if prefix else body))
+        block.clear()
+
+    for number, line in enumerate(text.splitlines(), 1):
+        match = HEADING.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            headings[level - 1:] = [match.group(2).strip()]
+            start = number + 1
+        elif not line.strip() and sum(len(x) for x in block) >= PASSAGE_CHARS:
+            flush()
+            start = number + 1
+        else:
+            if not block and not line.strip():
+                start = number + 1
+                continue
+            block.append(line)
+    flush()
+    return passages
+
+
+def split_file(path):
+    text = path.read_text(encoding="utf-8", errors="replace")
+    if path.suffix == ".md":
+        return split_markdown(text)
+    if path.suffix in (".json", ".jsonl"):
+        try:
+            data = [json.loads(line) for line in text.splitlines() if line.strip()] \
+                if path.suffix == ".jsonl" else json.loads(text)
+        except ValueError:
+            data = None
+        if data is not None:
+            records = data if isinstance(data, list) else [data]
+            return [(i + 1, "\n".join(_flatten(record, []))) for i, record in enumerate(records)
+                    if _flatten(record, [])]
+    return [(i + 1, block.strip()) for i, block in enumerate(re.split(r"\n\s*\n", text)) if block.strip()]
+
+
+# ── 索引 ──
+
+class RetrievalIndex:
+    """增量 BM25 倒排索引"""
+
+    def __init__(self, path=DEFAULT_INDEX, root=REPO_ROOT, sources=SOURCES):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.sources = sources
+        self.docs = {}       # 相对路径 → {"mtime_ns", "size", "sha256", "pids"}
+        self.passages = []   # pid → (相对路径, 行号, 文本) 或 None (墓碑)
+        self.lengths = array("I")
+        self.postings = {}   # 词 → (array("I") 段落 id, array("H") 词频)
+        self.tombstones = 0
+        self._cache = None   # 查询用 NumPy 视图
+        if self.path.exists():
+            self._read()
+
+    def _read(self):
+        data = marshal.loads(self.path.read_bytes())
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.docs = data["docs"]
+        self.passages = [tuple(p) if p is not None else None for p in data["passages"]]
+        self.lengths = array("I", data["lengths"])
+        self.postings = {term: (array("I", ids), array("H", tfs)) for term, (ids, tfs) in data["postings"].items()}
+        self.tombstones = data["tombstones"]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps({
+            "version": INDEX_VERSION, "docs": self.docs, "passages": self.passages,
+            "lengths": self.lengths.tobytes(), "tombstones": self.tombstones,
+            "postings": {term: (ids.tobytes(), tfs.tobytes()) for term, (ids, tfs) in self.postings.items()},
+        }))
+        os.replace(tmp, self.path)
+
+    def _scan(self):
+        found = {}
+        for source in self.sources:
+            for dirpath, dirnames, filenames in os.walk(self.root / source):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+                for name in filenames:
+                    rel = f"{rel_dir}/{name}"
+                    if name.startswith(".") or os.path.splitext(name)[1] not in SUFFIXES \
+                            or rel.startswith(EXCLUDE):
+                        continue
+                    found[rel] = os.stat(os.path.join(dirpath, name))
+        return found
+
+    def _add_passage(self, rel, line, text):
+        pid = len(self.passages)
+        tokens = tokenize(text)
+        self.passages.append((rel, line, text))
+        self.lengths.append(len(tokens))
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            ids, tfs = self.postings.get(token) or self.postings.setdefault(token, (array("I"), array("H")))
+            ids.append(pid)
+            tfs.append(min(tf, 65535))
+        return pid
+
+    def _drop(self, rel):
+        for pid in self.docs.pop(rel, {}).get("pids", []):
+            self.passages[pid] = None
+            self.lengths[pid] = 0
+            self.tombstones += 1
+
+    def _rebuild(self):
+        """去掉墓碑, 重新编号并重建 postings"""
+        live = [p for p in self.passages if p is not None]
+        self.passages, self.lengths, self.postings, self.tombstones = [], array("I"), {}, 0
+        pids = {}
+        for rel, line, text in live:
+            pids.setdefault(rel, []).append(self._add_passage(rel, line, text))
+        for rel, meta in self.docs.items():
+            meta["pids"] = pids.get(rel, [])
+
+    def update(self):
+        """增量同步; 返回 {"added", "updated", "removed", "unchanged", "passages", "rebuilt"}"""
+        found = self._scan()
+        report = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "rebuilt": False}
+        for rel in set(self.docs) - set(found):
+            self._drop(rel)
+            report["removed"] += 1
+        for rel, st in sorted(found.items()):
+            meta = self.docs.get(rel)
+            if meta is not None and meta["mtime_ns"] == st.st_mtime_ns and meta["size"] == st.st_size:
+                report["unchanged"] += 1
+                continue
+            path = self.root / rel
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            if meta is not None and meta["sha256"] == digest:
+                meta.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                report["unchanged"] += 1
+                continue
+            report["updated" if meta is not None else "added"] += 1
+            self._drop(rel)
+            pids = [self._add_passage(rel, line, text) for line, text in split_file(path)]
+            self.docs[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest, "pids": pids}
+        live = len(self.passages) - self.tombstones
+        if self.tombstones and self.tombstones * 4 > live:
+            self._rebuild()
+            report["rebuilt"] = True
+        if report["added"] or report["updated"] or report["removed"] or report["rebuilt"]:
+            self._cache = None
+            self.save()
+        report["passages"] = len(self.passages) - self.tombstones
+        return report
+
+    def _arrays(self):
+        if self._cache is None:
+            lengths = np.frombuffer(self.lengths, dtype=np.uint32).astype(np.float64) \
+                if len(self.lengths) else np.zeros(0)
+            alive = np.array([p is not None for p in self.passages], dtype=bool)
+            n = int(alive.sum())
+            self._cache = {"lengths": lengths, "alive": alive, "n": n,
+                           "avgdl": float(lengths[alive].mean()) if n else 0.0, "terms": {}}
+        return self._cache
+
+    def _term(self, token):
+        cache = self._arrays()["terms"]
+        arrays = cache.get(token)
+        if arrays is None and token in self.postings:
+            ids, tfs = self.postings[token]
+            arrays = cache[token] = (np.frombuffer(ids, dtype=np.uint32).astype(np.intp),
+                                     np.frombuffer(tfs, dtype=np.uint16).astype(np.float64))
+        return arrays
+
+    def search(self, query, k=5, prefix=None):
+        """BM25 top-k 段落: [{"path", "line", "score", "text"}]"""
+        arrays = self._arrays()
+        if not arrays["n"]:
+            return []
+        scores = np.zeros(len(self.passages))
+        norm = K1 * (1 - B + B * arrays["lengths"] / arrays["avgdl"])
+        for token in set(tokenize(query)):
+            term = self._term(token)
+            if term is None:
+                continue
+            ids, tfs = term
+            live = arrays["alive"][ids]
+            ids, tfs = ids[live], tfs[live]
+            df = len(ids)
+            if not df:
+                continue
+            idf = math.log(1 + (arrays["n"] - df + 0.5) / (df + 0.5))
+            scores[ids] += idf * tfs * (K1 + 1) / (tfs + norm[ids])
+        if prefix:
+            prefixes = (prefix,) if isinstance(prefix, str) else tuple(prefix)
+            keep = np.zeros(len(scores), dtype=bool)
+            for rel, meta in self.docs.items():
+                if rel.startswith(prefixes):
+                    keep[meta["pids"]] = True
+            scores[~keep] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+        return [{"path": self.passages[pid][0], "line": self.passages[pid][1],
+                 "score": round(float(scores[pid]), 4), "text": self.passages[pid][2]} for pid in top]
+
+    def info(self):
+        return {"index": str(self.path), "documents": len(self.docs),
+                "passages": len(self.passages) - self.tombstones, "tombstones": self.tombstones,
+                "terms": len(self.postings),
+                "bytes": self.path.stat().st_size if self.path.exists() else 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline BM25 Retrieval over memory/ and knowledge/")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX))
+    parser.add_argument("--root", default=str(REPO_ROOT), help="Repository root")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("update", help="Incrementally (re)index changed files")
+    p_search = sub.add_parser("search", help="Top-k passages for a query (updates first)")
+    p_search.add_argument("query")
+    p_search.add_argument("-k", type=int, default=5)
+    p_search.add_argument("--prefix", action="append", default=None,
+                          help="Restrict to paths with this prefix (repeatable), e.g. memory/principles/")
+    p_search.add_argument("--no-update", action="store_true")
+    sub.add_parser("info")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = RetrievalIndex(args.index, args.root)
+    if args.command == "info":
+        result = index.info()
+    elif args.command == "update":
+        result = {**index.update(), **index.info()}
+    else:
+        if not args.no_update:
+            index.update()
+        search_start = time.perf_counter()
+        hits = index.search(args.query, args.k, args.prefix)
+        result = {"query": args.query, "hits": hits,
+                  "search_ms": round((time.perf_counter() - search_start) * 1e3, 3)}
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1e3, 3)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
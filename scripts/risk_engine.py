@@ -0,0 +1,374 @@
+"""
+Guardian 增量风控引擎
+维护持仓 / 现金 / 各策略盈亏状态, 每根 bar 增量更新收益协方差并按 config/risk-params.json
+的 risk_limits 分级告警 (WARNING / CRITICAL / HALT)。
+
+- 协方差: 零均值 EWMA (RiskMetrics), Σ ← λΣ + (1-λ) r rᵀ, 每 bar O(k²), 不重新计算历史;
+  衰减因子以缩放系数延迟乘入, 每次只做一次秩 1 累加
+- var95: 参数法组合 VaR = 1.645 · sqrt(wᵀΣw) · sqrt(horizon_bars), w 为各标的市值 / 权益
+- correlation: 各策略收益 (盈亏变化 / 策略资金) 的 EWMA 相关系数, 取最大的一对
+- concentration: 单一标的市值占权益的最大比例
+- daily_pnl: 权益相对当日首根 bar 前权益的变化
+- strategy_dd: 各策略 (资金 + 累计盈亏) 相对峰值的回撤
+
+告警只在级别变化时发出; 任一指标达到 HALT 后引擎保持 halted, 直到 resume() (人工 RESUME)。
+var95 / correlation 在 min_periods 根 bar 之前不判定 (EWMA 尚未收敛)。
+
+    engine = RiskEngine(equity=100000, listeners=[callback])   # callback(alert)
+    engine.on_fill("seed_momentum_rsi_v1", "AAPL", 10, 187.2)   # 卖出为负数量
+    alerts = engine.on_bar(ts, {"AAPL": 187.9, ...})           # 本 bar 新增告警
+    if engine.halted: ...
+
+用法 (合成组合压力测试, 报告单 bar 检查延迟):
+    python scripts/risk_engine.py --symbols 500 --strategies 50 --days 20
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bar_store import NS_PER_DAY, format_timestamp
+from portfolio_backtest import load_risk_params
+from profiler import LatencyHistogram
+
+LEVELS = ("OK", "WARNING", "CRITICAL", "HALT")
+Z95 = 1.6448536269514722
+DEFAULT_LAMBDA = 0.94
+DEFAULT_MIN_PERIODS = 20
+BARS_PER_DAY = 26  # 15 分钟 bar
+
+
+def parse_limits(risk_limits):
+    """{"var95_warning": 0.03, ...} → {"var95": [("WARNING", 0.03), ...]} (按严重程度升序)"""
+    tiers = {}
+    for key, threshold in risk_limits.items():
+        metric, _, level = key.rpartition("_")
+        if level.upper() in LEVELS[1:]:
+            tiers.setdefault(metric, []).append((level.upper(), threshold))
+    for levels in tiers.values():
+        levels.sort(key=lambda t: LEVELS.index(t[0]))
+    return tiers
+
+
+def classify(tiers, value):
+    """阈值为负时越低越差 (亏损 / 回撤), 否则越高越差; 返回 (级别, 触发阈值)"""
+    level, hit = "OK", None
+    for name, threshold in tiers:
+        if (value <= threshold) if threshold < 0 else (value >= threshold):
+            level, hit = name, threshold
+    return level, hit
+
+
+class EwmaCovariance:
+    """零均值 EWMA 协方差; 维度可增长 (新标的 / 新策略从零方差开始)"""
+
+    def __init__(self, lam=DEFAULT_LAMBDA, capacity=16):
+        self.lam = lam
+        self.size = 0
+        self.updates = 0
+        self._raw = np.zeros((capacity, capacity))
+        self._scale = 1.0  # Σ = _scale · _raw
+
+    def resize(self, size):
+        if size > len(self._raw):
+            raw = np.zeros((max(size, 2 * len(self._raw)),) * 2)
+            raw[:self.size, :self.size] = self._raw[:self.size, :self.size]
+            self._raw = raw
+        self.size = max(self.size, size)
+
+    def update(self, r):
+        """r: 长度 size 的本 bar 收益"""
+        self._scale *= self.lam
+        if self._scale < 1e-150:
+            self._raw[:self.size, :self.size] *= self._scale
+            self._scale = 1.0
+        s = r * math.sqrt((1 - self.lam) / self._scale)
+        self._raw[:self.size, :self.size] += s[:, None] * s
+        self.updates += 1
+
+    def quad(self, w):
+        """wᵀΣw"""
+        raw = self._raw[:self.size, :self.size]
+        return float(w @ raw @ w) * self._scale
+
+    def matrix(self):
+        return self._raw[:self.size, :self.size] * self._scale
+
+    def variance(self):
+        return np.diagonal(self._raw)[:self.size] * self._scale
+
+
+class RiskEngine:
+    """增量组合风控: on_fill 更新持仓, on_bar 更新价格 / 协方差并检查全部限额"""
+
+    def __init__(self, risk_params=None, equity=100000.0, lam=DEFAULT_LAMBDA, horizon_bars=BARS_PER_DAY,
+                 min_periods=DEFAULT_MIN_PERIODS, allocations=None, listeners=()):
+        risk_params = risk_params or load_risk_params()
+        self.tiers = parse_limits(risk_params["risk_limits"])
+        self.horizon = math.sqrt(horizon_bars)
+        self.min_periods = min_periods
+        self.listeners = list(listeners)
+        self.initial_equity = equity
+        self.cash = equity
+        self.allocations = dict(allocations or {})
+
+        self.symbols = {}     # symbol → 列索引
+        self._names = []
+        self.strategies = {}  # strategy_id → 行索引
+        self.prices = np.zeros(16)
+        self.net_qty = np.zeros(16)
+        self.qty = np.zeros((4, 16))  # 策略 × 标的
+        self.pnl = np.zeros(4)
+        self.capital = np.zeros(4)
+        self.peak = np.zeros(4)
+        self.asset_cov = EwmaCovariance(lam)
+        self.strategy_cov = EwmaCovariance(lam)
+
+        self.day = None
+        self.day_start_equity = equity
+        self.levels = {}   # (指标, 范围) → 级别
+        self.alerts = []
+        self.halted = False
+        self.halt_reason = None
+        self.metrics = {}
+        self.latency = LatencyHistogram()
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    # 状态
+
+    def _symbol(self, symbol):
+        index = self.symbols.get(symbol)
+        if index is None:
+            index = self.symbols[symbol] = len(self.symbols)
+            self._names.append(symbol)
+            if index >= len(self.prices):
+                grow = len(self.prices)
+                self.prices = np.concatenate([self.prices, np.zeros(grow)])
+                self.net_qty = np.concatenate([self.net_qty, np.zeros(grow)])
+                self.qty = np.concatenate([self.qty, np.zeros((len(self.qty), grow))], axis=1)
+            self.asset_cov.resize(index + 1)
+        return index
+
+    def _strategy(self, strategy_id):
+        index = self.strategies.get(strategy_id)
+        if index is None:
+            index = self.strategies[strategy_id] = len(self.strategies)
+            if index >= len(self.pnl):
+                grow = len(self.pnl)
+                self.qty = np.concatenate([self.qty, np.zeros((grow, self.qty.shape[1]))])
+                self.pnl, self.capital, self.peak = (np.concatenate([a, np.zeros(grow)])
+                                                     for a in (self.pnl, self.capital, self.peak))
+            self.capital[index] = self.allocations.get(strategy_id, self.initial_equity)
+            self.peak[index] = self.capital[index]
+            self.strategy_cov.resize(index + 1)
+        return index
+
+    @property
+    def equity(self):
+        k = len(self.symbols)
+        return self.cash + float(self.net_qty[:k] @ self.prices[:k])
+
+    def on_fill(self, strategy_id, symbol, qty, price):
+        """成交 (qty 带符号); 成交价与当前标记价之差计入策略盈亏"""
+        s, i = self._strategy(strategy_id), self._symbol(symbol)
+        if self.prices[i] <= 0:
+            self.prices[i] = price
+        self.qty[s, i] += qty
+        self.net_qty[i] += qty
+        self.cash -= qty * price
+        self.pnl[s] += qty * (self.prices[i] - price)
+
+    def resume(self):
+        """人工 RESUME: 解除 HALT (级别在下一根 bar 重新判定)"""
+        self.halted, self.halt_reason = False, None
+        self.levels = {key: level for key, level in self.levels.items() if level != "HALT"}
+
+    # 每根 bar
+
+    def on_bar(self, ts, prices):
+        """更新价格与协方差, 检查全部限额, 返回本 bar 新增的告警"""
+        start = time.perf_counter_ns()
+        if ts // NS_PER_DAY != self.day:
+            self.day, self.day_start_equity = ts // NS_PER_DAY, self.equity
+
+        index = np.fromiter((self._symbol(s) for s in prices), np.int64, len(prices))
+        k, m = len(self.symbols), len(self.strategies)
+        prev = self.prices[:k].copy()
+        self.prices[index] = np.fromiter(prices.values(), float, len(prices))
+        known = prev > 0
+        move = np.where(known, self.prices[:k] - prev, 0.0)
+        returns = np.divide(move, prev, out=np.zeros(k), where=known)
+        self.asset_cov.update(returns)
+        if m:
+            dpnl = self.qty[:m, :k] @ move
+            self.pnl[:m] += dpnl
+            self.strategy_cov.update(dpnl / self.capital[:m])
+
+        alerts = self.check(ts)
+        self.latency.record(time.perf_counter_ns() - start)
+        return alerts
+
+    def check(self, ts):
+        """计算全部指标并判定级别"""
+        k, m = len(self.symbols), len(self.strategies)
+        equity = self.equity
+        weights = self.net_qty[:k] * self.prices[:k] / equity
+        warm = self.asset_cov.updates >= self.min_periods
+        values = {}  # (指标, 范围) → (数值, 详情)
+
+        values["daily_pnl", "portfolio"] = (equity / self.day_start_equity - 1, {})
+        var95 = Z95 * math.sqrt(max(self.asset_cov.quad(weights), 0.0)) * self.horizon if k else 0.0
+        if warm:
+            values["var95", "portfolio"] = (var95, {})
+        top = int(np.argmax(np.abs(weights))) if k else None
+        concentration = float(abs(weights[top])) if k else 0.0
+        values["concentration", "portfolio"] = (
+            concentration, {"symbol": self._names[top]} if k else {})
+
+        drawdown = np.zeros(0)
+        if m:
+            nav = self.capital[:m] + self.pnl[:m]
+            np.maximum(self.peak[:m], nav, out=self.peak[:m])
+            drawdown = nav / self.peak[:m] - 1
+            for strategy_id, s in self.strategies.items():
+                values["strategy_dd", strategy_id] = (float(drawdown[s]), {})
+
+        correlation, pair = self._max_correlation() if warm and m > 1 else (None, None)
+        if correlation is not None:
+            values["correlation", "portfolio"] = (correlation, {"pair": pair})
+
+        self.metrics = {
+            "equity": round(equity, 2), "gross_exposure": round(float(np.abs(weights).sum()), 6),
+            "daily_pnl": round(values["daily_pnl", "portfolio"][0], 6), "var95": round(var95, 6),
+            "concentration": round(concentration, 6),
+            "max_strategy_dd": round(float(drawdown.min()), 6) if m else 0.0,
+            "max_correlation": round(correlation, 6) if correlation is not None else None,
+            "positions": int(np.count_nonzero(self.qty[:m, :k])) if m else 0,
+        }
+        return self._judge(ts, values)
+
+    def _max_correlation(self):
+        """各策略收益相关系数的最大一对 (忽略零方差策略)"""
+        m = len(self.strategies)
+        sd = np.sqrt(np.maximum(self.strategy_cov.variance(), 0.0))
+        active = sd > 0
+        if active.sum() < 2:
+            return None, None
+        corr = self.strategy_cov.matrix() / np.outer(np.where(active, sd, 1.0), np.where(active, sd, 1.0))
+        corr[~active, :] = -np.inf
+        corr[:, ~active] = -np.inf
+        corr[np.tril_indices(m)] = -np.inf
+        flat = int(np.argmax(corr))
+        a, b = divmod(flat, m)
+        ids = list(self.strategies)
+        return float(min(corr[a, b], 1.0)), [ids[a], ids[b]]
+
+    def _judge(self, ts, values):
+        alerts = []
+        for (metric, scope), (value, detail) in values.items():
+            tiers = self.tiers.get(metric)
+            if not tiers:
+                continue
+            level, threshold = classify(tiers, value)
+            previous = self.levels.get((metric, scope), "OK")
+            if level == previous:
+                continue
+            self.levels[metric, scope] = level
+            alert = {"time": format_timestamp(ts), "metric": metric, "scope": scope, "level": level,
+                     "previous": previous, "value": round(value, 6), "threshold": threshold, **detail}
+            alerts.append(alert)
+            if level == "HALT" and not self.halted:
+                self.halted = True
+                self.halt_reason = alert
+        self.alerts.extend(alerts)
+        for alert in alerts:
+            for callback in self.listeners:
+                callback(alert)
+        return alerts
+
+    def level(self):
+        """当前最高级别"""
+        if self.halted:
+            return "HALT"
+        return max(self.levels.values(), key=LEVELS.index, default="OK")
+
+    def status(self):
+        """#b-risk 限额状态"""
+        return {
+            "level": self.level(),
+            "halted": self.halted,
+            "halt_reason": self.halt_reason,
+            "metrics": self.metrics,
+            "breaches": [{"metric": metric, "scope": scope, "level": level}
+                         for (metric, scope), level in self.levels.items() if level != "OK"],
+            "check_latency": {k: v for k, v in self.latency.to_dict().items() if k != "histogram"},
+        }
+
+    def positions(self):
+        """{strategy_id: {symbol: qty}} (trading/positions 快照)"""
+        symbols = self._names
+        return {strategy_id: {symbols[i]: float(self.qty[s, i])
+                              for i in np.flatnonzero(self.qty[s, :len(symbols)])}
+                for strategy_id, s in self.strategies.items()}
+
+
+def simulate(n_symbols, n_strategies, days, seed=0, risk_params=None, preset_config=None):
+    """合成组合: 每个策略随机持有若干标的, 逐 bar 推进并计时"""
+    from synthetic_market import SyntheticMarket, universe_symbols
+
+    symbols = universe_symbols(n_symbols)
+    columns = SyntheticMarket(symbols, 15, seed, **(preset_config or {})).generate(days)
+    closes = np.stack([columns[s]["close"] for s in symbols], axis=1)
+    timestamps = columns[symbols[0]]["timestamp"]
+    rng = np.random.default_rng([seed, 7])
+    equity = 1_000_000.0
+    engine = RiskEngine(risk_params, equity,
+                        allocations={f"strategy_{j:03d}": equity / n_strategies for j in range(n_strategies)})
+    per_strategy = max(1, n_symbols // n_strategies * 2)
+    for j in range(n_strategies):
+        for i in rng.choice(n_symbols, per_strategy, replace=False):
+            qty = int(equity / n_strategies / per_strategy * 0.8 / closes[0, i])
+            engine.on_fill(f"strategy_{j:03d}", symbols[i], qty, float(closes[0, i]))
+    for t in range(len(timestamps)):
+        engine.on_bar(int(timestamps[t]), dict(zip(symbols, closes[t].tolist())))
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental Guardian Risk Engine (synthetic stress check)")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--strategies", type=int, default=50)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--preset", choices=("default", "stress", "calm"), default="default")
+    parser.add_argument("--output", default=None, help="Output JSON path")
+    args = parser.parse_args()
+
+    from synthetic_market import PRESETS
+
+    start = time.perf_counter()
+    engine = simulate(args.symbols, args.strategies, args.days, args.seed, preset_config=PRESETS[args.preset])
+    result = {
+        "symbols": args.symbols, "strategies": args.strategies, "bars": engine.latency.count,
+        **engine.status(),
+        "alerts": len(engine.alerts),
+        "recent_alerts": engine.alerts[-20:],
+        "total_seconds": round(time.perf_counter() - start, 3),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return 1 if engine.halted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""
+回测结果稳健性评估 (bootstrap / Monte Carlo)
+run_backtest 只给出 Sharpe / 最大回撤 / 胜率的单点估计, 晋级阈值 (staging_min_sharpe,
+staging_max_drawdown) 与 strategy_dd_* 限额都直接对照这一个数。本模块对同一条回测的
+bar 收益与成交做批量 NumPy 重抽样, 给出置信区间和"未达到各阈值"的概率:
+
+- 平稳块 bootstrap (Politis-Romano): 块长服从均值为 block_bars 的几何分布, 首尾循环衔接,
+  保留收益的短程自相关; 每个样本重算 Sharpe / 最大回撤 / 总收益
+- 成交顺序置换: 成交按平仓时权益折算为收益率后随机重排, 得到仅由顺序运气造成的
+  回撤分布 (只在平仓点计权益, 不含持仓期间的浮亏)
+- 成交 bootstrap: 有放回抽取成交, 得到胜率 / 盈亏比 / 平均收益率的置信区间
+- 缩水 Sharpe (Bailey & López de Prado, 可选): 按试验次数扣除多重检验的期望最大 Sharpe,
+  给出真实 Sharpe > 0 的概率
+
+全部样本按批生成索引矩阵一次计算 (每批约 BATCH_ELEMENTS 个元素, 控制内存), 无 Python 循环。
+块长默认取 max(n^(1/3), 最长持仓周期对应的 bar 数), 上限 n/4。
+
+用法:
+    python scripts/robustness.py strategies/candidates/seed_momentum_rsi_v1.py --months 6 \\
+        --resamples 5000 --trials 40
+    python scripts/run_backtest.py <strategy> --months 6 --robustness --trials 40
+"""
+import argparse
+import json
+import math
+import sys
+from datetime import datetime
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+
+from metrics import infer_periods_per_year
+from portfolio_backtest import load_risk_params
+from run_backtest import (compute_signals, load_columns, load_strategy, primary_symbol, simulate_trades,
+                          summarize)
+
+BATCH_ELEMENTS = 1 << 21
+EULER_GAMMA = 0.5772156649015329
+DD_LIMITS = ("strategy_dd_warning", "strategy_dd_critical", "strategy_dd_halt")
+NORMAL = NormalDist()
+
+
+# ── 重抽样 ──
+
+def stationary_indices(n, resamples, block_bars, rng):
+    """
+    平稳块 bootstrap 的索引矩阵 (resamples, n), 取值在 [0, 2n), 对应首尾相接的两倍序列
+    块长为几何分布, 全部样本拼成一条长序列一次生成, 每个样本的首个位置强制开始新块
+    """
+    total = resamples * n
+    p = 1.0 / block_bars
+    count = int(total * p * 1.1) + 64
+    ends = np.cumsum(rng.geometric(p, size=count))
+    while ends[-1] < total:
+        ends = np.concatenate((ends, ends[-1] + np.cumsum(rng.geometric(p, size=count))))
+    starts = np.sort(np.concatenate((ends[ends < total], np.arange(0, total, n))))
+    starts = starts[np.concatenate(([True], np.diff(starts) > 0))]
+    lengths = np.diff(np.append(starts, total))
+    shift = rng.integers(0, n, size=len(starts)) - starts
+    return (np.repeat(shift, lengths) + np.arange(total)).reshape(resamples, n)
+
+
+def path_stats(returns, periods_per_year):
+    """每行一条收益路径, 返回 (Sharpe, 最大回撤, 总收益); 回撤以初始权益为首个峰值"""
+    rows, n = returns.shape
+    mean = returns.mean(axis=1)
+    std = np.sqrt(np.maximum(np.einsum("ij,ij->i", returns, returns) / n - mean * mean, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 单遍方差有舍入误差, 常数收益路径按零波动处理
+        sharpe = np.where(std > 1e-12, mean / std * math.sqrt(periods_per_year), 0.0)
+    equity = np.empty((rows, n + 1))
+    equity[:, 0] = 1.0
+    np.add(returns, 1.0, out=equity[:, 1:])
+    np.cumprod(equity, axis=1, out=equity)
+    ratio = np.maximum.accumulate(equity, axis=1)
+    np.divide(equity, ratio, out=ratio)
+    return sharpe, 1.0 - ratio.min(axis=1), equity[:, -1] - 1.0
+
+
+def trade_returns(trades, initial_capital):
+    """成交盈亏按平仓前已实现权益折算为收益率 (逐笔复利后等于已实现总收益)"""
+    pnl = np.fromiter((t["pnl"] for t in trades), dtype=np.float64, count=len(trades))
+    before = initial_capital + np.concatenate(([0.0], np.cumsum(pnl)[:-1]))
+    return pnl / before
+
+
+def _batches(resamples, n):
+    size = max(1, BATCH_ELEMENTS // max(n, 1))
+    for start in range(0, resamples, size):
+        yield min(size, resamples - start)
+
+
+def block_bootstrap(returns, periods_per_year, resamples, block_bars, rng):
+    n = len(returns)
+    doubled = np.concatenate((returns, returns))
+    parts = [path_stats(doubled[stationary_indices(n, size, block_bars, rng)], periods_per_year)
+             for size in _batches(resamples, n)]
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def trade_order_drawdowns(returns, resamples, rng):
+    """成交顺序随机置换后的最大回撤分布"""
+    m = len(returns)
+    parts = []
+    for size in _batches(resamples, m):
+        order = np.argsort(rng.random((size, m)), axis=1)
+        parts.append(path_stats(returns[order], 1.0)[1])
+    return np.concatenate(parts)
+
+
+def trade_bootstrap(pnl_pct, resamples, rng):
+    """有放回抽取成交, 返回 (胜率, 盈亏比, 平均收益率)"""
+    m = len(pnl_pct)
+    win_rate, profit_factor, average = [], [], []
+    for size in _batches(resamples, m):
+        sample = pnl_pct[rng.integers(0, m, size=(size, m))]
+        gains = np.where(sample > 0, sample, 0.0).sum(axis=1)
+        losses = -np.where(sample < 0, sample, 0.0).sum(axis=1)
+        win_rate.append((sample > 0).mean(axis=1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profit_factor.append(np.where(losses > 0, gains / losses, np.inf))
+        average.append(sample.mean(axis=1))
+    return np.concatenate(win_rate), np.concatenate(profit_factor), np.concatenate(average)
+
+
+# ── 汇总 ──
+
+def _round(value, digits=4):
+    return round(float(value), digits) if math.isfinite(value) else None
+
+
+def describe(samples, point, confidence):
+    """点估计 + 重抽样均值 / 中位数 / 置信区间 (非有限样本如无亏损时的盈亏比按分位数处理)"""
+    tail = (1.0 - confidence) / 2 * 100
+    low, median, high = np.percentile(samples, [tail, 50.0, 100.0 - tail])
+    finite = samples[np.isfinite(samples)]
+    return {"point": _round(point), "mean": _round(finite.mean()) if len(finite) else None,
+            "median": _round(median), "ci": [_round(low), _round(high)]}
+
+
+def deflated_sharpe(returns, trials, periods_per_year, trial_sharpe_std=None):
+    """
+    缩水 Sharpe: 真实 Sharpe 超过 trials 次独立试验的期望最大 Sharpe 的概率
+    trial_sharpe_std 为各试验年化 Sharpe 的标准差; 缺省时用 Sharpe 估计量自身的标准误
+    """
+    n = len(returns)
+    std = float(returns.std())
+    if n < 3 or std == 0:
+        return None
+    sr = float(returns.mean()) / std
+    z = (returns - returns.mean()) / std
+    skew, kurtosis = float((z ** 3).mean()), float((z ** 4).mean())
+    sr_var = max((1.0 - skew * sr + (kurtosis - 1.0) / 4.0 * sr * sr) / (n - 1), 1e-18)
+    sigma = trial_sharpe_std / math.sqrt(periods_per_year) if trial_sharpe_std else math.sqrt(sr_var)
+    expected_max = 0.0
+    if trials > 1:
+        expected_max = sigma * ((1.0 - EULER_GAMMA) * NORMAL.inv_cdf(1.0 - 1.0 / trials)
+                                + EULER_GAMMA * NORMAL.inv_cdf(1.0 - 1.0 / (trials * math.e)))
+    ann = math.sqrt(periods_per_year)
+    return {
+        "trials": trials,
+        "sharpe_ratio": round(sr * ann, 4),
+        "expected_max_sharpe": round(expected_max * ann, 4),
+        "skew": round(skew, 4),
+        "kurtosis": round(kurtosis, 4),
+        "deflated_sharpe": round(NORMAL.cdf((sr - expected_max) / math.sqrt(sr_var)), 4),
+    }
+
+
+def evaluate(equity_curve, trades, initial_capital, periods_per_year, resamples=2000, block_bars=None,
+             confidence=0.90, trials=None, trial_sharpe_std=None, risk_params=None, seed=0):
+    """
+    对一条回测 (权益曲线 + 成交) 做稳健性评估
+
+    Args:
+        block_bars: 平稳块 bootstrap 的平均块长 (默认 n^(1/3))
+        trials: 产生该候选所做的试验次数, 给出时计算缩水 Sharpe
+        risk_params: risk-params.json 内容, 用于读取晋级阈值与 strategy_dd_* 限额
+    """
+    equity = np.asarray(equity_curve, dtype=np.float64)
+    prev = equity[:-1]
+    valid = prev > 0
+    returns = (equity[1:][valid] - prev[valid]) / prev[valid]
+    n = len(returns)
+    if n < 2:
+        return {"status": "error", "message": f"收益序列过短: {n} 根 bar"}
+    risk_params = risk_params or load_risk_params()
+    promotion, limits = risk_params["promotion"], risk_params["risk_limits"]
+    if block_bars is None:
+        block_bars = n ** (1 / 3)
+    block_bars = float(min(max(block_bars, 1.0), max(n / 4, 1.0)))
+    rng = np.random.default_rng(seed)
+
+    point_sharpe, point_dd, point_return = (float(v[0]) for v in path_stats(returns[None, :], periods_per_year))
+    sharpe, max_dd, total_return = block_bootstrap(returns, periods_per_year, resamples, block_bars, rng)
+    report = {
+        "resamples": resamples,
+        "block_bars": round(block_bars, 2),
+        "confidence": confidence,
+        "seed": seed,
+        "bootstrap": {
+            "sharpe_ratio": describe(sharpe, point_sharpe, confidence),
+            "max_drawdown": describe(max_dd, point_dd, confidence),
+            "total_return": describe(total_return, point_return, confidence),
+        },
+    }
+    gates = {
+        "staging_min_sharpe": {"threshold": promotion["staging_min_sharpe"],
+                               "point_pass": point_sharpe >= promotion["staging_min_sharpe"],
+                               "prob_fail": _round((sharpe < promotion["staging_min_sharpe"]).mean())},
+    }
+    # 回撤阈值: staging_max_drawdown 为正数, strategy_dd_* 为负数 (按绝对值比较)
+    dd_limits = {"staging_max_drawdown": promotion["staging_max_drawdown"],
+                 **{name: abs(limits[name]) for name in DD_LIMITS if name in limits}}
+
+    order_dd = None
+    if trades:
+        per_trade = trade_returns(trades, initial_capital)
+        pnl_pct = np.fromiter((t["pnl_pct"] for t in trades), dtype=np.float64, count=len(trades))
+        order_dd = trade_order_drawdowns(per_trade, resamples, rng)
+        win_rate, profit_factor, average = trade_bootstrap(pnl_pct, resamples, rng)
+        gains, losses = pnl_pct[pnl_pct > 0].sum(), -pnl_pct[pnl_pct < 0].sum()
+        report["trade_order"] = {
+            "trades": len(trades),
+            "max_drawdown": describe(order_dd, path_stats(per_trade[None, :], 1.0)[1][0], confidence),
+        }
+        report["trades"] = {
+            "win_rate": describe(win_rate, (pnl_pct > 0).mean(), confidence),
+            "profit_factor": describe(profit_factor, gains / losses if losses > 0 else math.inf, confidence),
+            "avg_pnl_pct": describe(average, pnl_pct.mean(), confidence),
+        }
+
+    for name, threshold in dd_limits.items():
+        gate = {"threshold": threshold, "point_pass": point_dd <= threshold,
+                "prob_fail": _round((max_dd > threshold).mean())}
+        if order_dd is not None:
+            gate["prob_fail_trade_order"] = _round((order_dd > threshold).mean())
+        gates[name] = gate
+    report["gates"] = gates
+    if trials:
+        report["deflated_sharpe"] = deflated_sharpe(returns, trials, periods_per_year, trial_sharpe_std)
+    return {"status": "success", **report}
+
+
+# ── 回测入口 ──
+
+def run_robustness(strategy_path, days=30, initial_capital=100000.0, data_dir=None, timeframe="15Min",
+                   resamples=2000, block_bars=None, confidence=0.90, trials=None, trial_sharpe_std=None,
+                   seed=0):
+    """单标的回测后做稳健性评估; 块长缺省时不短于最长持仓周期"""
+    module = load_strategy(strategy_path)
+    meta = module.STRATEGY_META
+    from event_engine import ALT_SOURCES
+    if any(source in ALT_SOURCES for source in meta["signal_sources"]):
+        return {"status": "error", "message": "另类数据策略 (事件驱动引擎) 暂不支持稳健性评估"}
+    try:
+        symbol = primary_symbol(meta)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    params = meta["params"]
+    columns = load_columns(symbol, days, data_dir, timeframe)
+    timestamps = np.asarray(columns["timestamp"])
+    actions, confidences = compute_signals(module, columns, params)
+    trades, equity_curve, exposure_curve = simulate_trades(columns["close"], actions, confidences,
+                                                           params, initial_capital)
+    if not trades:
+        return {"status": "no_trades", "message": "回测期间无交易"}
+
+    periods_per_year = infer_periods_per_year(timestamps)
+    if block_bars is None and len(timestamps) > 1:
+        spacing = max(float(np.median(np.diff(timestamps))) / 60e9, 1.0)
+        holding = math.ceil(meta["holding_period_minutes"][1] / spacing)
+        block_bars = max((len(equity_curve) - 1) ** (1 / 3), holding)
+    return {
+        "status": "success",
+        "mode": "robustness",
+        "strategy_id": meta["id"],
+        "backtest_days": days,
+        "initial_capital": initial_capital,
+        **summarize(trades, equity_curve, initial_capital, exposure_curve, periods_per_year),
+        "robustness": evaluate(equity_curve, trades, initial_capital, periods_per_year, resamples,
+                               block_bars, confidence, trials, trial_sharpe_std, seed=seed),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def add_arguments(parser):
+    """稳健性评估参数 (run_backtest.py --robustness 复用)"""
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap/permutation sample count")
+    parser.add_argument("--block-bars", type=float, default=None,
+                        help="Mean block length for the stationary bootstrap (default: max(n^(1/3), holding period))")
+    parser.add_argument("--confidence", type=float, default=0.90, help="Confidence interval level")
+    parser.add_argument("--trials", type=int, default=None,
+                        help="Number of trials behind this candidate; enables the deflated Sharpe")
+    parser.add_argument("--trial-sharpe-std", type=float, default=None,
+                        help="Std of annualized Sharpe across trials (default: estimator standard error)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def run_from_args(args):
+    """按命令行参数执行 (供 run_backtest.py 复用)"""
+    return run_robustness(args.strategy, args.days, args.capital, args.data_dir, args.timeframe,
+                          args.resamples, args.block_bars, args.confidence, args.trials,
+                          args.trial_sharpe_std, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bootstrap / Monte Carlo Robustness of a Backtest")
+    parser.add_argument("strategy", help="Path to strategy .py file")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--months", type=int, default=None, help="Backtest length in months (30 days each)")
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--output", default=None, help="Output JSON path")
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); simulated bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.months:
+        args.days = args.months * 30
+
+    result = run_from_args(args)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    gate = result.get("robustness", {}).get("gates", {}).get("staging_min_sharpe", {})
+    return 0 if result.get("status") == "success" and gate.get("prob_fail", 1.0) < 0.5 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,85 +1,172 @@
 """
 回测运行器
 用于微循环/宏循环的策略回测验证。
-支持从 Alpaca 获取历史数据或使用本地 CSV。
+支持本地列式 K 线缓存 (bar_store.py, 由 Alpaca/CSV 导入) 或模拟数据。
+
+策略可选导出列式批量接口 (一次调用生成全部信号, 避免逐 bar 切片):
+
+    generate_signals_batch(close, high, low, volume, params, window) -> (actions, confidences)
+
+输入为等长 NumPy 数组, actions 为 int8 数组 (1=BUY, -1=SELL, 0=HOLD),
+confidences 为 float64 数组; 第 i 个元素必须等价于
+generate_signal(bars[i - window + 1 : i + 1], params) 的结果。
+未导出该接口时, 若策略导出 create_signal_state(params) (见 indicators.py),
+则逐 bar 增量更新状态; 否则回退到逐 bar 调用 generate_signal。
+
+signal_sources 声明了另类数据 (期权异动 / 内幕 / 财报) 的策略由事件驱动引擎
+(event_engine.py) 回测, 另类数据来自 --alt-data-dir。
+
+--profile 在结果中附加各阶段耗时与信号调用延迟分布 (profiler.py)。
+--robustness 在结果中附加 bootstrap / 成交顺序置换的置信区间与各阈值未达标概率 (robustness.py)。
 """
 import json
-import importlib.util
 import argparse
 import sys
-from datetime import datetime, timedelta
+import time
+from contextlib import nullcontext
+from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+from bar_store import BarStore, columns_to_bars, parse_timestamp
+from metrics import compute_metrics, infer_periods_per_year
+from result_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache, backtest_key
+from strategy_registry import registry
+from synthetic_market import SyntheticMarket, generate_columns
+
+# 回测语义 (撮合/指标/数据生成) 变化时递增, 使结果缓存失效
+ENGINE_VERSION = "4"
+LOOKBACK = 50  # 每次信号使用 LOOKBACK + 1 根 bar
+ACTION_CODES = {"BUY": 1, "SELL": -1, "HOLD": 0}
+# 仅影响撮合 (simulate_trades) 而不影响信号的参数
+EXECUTION_PARAMS = ("stop_loss_pct", "take_profit_pct", "max_position_pct")
+
 
 def load_strategy(strategy_path: str):
-    """动态加载策略模块"""
-    spec = importlib.util.spec_from_file_location("strategy", strategy_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+    """加载策略模块 (strategy_registry.py: 唯一模块名, 按内容缓存, 文件变化时重新加载)"""
+    return registry.get(strategy_path)
 
 
 def simulate_bars(symbol: str, days: int = 30, freq_minutes: int = 15):
     """
-    生成模拟 K 线数据 (冷启动用)
+    生成模拟 K 线数据 (冷启动用, scripts/synthetic_market.py)
     生产环境应替换为 Alpaca API 调用:
     GET https://data.alpaca.markets/v2/stocks/{symbol}/bars
     """
-    import random
-    random.seed(42)
-    bars = []
-    price = 150.0
-    t = datetime.utcnow() - timedelta(days=days)
-    for _ in range(days * (390 // freq_minutes)):  # 390 min per trading day
-        change = random.gauss(0, 0.002)
-        price *= (1 + change)
-        bars.append({
-            "timestamp": t.isoformat() + "Z",
-            "open": round(price * (1 - abs(change) / 2), 2),
-            "high": round(price * (1 + abs(change)), 2),
-            "low": round(price * (1 - abs(change)), 2),
-            "close": round(price, 2),
-            "volume": random.randint(10000, 500000),
-        })
-        t += timedelta(minutes=freq_minutes)
-    return bars
-
-
-def run_backtest(strategy_path: str, days: int = 30, initial_capital: float = 100000.0):
-    """执行回测"""
-    module = load_strategy(strategy_path)
-    meta = module.STRATEGY_META
-    params = meta["params"]
-    symbol = meta["symbols"][0]
+    market = SyntheticMarket([symbol], freq_minutes)
+    return columns_to_bars(market.generate(days)[symbol])
+
+
+def bars_to_columns(bars):
+    """将 bar 字典列表转换为列式 NumPy 数组"""
+    return {
+        "timestamp": np.fromiter((parse_timestamp(b["timestamp"]) for b in bars),
+                                 dtype=np.int64, count=len(bars)),
+        "open": np.fromiter((b["open"] for b in bars), dtype=np.float64, count=len(bars)),
+        "close": np.fromiter((b["close"] for b in bars), dtype=np.float64, count=len(bars)),
+        "high": np.fromiter((b["high"] for b in bars), dtype=np.float64, count=len(bars)),
+        "low": np.fromiter((b["low"] for b in bars), dtype=np.float64, count=len(bars)),
+        "volume": np.fromiter((b["volume"] for b in bars), dtype=np.int64, count=len(bars)),
+    }
+
+
+def load_columns(symbol: str, days: int = 30, data_dir=None, timeframe: str = "15Min"):
+    """
+    获取列式行情: 本地 K 线缓存中有该标的时取最后 days 天 (mmap, 不复制),
+    否则回退到模拟数据。
+    """
+    if data_dir is not None:
+        store = BarStore(data_dir)
+        if store.has(symbol, timeframe):
+            return store.open(symbol, timeframe).last_days(days).columns
+    return generate_columns(symbol, days, timeframe)
+
+
+def primary_symbol(meta, symbols=None):
+    """单标的回测使用的标的: STRATEGY_META 列表的第一个; symbols="dynamic" 时取 symbols 的第一个"""
+    if isinstance(meta["symbols"], list):
+        return meta["symbols"][0]
+    if symbols:
+        return symbols[0]
+    raise ValueError(f'symbols="{meta["symbols"]}" 的策略没有固定标的, 需显式指定 (run_backtest.py --symbols)')
 
-    bars = simulate_bars(symbol, days)
-    if len(bars) < 50:
-        return {"status": "error", "message": "数据不足"}
 
+def compute_signals(module, columns, params, bars=None, profiler=None):
+    """
+    生成整段行情的信号数组 (actions, confidences)
+    优先级: generate_signals_batch > create_signal_state > 逐 bar generate_signal
+    profiler 不为 None 时记录信号调用延迟 (profiler.py)
+    """
+    window = LOOKBACK + 1
+    batch = getattr(module, "generate_signals_batch", None)
+    if batch is not None:
+        start = time.perf_counter_ns()
+        actions, confidences = batch(columns["close"], columns["high"], columns["low"],
+                                     columns["volume"], params, window)
+        if profiler is not None:
+            profiler.record_batch(time.perf_counter_ns() - start, len(columns["close"]))
+        return np.asarray(actions, dtype=np.int8), np.asarray(confidences, dtype=np.float64)
+
+    if bars is None:
+        bars = columns_to_bars(columns)
+    actions = np.zeros(len(bars), dtype=np.int8)
+    confidences = np.zeros(len(bars), dtype=np.float64)
+    create_state = getattr(module, "create_signal_state", None)
+    if create_state is not None:
+        state = create_state(params)
+        update = state.update
+        if profiler is not None:
+            update = profiler.timed(update, "state")
+            profiler.count_bars(len(bars))
+        for i, bar in enumerate(bars):
+            signal = update(bar)
+            if i >= LOOKBACK:
+                actions[i] = ACTION_CODES.get(signal["action"], 0)
+                confidences[i] = signal["confidence"]
+        return actions, confidences
+
+    generate = module.generate_signal
+    if profiler is not None:
+        generate = profiler.timed(generate)
+        profiler.count_bars(len(bars) - LOOKBACK)
+    for i in range(LOOKBACK, len(bars)):
+        signal = generate(bars[i - LOOKBACK : i + 1], params=params)
+        actions[i] = ACTION_CODES.get(signal["action"], 0)
+        confidences[i] = signal["confidence"]
+    return actions, confidences
+
+
+def simulate_trades(closes, actions, confidences, params, initial_capital):
+    """按信号逐 bar 撮合, 返回 (trades, equity_curve, exposure_curve)"""
     capital = initial_capital
     position = 0
     entry_price = 0.0
     trades = []
     equity_curve = [capital]
+    exposure_curve = []
 
-    for i in range(50, len(bars)):
-        window = bars[i - 50 : i + 1]
-        signal = module.generate_signal(window, params)
-        current_price = bars[i]["close"]
+    closes = closes.tolist()
+    actions = actions.tolist()
+    confidences = confidences.tolist()
+    for i in range(LOOKBACK, len(closes)):
+        action = actions[i]
+        current_price = closes[i]
 
-        if signal["action"] == "BUY" and position == 0 and signal["confidence"] >= 0.5:
+        if action == 1 and position == 0 and confidences[i] >= 0.5:
             qty = int(capital * params["max_position_pct"] / current_price)
             if qty > 0:
                 position = qty
                 entry_price = current_price
                 capital -= qty * current_price
 
-        elif signal["action"] == "SELL" and position > 0:
+        elif action == -1 and position > 0:
             pnl = position * (current_price - entry_price)
             capital += position * current_price
             trades.append({
                 "entry": entry_price,
                 "exit": current_price,
+                "qty": position,
                 "pnl": round(pnl, 2),
                 "pnl_pct": round((current_price - entry_price) / entry_price, 4),
             })
@@ -94,6 +181,7 @@ def run_backtest(strategy_path: str, days: int = 30, initial_capital: float = 10
                 trades.append({
                     "entry": entry_price,
                     "exit": current_price,
+                    "qty": position,
                     "pnl": round(pnl, 2),
                     "pnl_pct": round(pnl_pct, 4),
                 })
@@ -101,55 +189,177 @@ def run_backtest(strategy_path: str, days: int = 30, initial_capital: float = 10
 
         total_value = capital + position * current_price
         equity_curve.append(total_value)
+        exposure_curve.append(position * current_price)
+
+    return trades, equity_curve, exposure_curve
+
+
+def run_backtest(strategy_path: str, days: int = 30, initial_capital: float = 100000.0,
+                 data_dir=None, timeframe: str = "15Min", alt_data_dir=None, symbols=None,
+                 profiler=None):
+    """执行回测 (声明另类数据源的策略交给事件驱动引擎)"""
+    phase = profiler.phase if profiler is not None else (lambda name: nullcontext())
+    with phase("load_strategy"):
+        module = load_strategy(strategy_path)
+    meta = module.STRATEGY_META
+    from event_engine import ALT_SOURCES, run_event_backtest
+    if any(source in ALT_SOURCES for source in meta["signal_sources"]):
+        return run_event_backtest(strategy_path, days, initial_capital, data_dir, timeframe,
+                                  alt_data_dir, symbols, profiler=profiler)
+    params = meta["params"]
+    try:
+        symbol = primary_symbol(meta, symbols)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    with phase("load_data"):
+        columns = load_columns(symbol, days, data_dir, timeframe)
+    if len(columns["close"]) < LOOKBACK:
+        return {"status": "error", "message": "数据不足"}
+
+    with phase("signals"):
+        actions, confidences = compute_signals(module, columns, params, profiler=profiler)
+    with phase("simulate"):
+        trades, equity_curve, exposure_curve = simulate_trades(columns["close"], actions,
+                                                               confidences, params, initial_capital)
 
     # 计算指标
     if not trades:
         return {"status": "no_trades", "message": "回测期间无交易"}
 
-    wins = [t for t in trades if t["pnl"] > 0]
-    total_return = (equity_curve[-1] - initial_capital) / initial_capital
-    max_dd = 0.0
-    peak = equity_curve[0]
-    for v in equity_curve:
-        peak = max(peak, v)
-        dd = (peak - v) / peak
-        max_dd = max(max_dd, dd)
-
-    returns = [(equity_curve[i] - equity_curve[i-1]) / equity_curve[i-1]
-               for i in range(1, len(equity_curve)) if equity_curve[i-1] > 0]
-    avg_ret = sum(returns) / len(returns) if returns else 0
-    std_ret = (sum((r - avg_ret)**2 for r in returns) / len(returns))**0.5 if returns else 1
-    sharpe = (avg_ret / std_ret) * (252 * 26)**0.5 if std_ret > 0 else 0  # annualized
-
+    with phase("metrics"):
+        metrics = summarize(trades, equity_curve, initial_capital, exposure_curve,
+                            infer_periods_per_year(columns["timestamp"]))
     return {
         "status": "success",
         "strategy_id": meta["id"],
         "backtest_days": days,
         "initial_capital": initial_capital,
-        "final_value": round(equity_curve[-1], 2),
-        "total_return": round(total_return, 4),
-        "sharpe_ratio": round(sharpe, 2),
-        "max_drawdown": round(max_dd, 4),
-        "total_trades": len(trades),
-        "win_rate": round(len(wins) / len(trades), 2) if trades else 0,
-        "profit_factor": round(
-            sum(t["pnl"] for t in wins) / abs(sum(t["pnl"] for t in trades if t["pnl"] < 0))
-            if any(t["pnl"] < 0 for t in trades) else 999, 2
-        ),
-        "avg_pnl_pct": round(sum(t["pnl_pct"] for t in trades) / len(trades), 4),
+        **metrics,
         "timestamp": datetime.utcnow().isoformat() + "Z",
     }
 
 
+def summarize(trades, equity_curve, initial_capital, exposure_curve=None, periods_per_year=None):
+    """由成交记录和权益曲线计算绩效指标 (见 metrics.py)"""
+    return compute_metrics(equity_curve, trades, exposure_curve, periods_per_year, initial_capital)
+
+
+def run_cached(strategy_path, days=30, initial_capital=100000.0, data_dir=None, timeframe="15Min",
+               portfolio=False, workers=None, cache=None, alt_data_dir=None, symbols=None,
+               profiler=None):
+    """带结果缓存的回测入口 (cache 为 None 或需要剖析时直接回测)"""
+    if profiler is not None:
+        cache = None
+    key = None
+    if cache is not None:
+        key = backtest_key(strategy_path, "portfolio" if portfolio else "single", days,
+                           initial_capital, data_dir, timeframe, engine_version=ENGINE_VERSION,
+                           symbols=symbols, alt_data_dir=alt_data_dir)
+        result = cache.get(key)
+        if result is not None:
+            result["cache_hit"] = True
+            return result
+
+    if portfolio:
+        from portfolio_backtest import run_portfolio_backtest
+        with profiler.phase("portfolio") if profiler is not None else nullcontext():
+            result = run_portfolio_backtest(strategy_path, days, initial_capital, data_dir,
+                                            timeframe, workers)
+    else:
+        result = run_backtest(strategy_path, days, initial_capital, data_dir, timeframe,
+                              alt_data_dir, symbols, profiler)
+    if cache is not None and result.get("status") in ("success", "no_trades"):
+        cache.put(key, result)
+    return result
+
+
 def main():
     parser = argparse.ArgumentParser(description="Strategy Backtest Runner")
-    parser.add_argument("strategy", help="Path to strategy .py file")
+    parser.add_argument("strategy", nargs="?", help="Path to strategy .py file")
+    parser.add_argument("--strategy-dir", default=None,
+                        help="Validate every strategy module in this directory (batch mode)")
+    parser.add_argument("--files", default=None,
+                        help="With --strategy-dir: comma-separated strategy files to validate (e.g. changed in a PR)")
     parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--months", type=int, default=None, help="Backtest length in months (30 days each)")
     parser.add_argument("--capital", type=float, default=100000.0)
-    parser.add_argument("--output", default=None, help="Output JSON path")
+    parser.add_argument("--output", default=None,
+                        help="Output JSON path (.jsonl for one line per strategy in batch mode)")
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); simulated bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    parser.add_argument("--alt-data-dir", default=None,
+                        help="Time-sorted alt-data JSONL files for the event-driven engine (see event_engine.py)")
+    parser.add_argument("--symbols", default=None,
+                        help="Comma-separated universe for symbols=\"dynamic\" strategies")
+    parser.add_argument("--portfolio", action="store_true",
+                        help="Trade every symbol in STRATEGY_META under risk-params limits")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Process count for --portfolio / --strategy-dir")
+    parser.add_argument("--walk-forward", action="store_true",
+                        help="Rolling out-of-sample evaluation (see walk_forward.py for options)")
+    parser.add_argument("--timeout", type=float, default=600.0,
+                        help="Per-strategy timeout in seconds for --strategy-dir")
+    parser.add_argument("--profile", action="store_true",
+                        help="Add per-phase timings and signal-call latency to the result (bypasses the cache)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="With --profile: track peak memory per phase via tracemalloc (slow)")
+    parser.add_argument("--profile-output", default=None,
+                        help="With --profile: write cProfile stats to this path (python -m pstats)")
+    parser.add_argument("--max-bar-latency-us", type=float, default=None,
+                        help="Per-bar signal latency budget; fail when exceeded (implies --profile)")
+    parser.add_argument("--robustness", action="store_true",
+                        help="Bootstrap/permutation confidence intervals and gate probabilities (see robustness.py)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the backtest result cache")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20)
+    import robustness
+    import walk_forward
+    walk_forward.add_arguments(parser.add_argument_group("walk-forward"))
+    robustness.add_arguments(parser.add_argument_group("robustness"))
     args = parser.parse_args()
+    if not args.strategy and not args.strategy_dir:
+        parser.error("strategy path or --strategy-dir is required")
+    if args.months:
+        args.days = args.months * 30
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir, int(args.cache_max_mb * 2**20))
+    if args.strategy_dir:
+        from batch_validate import format_report, validate_directory
+        report = validate_directory(args.strategy_dir, args.days, args.capital, args.data_dir,
+                                    args.timeframe, args.workers, args.timeout, cache,
+                                    args.max_bar_latency_us, args.alt_data_dir,
+                                    args.symbols.split(",") if args.symbols else None,
+                                    args.files.split(",") if args.files else None)
+        output = format_report(report, args.output)
+        print(output)
+        if args.output:
+            Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+            with open(args.output, "w") as f:
+                f.write(output)
+        return 0 if report["failed"] == 0 else 1
 
-    result = run_backtest(args.strategy, args.days, args.capital)
+    if args.walk_forward:
+        result = walk_forward.run_from_args(args)
+        sharpe = result.get("out_of_sample", {}).get("sharpe_ratio", 0)
+    elif args.robustness:
+        result = robustness.run_from_args(args)
+        sharpe = result.get("sharpe_ratio", 0)
+    else:
+        profiler = None
+        if args.profile or args.profile_output or args.profile_memory or args.max_bar_latency_us:
+            from profiler import Profiler
+            profiler = Profiler(args.profile_memory, bool(args.profile_output))
+        result = run_cached(args.strategy, args.days, args.capital, args.data_dir, args.timeframe,
+                            args.portfolio, args.workers, cache, args.alt_data_dir,
+                            args.symbols.split(",") if args.symbols else None, profiler)
+        sharpe = result.get("sharpe_ratio", 0)
+        if profiler is not None:
+            result["profile"] = profiler.report(args.max_bar_latency_us)
+            if args.profile_output:
+                profiler.dump_stats(args.profile_output)
+            profiler.close()
     output = json.dumps(result, indent=2, ensure_ascii=False)
     print(output)
 
@@ -158,7 +368,8 @@ def main():
         with open(args.output, "w") as f:
             f.write(output)
 
-    return 0 if result.get("status") == "success" and result.get("sharpe_ratio", 0) > 0 else 1
+    over_budget = result.get("profile", {}).get("budget", {}).get("exceeded", False)
+    return 0 if result.get("status") == "success" and sharpe > 0 and not over_budget else 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,588 @@
+"""
+knowledge/sources/monitor-list.json 并发条件抓取扫描器
+按各源 scan_interval_hours 调度, asyncio 并发抓取 (每主机 keep-alive 连接池 + 并发上限),
+ETag / Last-Modified 条件请求, 条目按内容哈希去重后追加写入 knowledge/。
+研究阶段不再串行全量下载几十个源。
+
+- 源展开: monitor-list.json 中带 url 的条目各为一个源; arxiv 按 categories 展开为 rss_base + 分类;
+  无 url 的条目 (SSRN 分类, subreddit, SearXNG 聚合等) 记为 manual, 不抓取
+- 抓取: 纯标准库 HTTP/1.1 客户端 (asyncio.open_connection), 同一主机的空闲连接复用,
+  全局与每主机信号量限流; 支持 chunked / gzip / 重定向, 复用的连接已被服务器关闭时换新连接重试一次
+- 条件请求: 保存 ETag / Last-Modified, 下次带 If-None-Match / If-Modified-Since, 304 直接跳过;
+  服务器不给校验头时按正文 sha256 判断未变, 不重新解析
+- 解析: RSS / RDF / Atom 每个 item / entry 一条; HTML 页面取锚文本 ≥ MIN_LINK_TEXT 字符的链接
+  (首次扫描会把页面现有链接全部记入)
+- 去重: 条目内容哈希 (规范化的标题 + 摘要, 无摘要时用链接) 持久化到 .cache/scanner/seen.txt,
+  跨源生效 (arXiv 交叉列表只写一次)
+- 输出: knowledge/<目录>/<源 slug>/<YYYY-MM-DD>.jsonl, 每行一条, retrieval_index.py 可直接检索;
+  academic → papers, industry_blogs → sources (ARCHITECTURE.md §8), 其余 → market
+- 调度: 成功后 next_due = 本次时间 + 间隔; 失败按 BACKOFF_SECONDS × 2^(连续失败 - 1) 退避, 不超过间隔
+
+用法:
+    python scripts/source_scanner.py scan                     # 抓取到期的源
+    python scripts/source_scanner.py scan --force --only arxiv
+    python scripts/source_scanner.py scan --dry-run           # 只列出到期的源
+    python scripts/source_scanner.py run --max-sleep 600      # 常驻: 睡到最近的到期时间
+    python scripts/source_scanner.py status
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import ssl
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from xml.etree import ElementTree
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_LIST = REPO_ROOT / "knowledge" / "sources" / "monitor-list.json"
+DESTINATIONS = {"academic": "knowledge/papers", "industry_blogs": "knowledge/sources"}
+DEFAULT_DESTINATION = "knowledge/market"
+USER_AGENT = "quant-evo-scanner/1.0"
+MAX_BODY = 8 << 20
+MAX_REDIRECTS = 5
+MAX_ITEMS = 200  # 每个源每次最多写入的条目数
+MIN_LINK_TEXT = 20
+SUMMARY_CHARS = 4000
+BACKOFF_SECONDS = 900
+REDIRECTS = {301, 302, 303, 307, 308}
+
+
+class HttpError(Exception):
+    pass
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-") or "source"
+
+
+def utc_iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ── 源列表 ──
+
+def load_sources(path=DEFAULT_LIST):
+    """展开监控列表, 返回 (sources, manual); source 为 {id, name, url, interval_hours, dest}"""
+    config = json.loads(Path(path).read_text(encoding="utf-8"))
+    sources, manual, ids = [], [], Counter()
+
+    def add(trail, name, url, interval):
+        slug = slugify(name)
+        source_id = "/".join([slugify(key) for key in trail if key != "sources"] + [slug])
+        ids[source_id] += 1
+        n = ids[source_id]
+        if n > 1:
+            source_id += f"-{n}"
+            slug += f"-{n}"
+        sources.append({
+            "id": source_id, "name": name, "url": url, "interval_hours": float(interval),
+            "dest": f"{DESTINATIONS.get(trail[0], DEFAULT_DESTINATION)}/{slug}",
+        })
+
+    def walk(node, trail):
+        if isinstance(node, list):
+            for item in node:
+                walk(item, trail)
+            return
+        if not isinstance(node, dict):
+            return
+        if "scan_interval_hours" in node:
+            interval = node["scan_interval_hours"]
+            if node.get("rss_base") and node.get("categories"):
+                for category in node["categories"]:
+                    add(trail, f"{trail[-1]} {category}", node["rss_base"] + category, interval)
+            elif node.get("url"):
+                add(trail, node.get("name") or trail[-1], node["url"], interval)
+            else:
+                manual.append({"name": node.get("name") or trail[-1], "section": "/".join(trail),
+                               "interval_hours": interval})
+            return
+        for key, value in node.items():
+            if isinstance(value, (dict, list)):
+                walk(value, trail + [key])
+
+    walk(config, [])
+    return sources, manual
+
+
+# ── HTTP 客户端 ──
+
+async def read_response(reader):
+    """读取一个 HTTP/1.x 响应, 返回 (status, headers, body, keep_alive)"""
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("connection closed before response")
+        version, _, rest = line.decode("latin-1").strip().partition(" ")
+        try:
+            status = int(rest[:3])
+        except ValueError:
+            raise HttpError(f"malformed status line: {line[:80]!r}") from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if status >= 200:
+            break  # 跳过 1xx 中间响应
+
+    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if status in (204, 304):
+        body = b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks, total = [], 0
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            total += size
+            if total > MAX_BODY:
+                raise HttpError(f"body exceeds {MAX_BODY} bytes")
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        length = int(headers["content-length"])
+        if length > MAX_BODY:
+            raise HttpError(f"body exceeds {MAX_BODY} bytes")
+        body = await reader.readexactly(length)
+    else:
+        chunks, total = [], 0
+        while chunk := await reader.read(65536):
+            total += len(chunk)
+            if total > MAX_BODY:
+                raise HttpError(f"body exceeds {MAX_BODY} bytes")
+            chunks.append(chunk)
+        body, keep_alive = b"".join(chunks), False
+
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "deflate":
+        body = zlib.decompress(body)
+    return status, headers, body, keep_alive
+
+
+class HostPool:
+    """单个 (scheme, host, port) 的空闲连接池与并发上限"""
+
+    def __init__(self, scheme, host, port, limit, context):
+        self.scheme, self.host, self.port = scheme, host, port
+        self.semaphore = asyncio.Semaphore(limit)
+        self.context = context
+        self.idle = []
+
+    async def acquire(self, timeout, fresh=False):
+        """返回 (reader, writer, reused)"""
+        while self.idle and not fresh:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        context = self.context if self.scheme == "https" else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context,
+                                    server_hostname=self.host if context else None),
+            timeout)
+        return reader, writer, False
+
+    def release(self, reader, writer, keep_alive):
+        if keep_alive and not writer.is_closing():
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+class HttpClient:
+    """asyncio HTTP/1.1 GET 客户端: 全局并发上限 + 每主机连接池"""
+
+    def __init__(self, concurrency=16, per_host=2, timeout=20.0, user_agent=USER_AGENT):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.per_host = per_host
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.context = ssl.create_default_context()
+        self.pools = {}
+        self.stats = Counter()
+
+    def _pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        if key not in self.pools:
+            self.pools[key] = HostPool(scheme, host, port, self.per_host, self.context)
+        return self.pools[key]
+
+    async def get(self, url, headers=()):
+        """返回 (status, headers, body, final_url); 自动跟随重定向"""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = await self._request(url, headers)
+            if status in REDIRECTS and response_headers.get("location"):
+                url = urljoin(url, response_headers["location"])
+                continue
+            return status, response_headers, body, url
+        raise HttpError(f"more than {MAX_REDIRECTS} redirects")
+
+    async def _request(self, url, headers):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise HttpError(f"unsupported url: {url}")
+        default_port = 443 if scheme == "https" else 80
+        port = parts.port or default_port
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        host = parts.hostname if port == default_port else f"{parts.hostname}:{port}"
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host}", f"User-Agent: {self.user_agent}",
+                 "Accept: */*", "Accept-Encoding: gzip, deflate", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        pool = self._pool(scheme, parts.hostname, port)
+        async with self.semaphore, pool.semaphore:
+            fresh = False
+            while True:
+                reader, writer, reused = await pool.acquire(self.timeout, fresh)
+                self.stats["reused" if reused else "connections"] += 1
+                try:
+                    writer.write(request)
+                    await writer.drain()
+                    status, response_headers, body, keep_alive = await asyncio.wait_for(
+                        read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused:  # 空闲连接已被对端关闭, 换新连接重试一次
+                        fresh = True
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                pool.release(reader, writer, keep_alive)
+                self.stats["requests"] += 1
+                self.stats["bytes"] += len(body)
+                return status, response_headers, body
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+
+# ── 解析 ──
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+class _HtmlText(HTMLParser):
+    """HTML → (标题, 纯文本, 链接列表)"""
+
+    def __init__(self, base_url=""):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title, self.text, self.links = [], [], []
+        self._skip = 0
+        self._in_title = False
+        self._href = None
+        self._anchor = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript", "svg"):
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            self._href = dict(attrs).get("href")
+            self._anchor = []
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript", "svg"):
+            self._skip = max(0, self._skip - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag == "a" and self._href is not None:
+            text = " ".join(" ".join(self._anchor).split())
+            if not self._href.startswith(("#", "javascript:", "mailto:")):
+                self.links.append((text, urljoin(self.base_url, self._href)))
+            self._href = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in_title:
+            self.title.append(data)
+        self.text.append(data)
+        if self._href is not None:
+            self._anchor.append(data)
+
+
+def html_text(fragment):
+    parser = _HtmlText()
+    parser.feed(fragment)
+    parser.close()
+    return " ".join(" ".join(parser.text).split())
+
+
+def parse_feed(body):
+    """RSS 2.0 / RDF (RSS 1.0) / Atom → 条目列表"""
+    root = ElementTree.fromstring(body)
+    items = []
+    for node in root.iter():
+        if _local(node.tag) not in ("item", "entry"):
+            continue
+        fields = {}
+        for child in node:
+            name = _local(child.tag)
+            if name == "link":
+                href = child.get("href") or (child.text or "").strip()
+                if href and child.get("rel", "alternate") == "alternate":
+                    fields.setdefault("link", href)
+            else:
+                fields.setdefault(name, "".join(child.itertext()).strip())
+        summary = fields.get("description") or fields.get("summary") or fields.get("content") or ""
+        items.append({
+            "title": " ".join(fields.get("title", "").split()),
+            "url": fields.get("link") or fields.get("guid") or fields.get("id") or "",
+            "published": (fields.get("pubdate") or fields.get("published") or fields.get("date")
+                          or fields.get("updated") or ""),
+            "summary": html_text(summary)[:SUMMARY_CHARS] if "<" in summary else " ".join(summary.split())[:SUMMARY_CHARS],
+        })
+    return items
+
+
+def parse_html(body, base_url):
+    """HTML 页面 → 正文链接条目 (锚文本足够长的才算, 同一链接只取一次)"""
+    parser = _HtmlText(base_url)
+    parser.feed(body)
+    parser.close()
+    items, seen = [], set()
+    for text, url in parser.links:
+        if len(text) >= MIN_LINK_TEXT and url not in seen:
+            seen.add(url)
+            items.append({"title": text, "url": url, "published": "", "summary": ""})
+    return items
+
+
+def is_feed(content_type, body):
+    if any(kind in content_type for kind in ("rss", "atom", "rdf", "/xml", "+xml")):
+        return True
+    head = body[:512].lstrip().lower()
+    return head.startswith((b"<rss", b"<feed", b"<rdf")) or (head.startswith(b"<?xml") and b"<html" not in head)
+
+
+def parse_items(content_type, body, url):
+    if is_feed(content_type.lower(), body):
+        return parse_feed(body)
+    charset = re.search(r"charset=([\w-]+)", content_type, re.I)
+    try:
+        text = body.decode(charset.group(1) if charset else "utf-8", errors="replace")
+    except LookupError:
+        text = body.decode("utf-8", errors="replace")
+    return parse_html(text, url)
+
+
+def content_hash(item):
+    """规范化标题 + 摘要 (无摘要时用链接) 的 sha256 前 32 位十六进制"""
+    text = item["title"] + "\n" + (item["summary"] or item["url"])
+    return hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).hexdigest()[:32]
+
+
+# ── 扫描器 ──
+
+class SourceScanner:
+    """按间隔调度的条件抓取扫描器; 状态与去重集合保存在 state_dir"""
+
+    def __init__(self, root=REPO_ROOT, state_dir=None, concurrency=16, per_host=2, timeout=20.0):
+        self.root = Path(root)
+        self.state_dir = Path(state_dir) if state_dir else self.root / ".cache" / "scanner"
+        self.state_path = self.state_dir / "state.json"
+        self.seen_path = self.state_dir / "seen.txt"
+        self.concurrency, self.per_host, self.timeout = concurrency, per_host, timeout
+        self.state = json.loads(self.state_path.read_text(encoding="utf-8")) if self.state_path.exists() else {}
+        self.seen = set(self.seen_path.read_text(encoding="utf-8").split()) if self.seen_path.exists() else set()
+
+    def due(self, sources, now=None, force=False, only=None):
+        now = time.time() if now is None else now
+        return [source for source in sources
+                if (not only or only in source["id"])
+                and (force or self.state.get(source["id"], {}).get("next_due", 0) <= now)]
+
+    def next_due(self, sources):
+        return min((self.state.get(source["id"], {}).get("next_due", 0) for source in sources), default=None)
+
+    def save(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _store(self, source, items, now):
+        """写入未见过的条目, 返回 (新条目数, 重复数)"""
+        fresh, hashes = [], []
+        for item in items:
+            digest = content_hash(item)
+            if digest in self.seen:
+                continue
+            self.seen.add(digest)
+            hashes.append(digest)
+            fresh.append({**item, "source": source["name"], "source_id": source["id"],
+                          "fetched_at": utc_iso(now), "content_sha256": digest})
+        if fresh:
+            path = self.root / source["dest"] / f"{utc_iso(now)[:10]}.jsonl"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in fresh)
+            # 条目先落盘再记入 seen: 中途崩溃最多重复写, 不会丢条目
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.seen_path, "a", encoding="utf-8") as f:
+                f.writelines(digest + "\n" for digest in hashes)
+        return len(fresh), len(items) - len(fresh)
+
+    async def _scan_one(self, client, source):
+        entry = self.state.setdefault(source["id"], {})
+        now = time.time()
+        headers = []
+        if entry.get("etag"):
+            headers.append(("If-None-Match", entry["etag"]))
+        if entry.get("last_modified"):
+            headers.append(("If-Modified-Since", entry["last_modified"]))
+        interval = source["interval_hours"] * 3600
+        result = {"id": source["id"], "new": 0, "duplicates": 0}
+        start = time.perf_counter()
+        try:
+            status, response_headers, body, url = await client.get(source["url"], headers)
+            if status == 304:
+                result["outcome"] = "not_modified"
+            elif 200 <= status < 300:
+                digest = hashlib.sha256(body).hexdigest()
+                if digest == entry.get("body_sha256"):
+                    result["outcome"] = "unchanged"
+                else:
+                    items = parse_items(response_headers.get("content-type", ""), body, url)[:MAX_ITEMS]
+                    result["new"], result["duplicates"] = self._store(source, items, now)
+                    result["outcome"] = "updated"
+                entry.update(etag=response_headers.get("etag"),
+                             last_modified=response_headers.get("last-modified"),
+                             body_sha256=digest)
+            else:
+                raise HttpError(f"HTTP {status}")
+            entry.update(failures=0, next_due=now + interval, error=None)
+        except (OSError, EOFError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError,
+                ElementTree.ParseError, ValueError, zlib.error) as exc:
+            failures = entry.get("failures", 0) + 1
+            result.update(outcome="failed", error=f"{type(exc).__name__}: {exc}")
+            entry.update(failures=failures, error=result["error"],
+                         next_due=now + min(interval, BACKOFF_SECONDS * 2 ** (failures - 1)))
+        entry.update(last_checked=utc_iso(now), last_outcome=result["outcome"])
+        result["ms"] = round((time.perf_counter() - start) * 1e3, 1)
+        return result
+
+    async def scan(self, sources):
+        """并发抓取给定的源, 返回汇总报告"""
+        start = time.perf_counter()
+        client = HttpClient(self.concurrency, self.per_host, self.timeout)
+        try:
+            results = await asyncio.gather(*(self._scan_one(client, source) for source in sources))
+        finally:
+            client.close()
+            self.save()
+        outcomes = Counter(result["outcome"] for result in results)
+        return {
+            "sources": len(results),
+            **{key: outcomes.get(key, 0) for key in ("updated", "unchanged", "not_modified", "failed")},
+            "new_items": sum(result["new"] for result in results),
+            "duplicates": sum(result["duplicates"] for result in results),
+            "requests": client.stats["requests"],
+            "connections": client.stats["connections"],
+            "reused_connections": client.stats["reused"],
+            "bytes": client.stats["bytes"],
+            "elapsed_ms": round((time.perf_counter() - start) * 1e3, 1),
+            "errors": {result["id"]: result["error"] for result in results if result["outcome"] == "failed"},
+            "results": results,
+        }
+
+    def status(self, sources, manual, now=None):
+        now = time.time() if now is None else now
+        rows = []
+        for source in sources:
+            entry = self.state.get(source["id"], {})
+            rows.append({
+                "id": source["id"], "interval_hours": source["interval_hours"],
+                "due_in_minutes": round(max(0.0, entry.get("next_due", 0) - now) / 60, 1),
+                "last_checked": entry.get("last_checked"), "last_outcome": entry.get("last_outcome"),
+                "failures": entry.get("failures", 0), "error": entry.get("error"),
+            })
+        return {"sources": rows, "manual": manual, "seen_items": len(self.seen)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent Conditional-Fetch Scanner for monitor-list.json")
+    parser.add_argument("--list", default=str(DEFAULT_LIST), help="Path to monitor-list.json")
+    parser.add_argument("--root", default=str(REPO_ROOT), help="Repository root (items go under knowledge/)")
+    parser.add_argument("--state-dir", default=None, help="Default: <root>/.cache/scanner")
+    parser.add_argument("--concurrency", type=int, default=16, help="Max requests in flight")
+    parser.add_argument("--per-host", type=int, default=2, help="Max connections per host")
+    parser.add_argument("--timeout", type=float, default=20.0, help="Per-request timeout (seconds)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_scan = sub.add_parser("scan", help="Fetch sources that are due")
+    p_run = sub.add_parser("run", help="Scan due sources in a loop")
+    for p in (p_scan, p_run):
+        p.add_argument("--only", default=None, help="Only sources whose id contains this string")
+    p_scan.add_argument("--force", action="store_true", help="Ignore schedule and fetch all")
+    p_scan.add_argument("--dry-run", action="store_true", help="List due sources without fetching")
+    p_scan.add_argument("--verbose", action="store_true", help="Include per-source results")
+    p_run.add_argument("--max-sleep", type=float, default=600.0, help="Max seconds between checks")
+    sub.add_parser("status", help="Schedule and last outcome per source")
+    args = parser.parse_args()
+
+    sources, manual = load_sources(args.list)
+    scanner = SourceScanner(args.root, args.state_dir, args.concurrency, args.per_host, args.timeout)
+
+    if args.command == "status":
+        print(json.dumps(scanner.status(sources, manual), indent=2, ensure_ascii=False))
+        return 0
+
+    if args.command == "run":
+        try:
+            while True:
+                sources, manual = load_sources(args.list)  # 监控列表可在运行中修改
+                due = scanner.due(sources, only=args.only)
+                if due:
+                    report = asyncio.run(scanner.scan(due))
+                    report.pop("results")
+                    print(json.dumps({"time": utc_iso(time.time()), **report}, ensure_ascii=False), flush=True)
+                wake = scanner.next_due([s for s in sources if not args.only or args.only in s["id"]])
+                time.sleep(min(args.max_sleep, max(1.0, (wake or 0) - time.time())))
+        except KeyboardInterrupt:
+            return 0
+
+    due = scanner.due(sources, force=args.force, only=args.only)
+    if args.dry_run:
+        print(json.dumps({"due": [{"id": s["id"], "url": s["url"]} for s in due],
+                          "manual": [m["name"] for m in manual]}, indent=2, ensure_ascii=False))
+        return 0
+    report = asyncio.run(scanner.scan(due))
+    if not args.verbose:
+        report.pop("results")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
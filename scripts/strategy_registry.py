@@ -0,0 +1,273 @@
+"""
+策略注册表 (缓存 + 热重载)
+每个策略以唯一模块名 (strategy_<文件名>_<路径+内容哈希前缀>) 加载并登记到 sys.modules,
+不同策略不再共用 "strategy" 模块名; STRATEGY_META 只在加载时校验一次。
+
+- get(path): 文件 mtime/大小未变时直接返回已加载模块 (一次 stat);
+  变化时计算 sha256, 内容不同才重新加载, 新版本加载失败时保留旧版本并抛出异常
+- 字节码按内容哈希缓存在 .cache/strategies/ (与解释器 magic number 绑定),
+  同一内容的策略从 candidates 复制到 staging/production 后无需重新编译
+- refresh(dir): 扫描目录, 加载新增 / 重载变化 / 移除已删除的策略 (Operator 热更新)
+- warm(paths) 预先导入; fork 出的 worker 直接继承已导入模块;
+  spawn 的 worker 用 warm_from(snapshot()) 从字节码缓存快速恢复
+
+用法:
+    python scripts/strategy_registry.py warm strategies/production
+    python scripts/strategy_registry.py watch strategies/production --interval 2
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import re
+import sys
+import time
+import types
+from pathlib import Path
+
+DEFAULT_BYTECODE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "strategies"
+PRODUCTION_DIR = Path(__file__).resolve().parent.parent / "strategies" / "production"
+
+REQUIRED_META = {
+    "id": str,
+    "name": str,
+    "version": str,
+    "archetype": str,
+    "asset_class": str,
+    "holding_period_minutes": list,
+    "symbols": (list, str),
+    "signal_sources": list,
+    "params": dict,
+}
+
+
+def validate_meta(meta):
+    """STRATEGY_META 结构检查, 返回错误列表"""
+    if not isinstance(meta, dict):
+        return ["STRATEGY_META 不是字典"]
+    errors = []
+    for key, expected in REQUIRED_META.items():
+        if key not in meta:
+            errors.append(f"缺少字段 {key}")
+        elif not isinstance(meta[key], expected):
+            errors.append(f"字段 {key} 类型错误")
+    return errors
+
+
+def module_name(path, digest):
+    """同一路径的不同版本、不同路径的相同内容都得到不同的名称"""
+    stem = re.sub(r"\W", "_", Path(path).stem)
+    return f"strategy_{stem}_{hashlib.sha256(f'{path}:{digest}'.encode()).hexdigest()[:12]}"
+
+
+def _with_filename(code, filename):
+    """缓存的字节码可能来自同内容的其他路径, 修正 co_filename 使回溯指向当前文件"""
+    if code.co_filename == filename:
+        return code
+    consts = tuple(_with_filename(c, filename) if isinstance(c, types.CodeType) else c
+                   for c in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
+
+class StrategyEntry:
+    """已加载的策略版本"""
+
+    __slots__ = ("path", "stat", "digest", "module", "meta", "load_ms")
+
+    def __init__(self, path, stat, digest, module, load_ms):
+        self.path = path
+        self.stat = stat
+        self.digest = digest
+        self.module = module
+        self.meta = module.STRATEGY_META
+        self.load_ms = load_ms
+
+    def to_dict(self):
+        return {"path": self.path, "id": self.meta["id"], "version": self.meta["version"],
+                "module": self.module.__name__, "sha256": self.digest, "load_ms": self.load_ms}
+
+
+class StrategyRegistry:
+    """按路径索引的策略模块缓存"""
+
+    def __init__(self, bytecode_dir=DEFAULT_BYTECODE_DIR):
+        self.bytecode_dir = Path(bytecode_dir) if bytecode_dir is not None else None
+        self._entries = {}  # 绝对路径 → StrategyEntry
+        self._resolved = {}  # 调用方给出的路径 → 绝对路径 (避免每次 resolve 的系统调用)
+        self.loads = 0      # 实际执行模块的次数 (用于观测缓存效果)
+
+    def _resolve(self, path):
+        resolved = self._resolved.get(path)
+        if resolved is None:
+            resolved = self._resolved[path] = str(Path(path).resolve())
+        return resolved
+
+    def __contains__(self, path):
+        return self._resolve(path) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self):
+        return list(self._entries.values())
+
+    def _bytecode_path(self, digest):
+        return self.bytecode_dir / f"{digest}-{importlib.util.MAGIC_NUMBER.hex()}.bin"
+
+    def _compile(self, source, digest, filename):
+        """内容哈希寻址的字节码缓存"""
+        cached = self._bytecode_path(digest) if self.bytecode_dir is not None else None
+        if cached is not None:
+            try:
+                return _with_filename(marshal.loads(cached.read_bytes()), filename)
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+        code = compile(source, filename, "exec", dont_inherit=True)
+        if cached is not None:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(marshal.dumps(code))
+            os.replace(tmp, cached)
+        return code
+
+    def _load(self, path, stat, source, digest):
+        start = time.perf_counter()
+        name = module_name(path, digest)
+        module = types.ModuleType(name)
+        module.__file__ = path
+        code = self._compile(source, digest, path)
+        sys.modules[name] = module  # dataclass / pickle 需要能按名称找到模块
+        try:
+            exec(code, module.__dict__)
+            meta = getattr(module, "STRATEGY_META", None)
+            errors = ["策略缺少 STRATEGY_META"] if meta is None else validate_meta(meta)
+            if errors:
+                raise ValueError(f"{path}: {'; '.join(errors)}")
+        except BaseException:
+            del sys.modules[name]
+            raise
+        self.loads += 1
+        return StrategyEntry(path, stat, digest, module, round((time.perf_counter() - start) * 1e3, 3))
+
+    def get(self, path):
+        """返回策略模块; 文件变化时重新加载 (失败时保留旧版本并抛出异常)"""
+        return self.entry(path).module
+
+    def entry(self, path):
+        path = self._resolve(path)
+        st = os.stat(path)
+        stat = (st.st_mtime_ns, st.st_size)
+        entry = self._entries.get(path)
+        if entry is not None and entry.stat == stat:
+            return entry
+
+        source = Path(path).read_bytes()
+        digest = hashlib.sha256(source).hexdigest()
+        if entry is not None and entry.digest == digest:
+            entry.stat = stat  # 仅 mtime 变化 (如 git checkout / touch)
+            return entry
+
+        new = self._load(path, stat, source, digest)
+        if entry is not None and entry.module.__name__ != new.module.__name__:
+            sys.modules.pop(entry.module.__name__, None)
+        self._entries[path] = new
+        return new
+
+    def remove(self, path):
+        entry = self._entries.pop(self._resolve(path), None)
+        if entry is not None:
+            sys.modules.pop(entry.module.__name__, None)
+        return entry
+
+    def warm(self, paths):
+        """预先导入 (路径列表或目录), 返回 {路径: 错误信息} (仅失败项)"""
+        if isinstance(paths, (str, Path)) and Path(paths).is_dir():
+            paths = discover(paths)
+        errors = {}
+        for path in paths:
+            try:
+                self.entry(path)
+            except Exception as e:  # 单个策略错误不影响其他策略
+                errors[str(path)] = f"{type(e).__name__}: {e}"
+        return errors
+
+    def snapshot(self):
+        """可跨进程传递的 [(路径, sha256)], 供 warm_from 使用"""
+        return [(entry.path, entry.digest) for entry in self._entries.values()]
+
+    def warm_from(self, snapshot):
+        """worker 进程: 按父进程快照预先导入 (字节码缓存命中时无需编译)"""
+        return self.warm([path for path, _ in snapshot])
+
+    def refresh(self, directory):
+        """
+        同步目录: 加载新增、重载变化、移除已删除的策略
+        返回 {"loaded": [...], "reloaded": [...], "removed": [...], "errors": {路径: 信息}}
+        """
+        directory = Path(directory).resolve()
+        current = {str(p.resolve()) for p in discover(directory)}
+        report = {"loaded": [], "reloaded": [], "removed": [], "errors": {}}
+        for path in sorted(p for p in self._entries if Path(p).parent == directory and p not in current):
+            self.remove(path)
+            report["removed"].append(path)
+        for path in sorted(current):
+            before = self._entries.get(path)
+            try:
+                entry = self.entry(path)
+            except Exception as e:
+                report["errors"][path] = f"{type(e).__name__}: {e}"
+                continue
+            if before is None:
+                report["loaded"].append(path)
+            elif entry is not before:
+                report["reloaded"].append(path)
+        return report
+
+
+def discover(directory):
+    """目录下的策略模块 (跳过 _ 开头的文件)"""
+    return sorted(p for p in Path(directory).glob("*.py") if not p.name.startswith("_"))
+
+
+registry = StrategyRegistry()  # 进程级默认注册表 (run_backtest.load_strategy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strategy Registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_warm = sub.add_parser("warm", help="Import every strategy once and fill the bytecode cache")
+    p_warm.add_argument("directory", nargs="?", default=str(PRODUCTION_DIR))
+    p_watch = sub.add_parser("watch", help="Poll a directory and report loads/reloads/removals")
+    p_watch.add_argument("directory", nargs="?", default=str(PRODUCTION_DIR))
+    p_watch.add_argument("--interval", type=float, default=2.0)
+    for p in (p_warm, p_watch):
+        p.add_argument("--bytecode-dir", default=str(DEFAULT_BYTECODE_DIR))
+    args = parser.parse_args()
+
+    reg = StrategyRegistry(args.bytecode_dir)
+    if args.command == "warm":
+        start = time.perf_counter()
+        errors = reg.warm(args.directory)
+        print(json.dumps({
+            "directory": args.directory,
+            "strategies": [e.to_dict() for e in reg.entries()],
+            "errors": errors,
+            "total_ms": round((time.perf_counter() - start) * 1e3, 3),
+        }, indent=2, ensure_ascii=False))
+        return 0 if not errors else 1
+
+    try:
+        while True:
+            report = reg.refresh(args.directory)
+            if any(report.values()):
+                print(json.dumps({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), **report},
+                                 ensure_ascii=False), flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+合成多标的行情 (冷启动 / 压力测试 / 扩展性基准)
+NumPy 向量化生成相关的多标的 K 线, 按块流式输出到内存或 bar_store 磁盘格式。
+
+模型 (对数价格):
+- 市场状态: 日级两状态马尔可夫链 (平稳 / 压力), 决定漂移与波动倍数
+- 波动聚集: 每个标的的日级对数波动 AR(1)
+- 相关性: 单因子, z = sqrt(ρ)·市场冲击 + sqrt(1-ρ)·个股冲击
+- 跳跃: 个股与市场的伯努利跳跃, 正态跳幅
+- 日内: U 形波动与成交量曲线, 隔夜跳空; 时间戳为美股常规交易时段 (工作日, 14:30 UTC 开盘)
+
+每个标的使用 (seed, 标的名) 派生的独立随机流, 市场因子使用 seed 派生的随机流;
+同一标的的路径与同时生成哪些标的、块大小无关。
+
+用法:
+    python scripts/synthetic_market.py --symbols AAPL,MSFT,NVDA --days 1260 --data-dir data/bars
+    python scripts/synthetic_market.py --universe 500 --days 2520 --preset stress --data-dir /tmp/bars
+    python scripts/synthetic_market.py --universe 1000 --days 2520   # 只生成并计时
+"""
+import argparse
+import json
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bar_store import COLUMNS, BarStore
+
+SESSION_MINUTES = 390
+SESSION_OPEN_NS = (14 * 60 + 30) * 60 * 10**9  # 09:30 ET (按 EST 近似)
+TIMEFRAME_MINUTES = {"1Min": 1, "5Min": 5, "15Min": 15, "30Min": 30, "1Hour": 60, "1Day": SESSION_MINUTES}
+
+DEFAULT_CONFIG = {
+    "start_price": (20.0, 500.0),       # 各标的初始价格 (对数均匀)
+    "bar_vol": 0.002,                   # 每 bar 基准波动 (15 分钟 bar, 其他周期按 sqrt 缩放)
+    "correlation": 0.3,                 # 与市场因子的相关系数
+    "regime_vol": (1.0, 2.5),           # 平稳 / 压力状态的波动倍数
+    "regime_drift": (0.06, -0.25),      # 平稳 / 压力状态的年化漂移
+    "regime_switch": (0.02, 0.15),      # 每日 P(平稳→压力), P(压力→平稳)
+    "vol_persistence": 0.95,            # 日级对数波动 AR(1) 系数
+    "vol_of_vol": 0.1,                  # 日级对数波动新息标准差
+    "jump_prob": 0.0005,                # 每 bar 个股跳跃概率
+    "market_jump_prob": 0.0002,         # 每 bar 市场跳跃概率
+    "jump_mean": -0.002,
+    "jump_std": 0.02,
+    "gap_std": 0.004,                   # 隔夜跳空标准差
+    "base_volume": 200000,              # 每 bar 平均成交量 (15 分钟 bar)
+    "volume_noise": 0.35,               # 成交量对数噪声
+    "volume_vol_beta": 0.5,             # 成交量对 |收益|/波动 的敏感度
+}
+PRESETS = {
+    "default": {},
+    "stress": {"regime_switch": (0.2, 0.05), "correlation": 0.7, "jump_prob": 0.003,
+               "market_jump_prob": 0.001, "jump_std": 0.04},
+    "calm": {"regime_switch": (0.0, 1.0), "jump_prob": 0.0, "market_jump_prob": 0.0},
+}
+
+
+def timeframe_minutes(timeframe):
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"不支持的周期: {timeframe} (可选 {', '.join(TIMEFRAME_MINUTES)})")
+    return TIMEFRAME_MINUTES[timeframe]
+
+
+def _u_shape(n, depth):
+    """开盘/收盘高、午间低的日内曲线, 均值为 1"""
+    x = (np.arange(n) + 0.5) / n
+    curve = 1.0 + depth * (2 * x - 1) ** 2
+    return curve / curve.mean()
+
+
+def trading_days(days, end=None):
+    """截至 end (不含, 默认今天 UTC) 的最近 days 个工作日, 返回各日 0 点的纳秒时间戳"""
+    end = np.datetime64(end or datetime.now(timezone.utc).date().isoformat(), "D")
+    first = np.busday_offset(end, -days, roll="backward")
+    dates = np.arange(first, end, dtype="datetime64[D]")
+    dates = dates[np.is_busday(dates)][-days:]
+    return dates.astype("datetime64[ns]").astype(np.int64)
+
+
+class SyntheticMarket:
+    """按块生成的相关多标的行情 (块之间保留价格 / 波动 / 市场状态)"""
+
+    def __init__(self, symbols, freq_minutes=15, seed=0, end=None, **config):
+        unknown = set(config) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"未知配置: {sorted(unknown)}")
+        self.symbols = list(symbols)
+        self.freq_minutes = freq_minutes
+        self.bars_per_day = max(SESSION_MINUTES // freq_minutes, 1)
+        self.end = end
+        self.config = {**DEFAULT_CONFIG, **config}
+        c = self.config
+
+        scale = np.sqrt(min(freq_minutes, SESSION_MINUTES) / 15)
+        self.bar_vol = c["bar_vol"] * scale
+        self.base_volume = c["base_volume"] * min(freq_minutes, SESSION_MINUTES) / 15
+        periods_per_year = 252 * self.bars_per_day
+        self.regime_vol = np.asarray(c["regime_vol"], dtype=np.float64)
+        self.regime_drift = np.asarray(c["regime_drift"], dtype=np.float64) / periods_per_year
+        self.vol_profile = np.sqrt(_u_shape(self.bars_per_day, 1.0))
+        self.volume_profile = _u_shape(self.bars_per_day, 1.5)
+
+        # 各随机分量使用独立的流, 保证结果与块大小无关
+        market_seq = np.random.SeedSequence([seed, 0])
+        self.market_rng = [np.random.default_rng(s) for s in market_seq.spawn(4)]
+        self.symbol_rng = []
+        for symbol in self.symbols:
+            seq = np.random.SeedSequence([seed, zlib.crc32(symbol.encode()) + 1])
+            self.symbol_rng.append([np.random.default_rng(s) for s in seq.spawn(8)])
+
+        low, high = c["start_price"] if isinstance(c["start_price"], (list, tuple)) else (c["start_price"],) * 2
+        self.log_price = np.array([np.log(low) + rngs[6].random() * (np.log(high) - np.log(low))
+                                   for rngs in self.symbol_rng])
+        self.log_vol = np.zeros(len(self.symbols))
+        self.regime = 0
+
+    def _regimes(self, n_days):
+        stay_calm, stay_stress = 1 - self.config["regime_switch"][0], 1 - self.config["regime_switch"][1]
+        u = self.market_rng[0].random(n_days)
+        regimes = np.empty(n_days, dtype=np.int8)
+        for d in range(n_days):
+            stay = stay_calm if self.regime == 0 else stay_stress
+            if u[d] >= stay:
+                self.regime = 1 - self.regime
+            regimes[d] = self.regime
+        return regimes
+
+    def _chunk(self, day_ns):
+        """生成 len(day_ns) 个交易日的全部标的, 返回 {symbol: columns}"""
+        c = self.config
+        n_days, bpd = len(day_ns), self.bars_per_day
+        n = n_days * bpd
+        timestamps = (day_ns[:, None] + SESSION_OPEN_NS
+                      + np.arange(bpd, dtype=np.int64)[None, :] * self.freq_minutes * 60 * 10**9).ravel()
+
+        regimes = self._regimes(n_days)
+        regime_vol = np.repeat(self.regime_vol[regimes], bpd)
+        drift = np.repeat(self.regime_drift[regimes], bpd)
+        profile = np.tile(self.vol_profile, n_days)
+        volume_profile = np.tile(self.volume_profile, n_days)
+        first_bar = np.zeros(n, dtype=bool)
+        first_bar[::bpd] = True
+
+        market = self.market_rng[1].standard_normal(n)
+        market_jump = self.market_rng[2].random(n) < c["market_jump_prob"]
+        market_jump_size = np.zeros(n)
+        market_jump_size[market_jump] = c["jump_mean"] + c["jump_std"] * \
+            self.market_rng[3].standard_normal(int(market_jump.sum()))
+
+        rho = c["correlation"]
+        phi, vov = c["vol_persistence"], c["vol_of_vol"]
+        out = {}
+        for k, (symbol, rngs) in enumerate(zip(self.symbols, self.symbol_rng)):
+            # 日级对数波动 AR(1)
+            eta = rngs[0].standard_normal(n_days) * vov
+            log_vol = np.empty(n_days)
+            h = self.log_vol[k]
+            for d in range(n_days):
+                h = phi * h + eta[d]
+                log_vol[d] = h
+            self.log_vol[k] = h
+            # 平稳均值为 0 的对数波动: 减去 var/2 使 E[exp(h)] ≈ 1
+            vol = np.repeat(np.exp(log_vol - vov**2 / (2 * (1 - phi**2))), bpd)
+            sigma = self.bar_vol * regime_vol * profile * vol
+
+            z = np.sqrt(rho) * market + np.sqrt(1 - rho) * rngs[1].standard_normal(n)
+            jump = rngs[2].random(n) < c["jump_prob"]
+            jump_size = market_jump_size.copy()
+            jump_size[jump] += c["jump_mean"] + c["jump_std"] * rngs[7].standard_normal(int(jump.sum()))
+            gap = np.where(first_bar, c["gap_std"] * rngs[3].standard_normal(n), 0.0)
+
+            ret = drift - sigma**2 / 2 + sigma * z + jump_size
+            log_close = self.log_price[k] + np.cumsum(gap + ret)
+            log_open = log_close - ret
+            self.log_price[k] = log_close[-1]
+
+            wick = np.abs(rngs[4].standard_normal((n, 2))).T * sigma * 0.5
+            open_ = np.exp(log_open)
+            close = np.exp(log_close)
+            high = np.maximum(open_, close) * np.exp(wick[0])
+            low = np.minimum(open_, close) * np.exp(-wick[1])
+            activity = 1 + c["volume_vol_beta"] * np.minimum(np.abs(ret) / sigma, 5.0)
+            volume = self.base_volume * volume_profile * activity * \
+                np.exp(c["volume_noise"] * rngs[5].standard_normal(n) - c["volume_noise"]**2 / 2)
+
+            out[symbol] = {
+                "timestamp": timestamps,
+                "open": np.round(open_, 2),
+                "high": np.round(high, 2),
+                "low": np.round(low, 2),
+                "close": np.round(close, 2),
+                "volume": volume.astype(np.int64),
+            }
+        return out
+
+    def chunks(self, days, chunk_days=64):
+        """逐块生成最近 days 个交易日, 每块 chunk_days 天"""
+        day_ns = trading_days(days, self.end)
+        for start in range(0, len(day_ns), chunk_days):
+            yield self._chunk(day_ns[start:start + chunk_days])
+
+    def generate(self, days, chunk_days=64):
+        """生成全部数据到内存, 返回 {symbol: columns}"""
+        parts = {symbol: [] for symbol in self.symbols}
+        for chunk in self.chunks(days, chunk_days):
+            for symbol, columns in chunk.items():
+                parts[symbol].append(columns)
+        return {
+            symbol: {name: np.concatenate([p[name] for p in chunk_list]) if chunk_list
+                     else np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+            for symbol, chunk_list in parts.items()
+        }
+
+    def write_store(self, store, days, timeframe="15Min", chunk_days=64):
+        """流式写入 bar_store (覆盖已有数据), 返回各标的 meta"""
+        count = len(trading_days(days, self.end)) * self.bars_per_day
+        writers = {symbol: store.writer(symbol, timeframe, count) for symbol in self.symbols}
+        for chunk in self.chunks(days, chunk_days):
+            for symbol, columns in chunk.items():
+                writers[symbol].append(columns)
+        return [writer.close() for writer in writers.values()]
+
+
+def generate_columns(symbol, days=30, timeframe="15Min", seed=0, **config):
+    """单个标的的合成行情列 (run_backtest 冷启动数据源)"""
+    market = SyntheticMarket([symbol], timeframe_minutes(timeframe), seed, **config)
+    return market.generate(days)[symbol]
+
+
+def universe_symbols(count):
+    return [f"SYN{i:04d}" for i in range(count)]
+
+
+def _parse_override(text):
+    name, _, value = text.partition("=")
+    value = json.loads(value)
+    return name, tuple(value) if isinstance(value, list) else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic Multi-Asset Market Generator")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--symbols", help="Comma-separated symbols")
+    group.add_argument("--universe", type=int, help="Generate SYN0000.. symbols")
+    parser.add_argument("--days", type=int, default=252, help="Trading days")
+    parser.add_argument("--timeframe", default="15Min", choices=list(TIMEFRAME_MINUTES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", default=None, help="End date (exclusive, default today UTC)")
+    parser.add_argument("--preset", choices=list(PRESETS), default="default")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=JSON",
+                        help="Override a model parameter, e.g. --set correlation=0.6")
+    parser.add_argument("--chunk-days", type=int, default=64)
+    parser.add_argument("--data-dir", default=None, help="Write to this bar store root (omit to only time)")
+    args = parser.parse_args()
+
+    symbols = args.symbols.split(",") if args.symbols else universe_symbols(args.universe)
+    config = {**PRESETS[args.preset], **dict(_parse_override(s) for s in args.set)}
+    market = SyntheticMarket(symbols, timeframe_minutes(args.timeframe), args.seed, args.end, **config)
+
+    started = time.perf_counter()
+    if args.data_dir:
+        metas = market.write_store(BarStore(args.data_dir), args.days, args.timeframe, args.chunk_days)
+        bars = sum(m["count"] for m in metas)
+    else:
+        bars = sum(len(cols["timestamp"]) for chunk in market.chunks(args.days, args.chunk_days)
+                   for cols in chunk.values())
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "symbols": len(symbols),
+        "timeframe": args.timeframe,
+        "trading_days": args.days,
+        "bars": bars,
+        "seconds": round(elapsed, 3),
+        "bars_per_second": int(bars / elapsed) if elapsed > 0 else None,
+        "data_dir": args.data_dir,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+滚动前推 (walk-forward) / 样本外评估
+把行情按 bar 切分为若干折 (训练段 + 测试段), 各折在进程池中并行评估,
+行情只加载一次并放入共享内存 (复用 param_sweep 的 worker)。
+
+切分方式 (--scheme):
+    rolling   固定长度训练窗口, 按 --step-days 向前滚动
+    anchored  训练窗口起点固定, 终点随测试窗口前推
+    kfold     清洗 (purged) k 折: 测试块之外的全部数据为训练段,
+              测试块前 purge_bars、后 embargo_bars 的 bar 从训练段剔除
+
+purge_bars 默认为 STRATEGY_META 最长持仓周期对应的 bar 数, 避免训练段末尾
+未平仓的交易跨入测试段。embargo 只作用于测试段之后的训练数据 (kfold)。
+
+给出 --param 时每折在训练段上按 --select-by 重新拟合参数 (网格 / 随机 / lhs,
+见 param_sweep.py), 再用选中的参数评估测试段; 否则使用策略默认参数。
+各折测试段的权益曲线首尾相接得到样本外曲线, 并汇总各折指标的稳定性统计。
+
+用法:
+    python scripts/walk_forward.py strategies/candidates/seed_momentum_rsi_v1.py --months 6 \\
+        --train-days 60 --test-days 20
+    python scripts/walk_forward.py <strategy> --months 6 --scheme kfold --folds 6 \\
+        --param rsi_oversold=20:40:5 --embargo-bars 26
+    python scripts/run_backtest.py <strategy> --months 6 --walk-forward
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from bar_store import format_timestamp
+from metrics import TRADING_DAYS, compute_metrics, infer_periods_per_year
+from param_sweep import (chunk_tasks, generate_param_sets, init_worker, parse_param_spec,
+                         share_columns, signals_for, worker_state)
+from run_backtest import (EXECUTION_PARAMS, LOOKBACK, load_columns, load_strategy, primary_symbol,
+                          simulate_trades, summarize)
+
+SCHEMES = ("rolling", "anchored", "kfold")
+# 每折报告中保留的指标
+FOLD_METRICS = ("total_return", "sharpe_ratio", "sortino_ratio", "max_drawdown", "win_rate",
+                "profit_factor", "total_trades")
+
+
+def make_folds(n_bars, train_bars, test_bars, scheme="rolling", step_bars=None, purge_bars=0,
+               embargo_bars=0, n_folds=5, start=LOOKBACK):
+    """
+    生成折定义 [{"fold", "train": [(a, b), ...], "test": (a, b)}], 区间为左闭右开的 bar 下标
+    start 之前的 bar 只用于指标预热
+    """
+    folds = []
+    if scheme in ("rolling", "anchored"):
+        step_bars = step_bars or test_bars
+        train_start = start
+        test_start = start + train_bars
+        while test_start + test_bars <= n_bars:
+            train_end = test_start - purge_bars
+            if train_end > train_start:
+                folds.append({"fold": len(folds), "train": [(train_start, train_end)],
+                              "test": (test_start, test_start + test_bars)})
+            test_start += step_bars
+            if scheme == "rolling":
+                train_start += step_bars
+    elif scheme == "kfold":
+        size = (n_bars - start) // n_folds
+        if size <= 0:
+            return folds
+        for k in range(n_folds):
+            a = start + k * size
+            b = n_bars if k == n_folds - 1 else a + size
+            segments = [(start, a - purge_bars), (b + embargo_bars, n_bars)]
+            folds.append({"fold": k, "train": [(lo, hi) for lo, hi in segments if hi > lo],
+                          "test": (a, b)})
+    else:
+        raise ValueError(f"未知切分方式: {scheme}")
+    return folds
+
+
+def _simulate_segments(closes, actions, confidences, segments, params, initial_capital):
+    """
+    逐段撮合并首尾相接: 每段从上一段的期末权益开始、空仓进入
+    每段向前借 LOOKBACK 根 bar 对齐 simulate_trades 的起点
+    """
+    trades, equity_curve, exposure_curve = [], [initial_capital], []
+    for a, b in segments:
+        lo = max(a - LOOKBACK, 0)
+        seg_trades, seg_equity, seg_exposure = simulate_trades(
+            closes[lo:b], actions[lo:b], confidences[lo:b], params, equity_curve[-1])
+        trades += seg_trades
+        equity_curve += seg_equity[1:]
+        exposure_curve += seg_exposure
+    return trades, equity_curve, exposure_curve
+
+
+def _fold_metrics(trades, equity_curve, exposure_curve, initial_capital):
+    if not trades:
+        return {"status": "no_trades", "total_trades": 0,
+                "total_return": round((equity_curve[-1] - initial_capital) / initial_capital, 4)}
+    return {"status": "success", **summarize(trades, equity_curve, initial_capital, exposure_curve,
+                                             worker_state["periods_per_year"])}
+
+
+def _trim(metrics, keys):
+    return {k: metrics[k] for k in ("status", *keys) if k in metrics}
+
+
+def evaluate_fold(task):
+    """
+    worker 任务: 在训练段上评估一组参数, 选出 select_by 最高者并评估其测试段
+    返回 {"fold", "index", "params", "score", "train", "test", "curve"}
+    """
+    fold, chunk, select_by = task
+    closes = worker_state["columns"]["close"]
+    initial_capital = worker_state["initial_capital"]
+    signal_cache = {}
+    best = None
+    for index, params in chunk:
+        signal_key = tuple(sorted((k, v) for k, v in params.items() if k not in EXECUTION_PARAMS))
+        if signal_key not in signal_cache:
+            signal_cache[signal_key] = signals_for(params)
+        actions, confidences = signal_cache[signal_key]
+        train = _fold_metrics(*_simulate_segments(closes, actions, confidences, fold["train"],
+                                                  params, initial_capital), initial_capital)
+        score = train[select_by] if train["status"] == "success" else -math.inf
+        if best is None or score > best[0]:
+            best = (score, index, params, train, actions, confidences)
+
+    score, index, params, train, actions, confidences = best
+    trades, equity_curve, exposure_curve = _simulate_segments(
+        closes, actions, confidences, [fold["test"]], params, initial_capital)
+    return {
+        "fold": fold["fold"],
+        "index": index,
+        "params": params,
+        "score": score,
+        "train": train,
+        "test": _fold_metrics(trades, equity_curve, exposure_curve, initial_capital),
+        "curve": (trades, equity_curve, exposure_curve),
+    }
+
+
+def stitch_curves(curves, initial_capital):
+    """把各折测试段 (各自从 initial_capital 起步) 按收益率首尾相接"""
+    trades, equity_curve, exposure_curve = [], [initial_capital], []
+    for seg_trades, seg_equity, seg_exposure in curves:
+        scale = equity_curve[-1] / seg_equity[0]
+        trades += [{**t, "pnl": round(t["pnl"] * scale, 2)} for t in seg_trades]
+        equity_curve += [v * scale for v in seg_equity[1:]]
+        exposure_curve += [v * scale for v in seg_exposure]
+    return trades, equity_curve, exposure_curve
+
+
+def stability_stats(folds, param_names=()):
+    """各折样本外指标的分布与参数漂移"""
+    test_sharpe = np.array([f["test"].get("sharpe_ratio", 0.0) for f in folds], dtype=np.float64)
+    test_return = np.array([f["test"]["total_return"] for f in folds], dtype=np.float64)
+    train_sharpe = np.array([f["train"].get("sharpe_ratio", 0.0) for f in folds], dtype=np.float64)
+    stats = {
+        "folds": len(folds),
+        "no_trade_folds": sum(1 for f in folds if f["test"]["status"] != "success"),
+        "test_sharpe_mean": round(float(test_sharpe.mean()), 2),
+        "test_sharpe_std": round(float(test_sharpe.std()), 2),
+        "test_sharpe_min": round(float(test_sharpe.min()), 2),
+        "test_sharpe_median": round(float(np.median(test_sharpe)), 2),
+        "test_return_mean": round(float(test_return.mean()), 4),
+        "positive_fold_ratio": round(float((test_return > 0).mean()), 2),
+        "train_sharpe_mean": round(float(train_sharpe.mean()), 2),
+        # 样本外 / 样本内 Sharpe 之比, 接近 1 表示过拟合程度低
+        "walk_forward_efficiency": round(float(test_sharpe.mean() / train_sharpe.mean()), 2)
+        if train_sharpe.mean() > 0 else 0.0,
+    }
+    if param_names:
+        chosen = Counter(tuple(f["params"][n] for n in param_names) for f in folds)
+        stats["modal_param_share"] = round(chosen.most_common(1)[0][1] / len(folds), 2)
+        dispersion = {}
+        for name in param_names:
+            values = [f["params"][name] for f in folds]
+            if all(isinstance(v, (int, float)) for v in values):
+                dispersion[name] = {"min": min(values), "max": max(values),
+                                    "std": round(float(np.std(values)), 6)}
+        stats["param_dispersion"] = dispersion
+    return stats
+
+
+def run_walk_forward(strategy_path, days=180, initial_capital=100000.0, data_dir=None,
+                     timeframe="15Min", scheme="rolling", train_days=60, test_days=20, step_days=None,
+                     n_folds=5, purge_bars=None, embargo_bars=0, param_sets=None, param_names=(),
+                     select_by="sharpe_ratio", workers=None, chunk_size=64):
+    """
+    执行滚动前推评估
+
+    Args:
+        param_sets: 每折重新拟合时的候选参数组 (None 表示使用默认参数, 不拟合)
+        param_names: 参与拟合的参数名 (用于报告参数漂移)
+        select_by: 训练段上的选参指标
+    """
+    module = load_strategy(strategy_path)
+    meta = module.STRATEGY_META
+    try:
+        symbol = primary_symbol(meta)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    columns = {name: np.asarray(col) for name, col in
+               load_columns(symbol, days, data_dir, timeframe).items()}
+    timestamps = columns["timestamp"]
+    n_bars = len(timestamps)
+
+    periods_per_year = infer_periods_per_year(timestamps)
+    bars_per_day = max(int(round(periods_per_year / TRADING_DAYS)), 1)
+    if purge_bars is None:
+        spacing = max(float(np.median(np.diff(timestamps))) / 60e9, 1.0) if n_bars > 1 else 1.0
+        purge_bars = int(math.ceil(meta["holding_period_minutes"][1] / spacing))
+    folds = make_folds(n_bars, train_days * bars_per_day, test_days * bars_per_day, scheme,
+                       step_days * bars_per_day if step_days else None, purge_bars, embargo_bars,
+                       n_folds)
+    if not folds:
+        return {"status": "error", "message": f"数据不足: {n_bars} 根 bar 无法切分出完整的一折"}
+
+    refit = param_sets is not None
+    chunks = chunk_tasks(module, param_sets if refit else [meta["params"]], chunk_size)
+    tasks = [(fold, chunk, select_by) for fold in folds for chunk in chunks]
+
+    handles, layout = share_columns(columns)
+    best = {}
+    try:
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(strategy_path, layout, initial_capital)) as pool:
+            futures = [pool.submit(evaluate_fold, task) for task in tasks]
+            for future in as_completed(futures):
+                row = future.result()
+                current = best.get(row["fold"])
+                # 分数相同时取下标较小者, 结果与任务完成顺序无关
+                if current is None or (row["score"], -row["index"]) > (current["score"], -current["index"]):
+                    best[row["fold"]] = row
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    results = [best[fold["fold"]] for fold in folds]
+    curves = [row.pop("curve") for row in results]
+    keys = FOLD_METRICS + ((select_by,) if refit and select_by not in FOLD_METRICS else ())
+    fold_reports = []
+    for fold, row in zip(folds, results):
+        report = {
+            "fold": fold["fold"],
+            "train_range": [[format_timestamp(timestamps[a]), format_timestamp(timestamps[b - 1])]
+                            for a, b in fold["train"]],
+            "test_range": [format_timestamp(timestamps[fold["test"][0]]),
+                           format_timestamp(timestamps[fold["test"][1] - 1])],
+            "train": _trim(row["train"], keys),
+            "test": _trim(row["test"], keys),
+        }
+        if refit:
+            report["params"] = {n: row["params"][n] for n in param_names}
+        fold_reports.append(report)
+
+    oos_trades, oos_equity, oos_exposure = stitch_curves(curves, initial_capital)
+    # 与 run_backtest 一致: 样本外无交易不算成功
+    return {
+        "status": "success" if oos_trades else "no_trades",
+        "mode": "walk_forward",
+        "strategy_id": meta["id"],
+        "scheme": scheme,
+        "backtest_days": days,
+        "train_days": train_days,
+        "test_days": test_days,
+        "purge_bars": purge_bars,
+        "embargo_bars": embargo_bars if scheme == "kfold" else 0,
+        "refit": refit,
+        "param_sets": len(param_sets) if refit else 1,
+        "select_by": select_by if refit else None,
+        "out_of_sample": compute_metrics(oos_equity, oos_trades, oos_exposure, periods_per_year,
+                                         initial_capital),
+        "stability": stability_stats(results, param_names if refit else ()),
+        "folds": fold_reports,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def add_arguments(parser):
+    """滚动前推参数 (run_backtest.py --walk-forward 共用)"""
+    parser.add_argument("--scheme", choices=SCHEMES, default="rolling")
+    parser.add_argument("--train-days", type=int, default=60)
+    parser.add_argument("--test-days", type=int, default=20)
+    parser.add_argument("--step-days", type=int, default=None, help="Window step (default: test days)")
+    parser.add_argument("--folds", type=int, default=5, help="Fold count for --scheme kfold")
+    parser.add_argument("--purge-bars", type=int, default=None,
+                        help="Bars dropped from training before each test window "
+                             "(default: max holding period)")
+    parser.add_argument("--embargo-bars", type=int, default=0,
+                        help="Bars dropped from training after each test window (kfold)")
+    parser.add_argument("--param", action="append", default=None,
+                        help="Re-fit this param per fold: name=v1,v2 | name=lo:hi:step | name=lo:hi")
+    parser.add_argument("--sample-mode", choices=["grid", "random", "lhs"], default="grid")
+    parser.add_argument("--samples", type=int, default=100, help="Sample count for random/lhs")
+    parser.add_argument("--select-by", default="sharpe_ratio")
+
+
+def run_from_args(args):
+    """按命令行参数执行 (供 run_backtest.py 复用)"""
+    param_sets, param_names = None, ()
+    if args.param:
+        specs = dict(parse_param_spec(s) for s in args.param)
+        base_params = load_strategy(args.strategy).STRATEGY_META["params"]
+        param_sets = generate_param_sets(base_params, specs, args.sample_mode, args.samples)
+        param_names = tuple(specs)
+    return run_walk_forward(args.strategy, args.days, args.capital, args.data_dir, args.timeframe,
+                            args.scheme, args.train_days, args.test_days, args.step_days,
+                            args.folds, args.purge_bars, args.embargo_bars, param_sets,
+                            param_names, args.select_by, args.workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-Forward / Out-of-Sample Evaluation")
+    parser.add_argument("strategy", help="Path to strategy .py file")
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--months", type=int, default=None, help="Data length in months (30 days each)")
+    parser.add_argument("--capital", type=float, default=100000.0)
+    parser.add_argument("--output", default=None, help="Output JSON path")
+    parser.add_argument("--data-dir", default=None,
+                        help="Bar store root (see bar_store.py); simulated bars when omitted")
+    parser.add_argument("--timeframe", default="15Min")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: CPU count)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.months:
+        args.days = args.months * 30
+
+    result = run_from_args(args)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    oos = result.get("out_of_sample", {})
+    return 0 if result.get("status") == "success" and oos.get("sharpe_ratio", 0) > 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,15 +43,18 @@ STRATEGY_META = {
 }
 
 
-def check_insider_cluster(insider_filings, symbol, params=None):
+def check_insider_cluster(insider_filings, symbol, params=None, as_of=None):
     """
     Check if a stock has a cluster insider buy signal.
 
     Args:
         insider_filings: list of dicts with keys: symbol, insider_name, transaction_type,
-                        shares, price, date, insider_title
+                        shares, price, date, insider_title; or an InsiderClusterDetector
+                        (scripts/insider_clusters.py) fed incrementally
         symbol: stock ticker to check
         params: strategy parameters
+        as_of: evaluation time (ISO string); defaults to now. Pass the bar time
+               when replaying history.
 
     Returns:
         dict: { signal: bool, insider_count: int, details: list }
@@ -59,14 +62,28 @@ def check_insider_cluster(insider_filings, symbol, params=None):
     if params is None:
         params = STRATEGY_META["params"]
 
-    from datetime import datetime, timedelta
-    cutoff = datetime.now() - timedelta(days=params["cluster_window_days"])
+    if hasattr(insider_filings, "check"):
+        return insider_filings.check(symbol, as_of)
+
+    import time
+    from datetime import datetime, timezone
+
+    def to_ns(value):
+        # naive timestamps are UTC, same as scripts/bar_store.parse_timestamp
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp()) * 10**9 + dt.microsecond * 1000
+
+    ns_per_day = 86400 * 10**9
+    now = to_ns(as_of) if as_of else time.time_ns()
+    cutoff = now - params["cluster_window_days"] * ns_per_day
 
     recent_buys = [
         f for f in insider_filings
         if f["symbol"] == symbol
         and f["transaction_type"] == "BUY"
-        and datetime.fromisoformat(f["date"]) >= cutoff
+        and cutoff <= to_ns(f["date"]) <= now
     ]
 
     unique_insiders = set(f["insider_name"] for f in recent_buys)
@@ -82,13 +99,18 @@ def check_insider_cluster(insider_filings, symbol, params=None):
     }
 
 
+def prepare_alt_data(view, symbol, params):
+    """Point-in-time cluster check for the event-driven engine (scripts/event_engine.py)."""
+    return view.insider_cluster(symbol)
+
+
 def generate_signal(bars, insider_data=None, params=None):
     """
     Generate trading signal based on insider cluster + technical confirmation.
 
     Args:
         bars: list of dicts with keys: timestamp, open, high, low, close, volume
-        insider_data: dict from check_insider_cluster()
+        insider_data: dict from check_insider_cluster() or InsiderClusterDetector.check()
         params: strategy parameters
 
     Returns:
@@ -107,11 +129,6 @@ def generate_signal(bars, insider_data=None, params=None):
     current_price = closes[-1]
     high_52w = max(b["high"] for b in bars[-252:]) if len(bars) >= 252 else max(b["high"] for b in bars)
 
-    # Check not at 52-week high
-    if current_price > high_52w * params["max_pct_from_52w_high"]:
-        return {"action": "HOLD", "confidence": 0.0,
-                "reason": f"Price {current_price:.2f} too close to 52w high {high_52w:.2f}"}
-
     # Calculate RSI
     deltas = [closes[i] - closes[i - 1] for i in range(1, len(closes))]
     period = params["rsi_period"]
@@ -124,6 +141,16 @@ def generate_signal(bars, insider_data=None, params=None):
         avg_loss = (avg_loss * (period - 1) + losses[i]) / period
     rsi = 100.0 if avg_loss == 0 else 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
 
+    return decide_signal(current_price, high_52w, rsi, insider_data, params)
+
+
+def decide_signal(current_price, high_52w, rsi, insider_data, params):
+    """Map price, 52w high, RSI and insider data to a trading signal."""
+    # Check not at 52-week high
+    if current_price > high_52w * params["max_pct_from_52w_high"]:
+        return {"action": "HOLD", "confidence": 0.0,
+                "reason": f"Price {current_price:.2f} too close to 52w high {high_52w:.2f}"}
+
     if rsi > params["rsi_max"]:
         return {"action": "HOLD", "confidence": 0.0,
                 "reason": f"RSI={rsi:.1f} > {params['rsi_max']}, overbought"}
@@ -142,3 +169,45 @@ def generate_signal(bars, insider_data=None, params=None):
                    f"RSI={rsi:.1f}, price {current_price:.2f} is "
                    f"{(1 - current_price/high_52w)*100:.1f}% below 52w high"),
     }
+
+
+class SignalState:
+    """
+    Incremental signal state for the live Trader: O(1) work per new bar.
+
+    The 52w high is a monotonic-deque rolling max over 252 bars and RSI is
+    unbounded Wilder smoothing (scripts/indicators.py).
+    """
+
+    def __init__(self, params=None, rsi=None, high_52w=None):
+        from indicators import RollingMax, WilderRSI
+
+        self.params = params if params is not None else STRATEGY_META["params"]
+        self.rsi = rsi or WilderRSI(self.params["rsi_period"])
+        self.high_52w = high_52w or RollingMax(252)
+
+    def update(self, bar, insider_data=None):
+        rsi = self.rsi.update(bar["close"])
+        high_52w = self.high_52w.update(bar["high"])
+        if not insider_data or not insider_data.get("signal"):
+            return {"action": "HOLD", "confidence": 0.0, "reason": "No insider cluster signal"}
+        if rsi is None:
+            return {"action": "HOLD", "confidence": 0.0, "reason": "Insufficient data"}
+        return decide_signal(bar["close"], high_52w, rsi, insider_data, self.params)
+
+    def to_dict(self):
+        return {"params": self.params, "rsi": self.rsi.to_dict(),
+                "high_52w": self.high_52w.to_dict()}
+
+
+def create_signal_state(params=None):
+    """Opt in to the incremental indicator engine (scripts/indicators.py)."""
+    return SignalState(params)
+
+
+def load_signal_state(data):
+    """Restore a SignalState saved with SignalState.to_dict()."""
+    from indicators import indicator_from_dict
+
+    return SignalState(data["params"], indicator_from_dict(data["rsi"]),
+                       indicator_from_dict(data["high_52w"]))
@@ -18,6 +18,8 @@ Feature Map Position:
 - archetype: momentum (bin 0)
 """
 
+import numpy as np
+
 STRATEGY_META = {
     "id": "seed_momentum_rsi_v1",
     "name": "RSI Momentum Reversal",
@@ -91,6 +93,11 @@ def generate_signal(bars, params=None):
     if sma is None:
         return {"action": "HOLD", "confidence": 0.0, "reason": "Insufficient SMA data"}
 
+    return decide_signal(current_price, rsi, sma, params)
+
+
+def decide_signal(current_price, rsi, sma, params):
+    """Map indicator values to a trading signal (shared by all signal paths)."""
     # Buy condition: RSI oversold + price above SMA
     if rsi < params["rsi_oversold"] and current_price > sma:
         confidence = min(0.9, (params["rsi_oversold"] - rsi) / params["rsi_oversold"] + 0.5)
@@ -116,3 +123,134 @@ def generate_signal(bars, params=None):
         }
 
     return {"action": "HOLD", "confidence": 0.0, "reason": f"RSI={rsi:.1f}, no signal"}
+
+
+class SignalState:
+    """
+    Incremental signal state for the live Trader: O(1) work per new bar.
+
+    Uses unbounded Wilder RSI, so values differ slightly from generate_signal,
+    which re-seeds RSI inside each bar window.
+    """
+
+    def __init__(self, params=None, rsi=None, sma=None):
+        from indicators import SMA, WilderRSI
+
+        self.params = params if params is not None else STRATEGY_META["params"]
+        self.rsi = rsi or WilderRSI(self.params["rsi_period"])
+        self.sma = sma or SMA(self.params["sma_period"])
+
+    def update(self, bar):
+        rsi = self.rsi.update(bar["close"])
+        sma = self.sma.update(bar["close"])
+        if rsi is None or sma is None:
+            return {"action": "HOLD", "confidence": 0.0, "reason": "Insufficient data"}
+        return decide_signal(bar["close"], rsi, sma, self.params)
+
+    def to_dict(self):
+        return {"params": self.params, "rsi": self.rsi.to_dict(), "sma": self.sma.to_dict()}
+
+
+def create_signal_state(params=None):
+    """Opt in to the incremental indicator engine (scripts/indicators.py)."""
+    return SignalState(params)
+
+
+def load_signal_state(data):
+    """Restore a SignalState saved with SignalState.to_dict()."""
+    from indicators import indicator_from_dict
+
+    return SignalState(data["params"], indicator_from_dict(data["rsi"]),
+                       indicator_from_dict(data["sma"]))
+
+
+# Params that change indicator values; the rest are thresholds, so parameter
+# sweeps can reuse compute_indicators_batch output across them.
+INDICATOR_PARAMS = ("rsi_period", "sma_period")
+
+
+def generate_signals_batch(close, high, low, volume, params=None, window=51):
+    """
+    Columnar variant of generate_signal for the backtest runner.
+
+    Element i equals generate_signal(bars[i - window + 1 : i + 1], params).
+
+    Args:
+        close, high, low, volume: equal-length NumPy arrays
+        params: strategy parameters (defaults to STRATEGY_META["params"])
+        window: number of bars seen by each signal
+
+    Returns:
+        (actions, confidences): int8 array (1=BUY, -1=SELL, 0=HOLD), float64 array
+    """
+    if params is None:
+        params = STRATEGY_META["params"]
+    indicators = compute_indicators_batch(close, high, low, volume, params, window)
+    return signals_from_indicators(indicators, params)
+
+
+def compute_indicators_batch(close, high, low, volume, params=None, window=51):
+    """
+    Per-window RSI and SMA arrays; depends only on INDICATOR_PARAMS.
+
+    Within a fixed window, seeded Wilder smoothing is a fixed linear filter over
+    the window's deltas, so every window's RSI is one sliding dot product.
+    Returns a dict with the full-length bar count and arrays aligned to the
+    last bar of each complete window (empty when no window fits).
+    """
+    if params is None:
+        params = STRATEGY_META["params"]
+
+    close = np.asarray(close, dtype=np.float64)
+    n_bars = len(close)
+    period = params["rsi_period"]
+    sma_period = params["sma_period"]
+    n_deltas = window - 1
+    indicators = {"n_bars": n_bars, "offset": n_deltas,
+                  "rsi": np.empty(0), "sma": np.empty(0), "price": np.empty(0)}
+    if n_bars < window or window < max(period + 1, sma_period):
+        return indicators
+
+    deltas = np.diff(close)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    decay = (period - 1) / period
+    weights = np.empty(n_deltas)
+    weights[:period] = decay ** (n_deltas - period) / period
+    weights[period:] = decay ** np.arange(n_deltas - period - 1, -1, -1) / period
+
+    avg_gain = np.convolve(gains, weights[::-1], mode="valid")
+    avg_loss = np.convolve(losses, weights[::-1], mode="valid")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+    sma = np.convolve(close, np.full(sma_period, 1.0 / sma_period), mode="valid")
+    indicators["rsi"] = rsi
+    indicators["sma"] = sma[n_deltas - sma_period + 1:]
+    indicators["price"] = close[n_deltas:]
+    return indicators
+
+
+def signals_from_indicators(indicators, params):
+    """Apply the threshold params to compute_indicators_batch output."""
+    actions = np.zeros(indicators["n_bars"], dtype=np.int8)
+    confidences = np.zeros(indicators["n_bars"], dtype=np.float64)
+    rsi, sma, price = indicators["rsi"], indicators["sma"], indicators["price"]
+    if len(rsi) == 0:
+        return actions, confidences
+
+    buy = (rsi < params["rsi_oversold"]) & (price > sma)
+    sell_overbought = ~buy & (rsi > params["rsi_overbought"])
+    sell_breakdown = ~buy & ~sell_overbought & (price < sma * 0.99)
+
+    out_actions = actions[indicators["offset"]:]
+    out_conf = confidences[indicators["offset"]:]
+    out_actions[buy] = 1
+    out_conf[buy] = np.round(np.minimum(
+        0.9, (params["rsi_oversold"] - rsi[buy]) / params["rsi_oversold"] + 0.5), 2)
+    out_actions[sell_overbought] = -1
+    out_conf[sell_overbought] = 0.8
+    out_actions[sell_breakdown] = -1
+    out_conf[sell_breakdown] = 0.7
+    return actions, confidences
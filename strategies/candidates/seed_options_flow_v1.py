@@ -35,6 +35,9 @@ STRATEGY_META = {
         "min_volume_oi_ratio": 10,
         "max_dte": 30,
         "min_trades": 2,  # at least 2 unusual trades same direction
+        "unusual_trade_types": ("sweep", "block"),
+        "bullish_call_ratio": 0.7,  # call share of unusual premium above this = bullish
+        "bearish_call_ratio": 0.3,  # ... below this = bearish
         "stop_loss_pct": -0.03,
         "take_profit_pct": 0.05,
         "max_position_pct": 0.03,
@@ -43,32 +46,46 @@ STRATEGY_META = {
 }
 
 
-def analyze_options_flow(flow_data, symbol, params=None):
+def analyze_options_flow(flow_data, symbol, params=None, as_of=None):
     """
     Analyze unusual options flow for a given symbol.
 
     Args:
         flow_data: list of dicts with keys: symbol, option_type (call/put),
-                   strike, expiry, premium, volume, open_interest, trade_type (sweep/block)
+                   strike, expiry, premium, volume, open_interest, trade_type (sweep/block);
+                   or an OptionsFlowStore (scripts/options_flow_store.py), queried via its index
         symbol: stock ticker
         params: strategy parameters
+        as_of: reference time for days-to-expiry (default: now)
 
     Returns:
         dict: { signal: str (bullish/bearish/neutral), strength: float, details: list }
+
+    The "unusual" and direction rules are the params above; OptionsFlowStore.screen /
+    classify_flow read the same keys (defaulting to this STRATEGY_META).
     """
-    if params is None:
-        params = STRATEGY_META["params"]
+    params = {**STRATEGY_META["params"], **(params or {})}
+
+    if hasattr(flow_data, "analyze"):
+        return flow_data.analyze(symbol, params, as_of)
 
     from datetime import datetime, timedelta
-    max_expiry = datetime.now() + timedelta(days=params["max_dte"])
+    now = datetime.fromisoformat(as_of.replace("Z", "")) if as_of else datetime.now()
+    max_expiry = now + timedelta(days=params["max_dte"])
+    expiry_ok = {}  # each distinct expiry string is parsed once
+
+    def within_dte(expiry):
+        if expiry not in expiry_ok:
+            expiry_ok[expiry] = datetime.fromisoformat(expiry) <= max_expiry
+        return expiry_ok[expiry]
 
     unusual = [
         f for f in flow_data
         if f["symbol"] == symbol
         and f["premium"] >= params["min_premium_usd"]
         and f["volume"] / max(f["open_interest"], 1) >= params["min_volume_oi_ratio"]
-        and datetime.fromisoformat(f["expiry"]) <= max_expiry
-        and f["trade_type"] in ("sweep", "block")
+        and within_dte(f["expiry"])
+        and f["trade_type"] in params["unusual_trade_types"]
     ]
 
     if len(unusual) < params["min_trades"]:
@@ -83,21 +100,55 @@ def analyze_options_flow(flow_data, symbol, params=None):
 
     call_ratio = call_premium / total_premium
 
-    if call_ratio > 0.7:
+    if call_ratio > params["bullish_call_ratio"]:
         return {"signal": "bullish", "strength": call_ratio, "details": unusual}
-    elif call_ratio < 0.3:
+    elif call_ratio < params["bearish_call_ratio"]:
         return {"signal": "bearish", "strength": 1 - call_ratio, "details": unusual}
     else:
         return {"signal": "neutral", "strength": 0.0, "details": unusual}
 
 
+def screen_options_flow(store, params=None, as_of=None, since=None):
+    """
+    Screen the whole options tape in one vectorized pass.
+
+    Args:
+        store: OptionsFlowStore (scripts/options_flow_store.py)
+        params: strategy parameters
+        as_of: reference time for days-to-expiry (default: now)
+        since: only count trades at or after this time (e.g. today's open)
+
+    Returns:
+        dict: { symbol: { signal, strength, num_trades, total_premium } } for
+              bullish/bearish symbols; each value is accepted by generate_signal()
+    """
+    if params is None:
+        params = STRATEGY_META["params"]
+    screen = store.screen(params, as_of, since)
+    results = {}
+    for i in screen["signal"].nonzero()[0]:
+        results[screen["symbol"][i]] = {
+            "signal": "bullish" if screen["signal"][i] > 0 else "bearish",
+            "strength": float(screen["strength"][i]),
+            "num_trades": int(screen["num_trades"][i]),
+            "total_premium": float(screen["call_premium"][i] + screen["put_premium"][i]),
+            "details": [],
+        }
+    return results
+
+
+def prepare_alt_data(view, symbol, params):
+    """Point-in-time flow analysis for the event-driven engine (scripts/event_engine.py)."""
+    return analyze_options_flow(view.options_flow(symbol), symbol, params, as_of=view.as_of)
+
+
 def generate_signal(bars, flow_analysis=None, params=None):
     """
     Generate trading signal based on unusual options flow + price confirmation.
 
     Args:
         bars: list of dicts with keys: timestamp, open, high, low, close, volume
-        flow_analysis: dict from analyze_options_flow()
+        flow_analysis: dict from analyze_options_flow() or screen_options_flow()
         params: strategy parameters
 
     Returns:
@@ -118,8 +169,9 @@ def generate_signal(bars, flow_analysis=None, params=None):
 
     signal = flow_analysis["signal"]
     strength = flow_analysis["strength"]
-    num_trades = len(flow_analysis["details"])
-    total_premium = sum(f["premium"] for f in flow_analysis["details"])
+    num_trades = flow_analysis.get("num_trades", len(flow_analysis["details"]))
+    total_premium = flow_analysis.get("total_premium",
+                                      sum(f["premium"] for f in flow_analysis["details"]))
 
     # Confidence based on flow strength and number of trades
     base_confidence = 0.55 + min(0.25, (strength - 0.7) * 0.5)
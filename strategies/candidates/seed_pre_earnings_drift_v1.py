@@ -125,6 +125,30 @@ def evaluate_pre_earnings_setup(symbol, earnings_date, market_data, params=None)
     }
 
 
+def prepare_alt_data(view, symbol, params):
+    """
+    Build the earnings setup from the event-driven engine's point-in-time view
+    (scripts/event_engine.py). Inside the entry window the setup is evaluated;
+    on or after exit_days_before_earnings a SELL closes the position.
+    """
+    upcoming = view.next_earnings(symbol)
+    if upcoming is None:
+        return None
+    days_left = view.days_until(upcoming["earnings_date"])
+    if days_left <= params["exit_days_before_earnings"]:
+        return {"signal": "SELL", "confidence": 1.0, "reason": "Exit before earnings announcement"}
+    if days_left > params["entry_days_before_earnings"]:
+        return None
+
+    market_data = {
+        "analyst_revision_trend": upcoming.get("analyst_revision_trend", "flat"),
+        "unusual_options_signal": view.options_signal(symbol)["signal"],
+        "insider_selling_30d": view.insider_selling(symbol, 30),
+        "iv_rank": upcoming.get("iv_rank", 50),
+    }
+    return evaluate_pre_earnings_setup(symbol, upcoming["earnings_date"], market_data, params)
+
+
 def generate_signal(bars, earnings_setup=None, params=None):
     """
     Generate trading signal for pre-earnings drift.
@@ -0,0 +1,5 @@
+"""scripts/ 下的模块以顶层模块互相导入, 测试同样从 scripts/ 导入"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
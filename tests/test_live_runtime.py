@@ -0,0 +1,179 @@
+"""LiveRuntime: 模拟撮合下的成交与持仓、延迟预算、风控 HALT、策略删除平仓"""
+import asyncio
+
+import pytest
+
+import live_runtime
+from bar_store import parse_timestamp
+from live_runtime import LiveRuntime, ReplayFeed, SimulatedBroker
+from portfolio_backtest import load_risk_params
+from risk_engine import RiskEngine
+from run_backtest import LOOKBACK
+from strategy_registry import StrategyRegistry
+
+START = parse_timestamp("2026-01-05T14:30:00Z")
+BAR_NS = 15 * 60 * 10**9
+
+STRATEGY = '''
+import time
+
+STRATEGY_META = {{
+    "id": "{id}",
+    "name": "{id}",
+    "version": "1.0.0",
+    "archetype": "momentum",
+    "asset_class": "equity",
+    "holding_period_minutes": [15, 240],
+    "symbols": ["AAA"],
+    "signal_sources": ["technical"],
+    "params": {{"stop_loss_pct": -0.5, "take_profit_pct": 0.5, "max_position_pct": 0.05}},
+}}
+
+
+def generate_signal(bars, params=None):
+    time.sleep({delay})
+    if bars[-1]["close"] >= {sell_above}:
+        return {{"action": "SELL", "confidence": 0.9, "reason": "target"}}
+    return {{"action": "BUY", "confidence": 0.9, "reason": "entry"}}
+'''
+
+
+STATEFUL = '''
+
+class State:
+    def update(self, bar):
+        raise AssertionError("thread 模式不应使用增量状态")
+
+
+def create_signal_state(params):
+    return State()
+'''
+
+
+class ListFeed:
+    """内存 K 线源: 按给定收盘价逐根给出 AAA 的 15 分钟 bar"""
+
+    def __init__(self, closes):
+        self.closes = closes
+
+    async def __aiter__(self):
+        for i, close in enumerate(self.closes):
+            ts = START + i * BAR_NS
+            yield ts, {"AAA": {"timestamp": ts, "open": close, "high": close, "low": close,
+                               "close": close, "volume": 1000}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    """每个测试使用独立注册表, 不写字节码缓存"""
+    monkeypatch.setattr(live_runtime, "registry", StrategyRegistry(bytecode_dir=None))
+
+
+def write_strategy(directory, strategy_id, delay=0.0, sell_above=110.0):
+    """策略: 收盘价达到 sell_above 时卖出, 否则买入 (持仓期间买入信号被忽略)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{strategy_id}.py"
+    path.write_text(STRATEGY.format(id=strategy_id, delay=delay, sell_above=sell_above))
+    return path
+
+
+def make_runtime(broker, **kwargs):
+    return LiveRuntime(broker, symbols=["AAA"], risk_params=load_risk_params(), **kwargs)
+
+
+def test_fills_and_positions(tmp_path):
+    path = write_strategy(tmp_path, "buy_then_sell")
+    broker = SimulatedBroker(100000.0)
+    runtime = make_runtime(broker, strategy_paths=[path], modes={"buy_then_sell": "inline"})
+    report = asyncio.run(runtime.run(ListFeed([100.0] * (LOOKBACK + 3) + [110.0])))
+
+    # 预热结束后的第一根 bar 买入 5% 权益, 其后持有, 收盘价到 110 卖出
+    assert report["orders"] == 2 and report["fills"] == 2
+    assert [(f["side"], f["qty"], f["price"]) for f in broker.fills] == [("buy", 50, 100.0), ("sell", 50, 110.0)]
+    assert broker.positions == {}
+    assert report["trades"] == 1 and report["realized_pnl"] == 500.0
+    assert report["account"]["equity"] == 100500.0
+    assert report["strategies"]["buy_then_sell"]["positions"] == {}
+
+
+def test_replay_feed_positions(tmp_path):
+    path = write_strategy(tmp_path, "always_buy", sell_above=1e12)
+    broker = SimulatedBroker(100000.0)
+    runtime = make_runtime(broker, strategy_paths=[path])
+    report = asyncio.run(runtime.run(ReplayFeed(["AAA"], days=5)))
+
+    # 合成行情: 预热后首根 bar 买入; 止损 / 止盈设为 ±50%, 之后一直持有
+    assert report["bars"] > LOOKBACK + 1
+    assert [f["side"] for f in broker.fills] == ["buy"]
+    assert broker.positions == {"AAA": broker.fills[0]["qty"]}
+    assert report["strategies"]["always_buy"]["positions"] == broker.positions
+    assert report["strategies"]["always_buy"]["mode"] == "thread"
+
+
+def test_slow_thread_strategy_is_dropped(tmp_path):
+    path = write_strategy(tmp_path, "slow", delay=0.05)
+    broker = SimulatedBroker(100000.0)
+    runtime = make_runtime(broker, strategy_paths=[path], modes={"slow": "thread"}, latency_budget_ms=5)
+    report = asyncio.run(runtime.run(ListFeed([100.0] * (LOOKBACK + 3))))
+
+    # 预热期 (前 LOOKBACK 根) 不计算信号; 之后每根 bar 都超出预算, 不用过期信号下单
+    assert report["dropped"] == 3
+    assert report["overruns"] == 3
+    assert report["strategies"]["slow"]["dropped"] == 3
+    assert all(e["kind"] == "signal" for e in report["recent_overruns"])
+    assert report["orders"] == 0 and broker.fills == []
+
+
+def test_stateful_strategy_keeps_state_inline_only(tmp_path):
+    path = write_strategy(tmp_path, "stateful")
+    with open(path, "a") as f:
+        f.write(STATEFUL)
+    runtime = make_runtime(SimulatedBroker(100000.0), strategy_paths=[path],
+                           modes={"stateful": "thread"})
+    slot = next(iter(runtime.slots.values()))
+    report = asyncio.run(runtime.run(ListFeed([100.0] * (LOOKBACK + 3))))
+
+    # thread 模式下被丢弃的任务仍在线程中运行, 不能共享增量状态: 改为调用 generate_signal
+    assert slot.mode == "thread" and slot.states is None
+    assert report["strategies"]["stateful"]["signals"] == 3 and report["fills"] == 1
+
+
+def test_risk_halt_blocks_orders(tmp_path):
+    path = write_strategy(tmp_path, "buy_then_sell")
+    broker = SimulatedBroker(100000.0)
+    risk = RiskEngine({"risk_limits": {"concentration_halt": 0.01}}, equity=100000.0)
+    runtime = make_runtime(broker, strategy_paths=[path], modes={"buy_then_sell": "inline"}, risk=risk)
+    report = asyncio.run(runtime.run(ListFeed([100.0] * (LOOKBACK + 3) + [110.0])))
+
+    # 买入 5% 后集中度超过 HALT 阈值, 之后的卖出信号不再下单
+    assert [f["side"] for f in broker.fills] == ["buy"]
+    assert broker.positions == {"AAA": 50}
+    assert report["risk"]["halted"] and report["risk"]["level"] == "HALT"
+    assert report["halted_bars"] == 3
+    assert [e["type"] for e in runtime.events].count("halt") == 1
+
+
+def test_removed_strategy_is_flattened(tmp_path):
+    strategy_dir = tmp_path / "production"
+    path = write_strategy(strategy_dir, "always_buy", sell_above=1e12)
+    broker = SimulatedBroker(100000.0)
+    runtime = make_runtime(broker, strategy_dir=strategy_dir, modes={"always_buy": "inline"})
+
+    async def drive():
+        feed = ListFeed([100.0] * (LOOKBACK + 3) + [105.0])
+        async for ts, bars in feed:
+            if ts == START + (LOOKBACK + 3) * BAR_NS:
+                path.unlink()
+                runtime.refresh()
+            await runtime.on_bars(ts, bars)
+
+    try:
+        asyncio.run(drive())
+    finally:
+        runtime.close()
+
+    assert [(f["side"], f["qty"]) for f in broker.fills] == [("buy", 50), ("sell", 50)]
+    assert broker.positions == {}
+    assert runtime.slots == {}
+    assert runtime.trades[0]["pnl"] == 250.0
+    assert any(e["type"] == "refresh" and e["removed"] for e in runtime.events)
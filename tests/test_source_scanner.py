@@ -0,0 +1,137 @@
+"""SourceScanner: 本地 http.server 上的条件请求、keep-alive 复用、跨源去重与失败退避"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from source_scanner import BACKOFF_SECONDS, SourceScanner, load_sources
+
+RSS = ('<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>' + "".join(
+    f"<item><title>Paper {i} on momentum</title><link>http://example.org/{i}</link>"
+    f"<description>Abstract {i} about factors</description></item>" for i in range(3))
+    + "</channel></rss>").encode()
+# 第一条与 RSS 第一条内容相同 (交叉列表), 第二条独有
+ATOM = (b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        b'<entry><title>Paper 0 on momentum</title><link href="http://mirror.org/0"/>'
+        b"<summary>Abstract 0 about factors</summary></entry>"
+        b'<entry><title>Atom only</title><link href="http://mirror.org/1"/>'
+        b"<summary>Only in the atom feed</summary></entry></feed>")
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, body=b"", headers=()):
+        self.send_response(code)
+        for name, value in headers:
+            self.send_header(name, value)
+        if code != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if code != 304:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.server.state
+        state["connections"].add(self.client_address)
+        state["requests"].append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/rss":
+            if self.headers.get("If-None-Match") == ETAG:
+                return self.reply(304, headers=[("ETag", ETAG)])
+            return self.reply(200, RSS, [("ETag", ETAG), ("Content-Type", "application/rss+xml")])
+        if self.path == "/atom":
+            return self.reply(200, ATOM, [("Content-Type", "application/atom+xml")])
+        if self.path == "/flaky" and state["healthy"]:
+            return self.reply(200, RSS, [("Content-Type", "application/rss+xml")])
+        return self.reply(500, b"boom")
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.state = {"connections": set(), "requests": [], "healthy": False}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def source(httpd, path, interval_hours=24.0):
+    return {"id": f"test/{path}", "name": path, "url": f"http://127.0.0.1:{httpd.server_port}/{path}",
+            "interval_hours": interval_hours, "dest": f"knowledge/market/{path}"}
+
+
+def scanner(tmp_path):
+    return SourceScanner(tmp_path, tmp_path / "state", per_host=1, timeout=5.0)
+
+
+def test_etag_then_not_modified(tmp_path, server):
+    rss = source(server, "rss")
+    first = asyncio.run(scanner(tmp_path).scan([rss]))
+    assert first["updated"] == 1 and first["new_items"] == 3
+    written = list((tmp_path / "knowledge" / "market" / "rss").glob("*.jsonl"))
+    assert len(written) == 1 and len(written[0].read_text().splitlines()) == 3
+
+    # 新实例从 state_dir 恢复 ETag
+    second = asyncio.run(scanner(tmp_path).scan([rss]))
+    assert second["not_modified"] == 1 and second["new_items"] == 0
+    assert server.state["requests"] == [("/rss", None), ("/rss", ETAG)]
+
+
+def test_keep_alive_reuse(tmp_path, server):
+    report = asyncio.run(scanner(tmp_path).scan([source(server, "rss"), source(server, "atom")]))
+    assert report["requests"] == 2
+    assert report["connections"] == 1 and report["reused_connections"] == 1
+    assert len(server.state["connections"]) == 1
+
+
+def test_cross_source_dedup(tmp_path, server):
+    report = asyncio.run(scanner(tmp_path).scan([source(server, "rss"), source(server, "atom")]))
+    assert report["new_items"] == 4 and report["duplicates"] == 1
+    seen = (tmp_path / "state" / "seen.txt").read_text().split()
+    assert len(seen) == len(set(seen)) == 4
+
+    # 去重集合持久化: 新实例重新抓取不再写入
+    again = asyncio.run(scanner(tmp_path).scan([source(server, "atom")]))
+    assert again["unchanged"] == 1 and again["new_items"] == 0
+
+
+def test_failure_backoff(tmp_path, server):
+    flaky = source(server, "flaky", interval_hours=2.0)
+    scan = scanner(tmp_path)
+    # 900s, 1800s, 3600s, 之后不超过间隔 (7200s)
+    for failures, delay in enumerate([BACKOFF_SECONDS, 2 * BACKOFF_SECONDS, 4 * BACKOFF_SECONDS, 7200, 7200], 1):
+        before = time.time()
+        report = asyncio.run(scan.scan([flaky]))
+        after = time.time()
+        entry = scan.state[flaky["id"]]
+        assert report["failed"] == 1 and "HTTP 500" in report["errors"][flaky["id"]]
+        assert entry["failures"] == failures
+        assert before + delay <= entry["next_due"] <= after + delay
+        assert scan.due([flaky], now=after) == []
+
+    server.state["healthy"] = True
+    before = time.time()
+    report = asyncio.run(scan.scan([flaky]))
+    entry = scan.state[flaky["id"]]
+    assert report["updated"] == 1
+    assert entry["failures"] == 0 and entry["next_due"] >= before + 7200
+
+
+def test_duplicate_names_get_matching_suffix(tmp_path):
+    path = tmp_path / "monitor-list.json"
+    path.write_text(json.dumps({"industry_blogs": [
+        {"name": "Quant Blog", "url": "http://a/feed", "scan_interval_hours": 24},
+        {"name": "Quant Blog", "url": "http://b/feed", "scan_interval_hours": 24},
+    ]}))
+    sources, _ = load_sources(path)
+    assert [s["id"] for s in sources] == ["industry-blogs/quant-blog", "industry-blogs/quant-blog-2"]
+    assert [s["dest"] for s in sources] == ["knowledge/sources/quant-blog", "knowledge/sources/quant-blog-2"]